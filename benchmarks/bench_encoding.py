@@ -0,0 +1,93 @@
+"""
+Benchmark subtitle burn-in wall time and output size for each encoding profile
+
+用法:
+    python benchmarks/bench_encoding.py                      # 生成30秒720p测试视频
+    python benchmarks/bench_encoding.py --input clip.mp4 --profiles fast balanced
+"""
+
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from synthetic import make_sample_clip, make_srt
+from video_subtitle_translator.config import ENCODING_PROFILES
+from video_subtitle_translator.encoding import resolve_profile
+from video_subtitle_translator.video_merger_alt import merge_with_drawtext
+
+
+def probe_duration(path: Path) -> float:
+    result = subprocess.run(
+        [
+            "ffprobe",
+            "-v",
+            "error",
+            "-show_entries",
+            "format=duration",
+            "-of",
+            "default=noprint_wrappers=1:nokey=1",
+            str(path),
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(result.stdout.strip())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="字幕烧录编码配置基准测试")
+    parser.add_argument("--input", default=None, help="样例视频，默认用ffmpeg测试源生成")
+    parser.add_argument("--duration", type=int, default=30, help="生成样例视频的时长（秒）")
+    parser.add_argument("--size", default="1280x720", help="生成样例视频的分辨率")
+    parser.add_argument(
+        "--profiles",
+        nargs="+",
+        default=["fast", "balanced", "archive"],
+        choices=list(ENCODING_PROFILES),
+        help="参与比较的编码配置",
+    )
+    parser.add_argument("--threads", type=int, default=None, help="编码线程数")
+    parser.add_argument("--match-bitrate", action="store_true", help="按源视频码率编码")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        if args.input:
+            clip = Path(args.input)
+        else:
+            clip = tmp / "sample.mp4"
+            print(f"生成样例视频: {args.size}, {args.duration}s ...")
+            make_sample_clip(clip, args.duration, args.size)
+        duration = probe_duration(clip)
+        srt = tmp / "sample.srt"
+        make_srt(srt, int(duration // 2))  # 每2秒一条字幕
+
+        results = []
+        for name in args.profiles:
+            encoding = resolve_profile(
+                name, threads=args.threads, match_bitrate=args.match_bitrate
+            )
+            output = tmp / f"out_{name}{clip.suffix}"
+            start = time.perf_counter()
+            merge_with_drawtext(str(clip), str(srt), str(output), encoding=encoding)
+            elapsed = time.perf_counter() - start
+            results.append((name, elapsed, output.stat().st_size))
+
+    print(f"\n样例时长: {duration:.1f}s")
+    print(f"{'配置':<10}{'耗时(s)':>10}{'实时倍速':>10}{'大小(MB)':>10}")
+    for name, elapsed, size in results:
+        print(
+            f"{name:<10}{elapsed:>10.2f}{duration / elapsed:>9.1f}x"
+            f"{size / 1024 / 1024:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""
+Benchmark suite for the subtitle pipeline with stored baselines
+
+字幕解析/生成、翻译（本地模拟Ollama）、字幕合成各阶段的耗时与吞吐，
+结果可保存为基线（benchmarks/baselines/<名称>.json），之后的运行与之对比。
+
+用法:
+    python benchmarks/bench_pipeline.py                          # 全部套件
+    python benchmarks/bench_pipeline.py --suites subtitles --sizes 10 1000 100000
+    python benchmarks/bench_pipeline.py --save-baseline main     # 保存为基线
+    python benchmarks/bench_pipeline.py --compare main           # 与基线对比
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mock_ollama import MockOllamaServer
+from synthetic import make_cues, make_sample_clip, make_srt
+from video_subtitle_translator.subtitle_generator import generate_ass, generate_srt
+from video_subtitle_translator.subtitle_parser import parse_srt
+from video_subtitle_translator.translator import Translator
+
+BASELINE_DIR = Path(__file__).parent / "baselines"
+SUITES = ("subtitles", "translation", "merge")
+
+
+def measure(func: Callable, repeat: int, min_time: float = 0.2) -> Dict:
+    """
+    重复执行并计时（被测函数的打印输出被丢弃）
+
+    单次耗时很短时每个样本连续执行多次，使样本不短于 min_time，减少计时噪声。
+
+    Returns:
+        {"seconds": 单次耗时中位数, "min": 单次耗时最小值, "runs": 样本数,
+         "calls": 被测函数的总执行次数}
+    """
+
+    def sample(number: int) -> float:
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            return (time.perf_counter() - start) / number
+
+    first = sample(1)
+    number = max(1, math.ceil(min_time / first)) if first > 0 else 1
+    times = [sample(number) for _ in range(repeat)]
+    return {
+        "seconds": statistics.median(times),
+        "min": min(times),
+        "runs": repeat,
+        "calls": 1 + number * repeat,
+    }
+
+
+def bench_subtitles(tmp: Path, sizes: List[int], repeat: int) -> Dict[str, Dict]:
+    """SRT解析与SRT/ASS生成"""
+    results = {}
+    for size in sizes:
+        cues = make_cues(size)
+        srt = tmp / f"cues_{size}.srt"
+        with contextlib.redirect_stdout(io.StringIO()):
+            make_srt(srt, size)
+        for name, func in (
+            ("parse_srt", lambda: parse_srt(str(srt))),
+            ("generate_srt", lambda: generate_srt(cues, str(tmp / "out.srt"))),
+            ("generate_ass", lambda: generate_ass(cues, str(tmp / "out.ass"))),
+        ):
+            results[f"subtitles.{name}[{size}]"] = dict(
+                measure(func, repeat), items=size, unit="cues"
+            )
+    return results
+
+
+def bench_translation(
+    segments: int,
+    latency: float,
+    concurrency: int,
+    batch_size: int,
+    repeat: int,
+    context_lines: List[int] = (0,),
+    stream: bool = True,
+    token_latency: float = 0.0,
+    ramble: int = 0,
+) -> Dict[str, Dict]:
+    """
+    Translator.translate_segments，Ollama由固定延迟的本地模拟服务代替
+
+    除耗时外另记每分钟视频（合成字幕每2秒一条）的请求数与token数，
+    用于比较逐句/批量与上下文窗口翻译的开销；以及服务端实际生成的token数
+    与流式请求的首token耗时，用于比较流式提前断开的效果。
+    """
+    results = {}
+    cues = make_cues(segments)
+    minutes = cues[-1]["end"] / 60 if cues else 0
+    with MockOllamaServer(
+        latency=latency, token_latency=token_latency, ramble=ramble
+    ) as server:
+        for lines in context_lines:
+            translator = Translator(
+                host=server.url,
+                concurrency=concurrency,
+                batch_size=batch_size,
+                context_lines=lines,
+                stream=stream,
+            )
+            try:
+                before, generated = server.requests, server.tokens
+                result = measure(
+                    lambda: translator.translate_segments(
+                        [{"text": cue["text"]} for cue in cues]
+                    ),
+                    repeat,
+                )
+                stats = translator.stats_snapshot()
+                summary = translator.stream_summary()
+            finally:
+                translator.close()
+            calls = result["calls"]
+            result["requests"] = (server.requests - before) // calls
+            result["generated_tokens"] = (server.tokens - generated) // calls
+            if "ttft_ms" in summary:
+                result["ttft_ms"] = summary["ttft_ms"]
+            tokens = (stats["prompt_tokens"] + stats["completion_tokens"]) // calls
+            if minutes:
+                result["requests_per_minute"] = round(result["requests"] / minutes, 2)
+                result["tokens_per_minute"] = round(tokens / minutes, 1)
+            key = f"translation.translate_segments[{segments},j={concurrency},b={batch_size}"
+            # 不带上下文时保持原有的键名，与已保存的基线对比
+            key += f",c={lines}" if lines else ""
+            key += "]" if stream else ",nostream]"
+            results[key] = dict(result, items=segments, unit="segments", latency=latency)
+    return results
+
+
+def bench_merge(
+    tmp: Path, duration: float, size: str, modes: List[str], repeat: int
+) -> Dict[str, Dict]:
+    """各字幕合成方式（需要ffmpeg，含libx264与libass）"""
+    if shutil.which("ffmpeg") is None:
+        print("⚠ 未找到ffmpeg，跳过 merge 套件")
+        return {}
+    from video_subtitle_translator.parallel_burn import merge_parallel_chunks
+    from video_subtitle_translator.smart_render import merge_smart_render
+    from video_subtitle_translator.video_merger import mux_subtitle_track
+    from video_subtitle_translator.video_merger_alt import merge_with_drawtext
+
+    clip = tmp / "sample.mp4"
+    print(f"生成样例视频: {size}, {duration}s ...")
+    make_sample_clip(clip, duration, size)
+    # 字幕稀疏（每10秒一条）时智能渲染才有可复制的区间
+    srt = tmp / "sample.srt"
+    with contextlib.redirect_stdout(io.StringIO()):
+        make_srt(srt, max(1, int(duration // 10)), spacing=10.0)
+
+    mergers = {
+        "burn": lambda out: merge_with_drawtext(str(clip), str(srt), out),
+        "mux": lambda out: mux_subtitle_track(str(clip), str(srt), out),
+        "smart": lambda out: merge_smart_render(str(clip), str(srt), out),
+        "parallel": lambda out: merge_parallel_chunks(str(clip), str(srt), out),
+    }
+    frames = duration * 30
+    results = {}
+    for mode in modes:
+        output = str(tmp / f"out_{mode}.mp4")
+        result = measure(lambda: mergers[mode](output), repeat)
+        results[f"merge.{mode}[{duration:g}s@{size}]"] = dict(
+            result, items=frames, unit="frames"
+        )
+    return results
+
+
+def load_baseline(name: str) -> Dict:
+    path = BASELINE_DIR / f"{name}.json"
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(name: str, results: Dict[str, Dict]) -> Path:
+    """保存基线，同名基线中本次未运行的项保留原值"""
+    path = BASELINE_DIR / f"{name}.json"
+    baseline = {"results": {}}
+    if path.exists():
+        baseline = load_baseline(name)
+    baseline["results"].update(results)
+    baseline["machine"] = {
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+    }
+    baseline["saved"] = time.strftime("%Y-%m-%d %H:%M:%S")
+    BASELINE_DIR.mkdir(exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+    return path
+
+
+def print_report(
+    results: Dict[str, Dict], baseline: Dict[str, Dict] = None, threshold: float = 0.2
+) -> List[str]:
+    """
+    打印结果表，有基线时附带变化比例
+
+    Returns:
+        比基线慢 threshold 以上的项
+    """
+    regressions = []
+    header = f"{'benchmark':<52}{'median(s)':>11}{'throughput':>20}"
+    if baseline is not None:
+        header += f"{'baseline(s)':>13}{'change':>9}"
+    print("\n" + "=" * len(header))
+    print(header)
+    for key, result in results.items():
+        seconds = result["seconds"]
+        rate = result["items"] / seconds if seconds > 0 else float("inf")
+        line = f"{key:<52}{seconds:>11.4f}{rate:>13.0f} {result['unit'] + '/s':<6}"
+        previous = (baseline or {}).get(key)
+        if previous is not None:
+            change = seconds / previous["seconds"] - 1
+            mark = " !" if change > threshold else ""
+            line += f"{previous['seconds']:>13.4f}{change:>+8.0%}{mark}"
+            if change > threshold:
+                regressions.append(key)
+        elif baseline is not None:
+            line += f"{'-':>13}{'new':>9}"
+        print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="字幕流水线基准测试")
+    parser.add_argument(
+        "--suites", nargs="+", default=list(SUITES), choices=SUITES, help="运行的套件"
+    )
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        type=int,
+        default=[10, 1000, 10000, 100000],
+        help="字幕套件的字幕条数",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="每项重复次数，取中位数")
+    parser.add_argument("--segments", type=int, default=500, help="翻译套件的字幕条数")
+    parser.add_argument("--latency", type=float, default=0.005, help="模拟推理延迟（秒）")
+    parser.add_argument("-j", "--concurrency", type=int, default=4, help="翻译并发数")
+    parser.add_argument("-b", "--batch-size", type=int, default=1, help="翻译批量大小")
+    parser.add_argument(
+        "--token-latency", type=float, default=0.0, help="模拟每个输出token的生成耗时（秒）"
+    )
+    parser.add_argument(
+        "--ramble", type=int, default=0, help="模拟模型在译文后多输出的行数（解释、多个版本）"
+    )
+    parser.add_argument(
+        "--no-stream", action="store_true", help="翻译请求不使用流式回复（对比用）"
+    )
+    parser.add_argument("--duration", type=float, default=30, help="样例视频时长（秒）")
+    parser.add_argument("--size", default="1280x720", help="样例视频分辨率")
+    parser.add_argument(
+        "--merge-modes",
+        nargs="+",
+        default=["burn", "mux", "smart", "parallel"],
+        choices=["burn", "mux", "smart", "parallel"],
+        help="合成套件比较的合成方式",
+    )
+    parser.add_argument("--save-baseline", metavar="NAME", help="将结果保存为基线")
+    parser.add_argument("--compare", metavar="NAME", help="与已保存的基线对比")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="比基线慢多少视为退化（比例）"
+    )
+    parser.add_argument(
+        "--context-lines",
+        nargs="+",
+        type=int,
+        default=[0],
+        help="翻译套件比较的上下文窗口前文条数，可给出多个值逐一测试（默认: 0，即不带上下文）",
+    )
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.compare)["results"] if args.compare else None
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        if "subtitles" in args.suites:
+            results.update(bench_subtitles(tmp, args.sizes, args.repeat))
+        if "translation" in args.suites:
+            results.update(
+                bench_translation(
+                    args.segments,
+                    args.latency,
+                    args.concurrency,
+                    args.batch_size,
+                    args.repeat,
+                    args.context_lines,
+                    not args.no_stream,
+                    args.token_latency,
+                    args.ramble,
+                )
+            )
+        if "merge" in args.suites:
+            results.update(
+                bench_merge(tmp, args.duration, args.size, args.merge_modes, args.repeat)
+            )
+
+    regressions = print_report(results, baseline, args.threshold)
+    costs = {k: r for k, r in results.items() if "tokens_per_minute" in r}
+    if costs:
+        print(
+            f"\n{'translation cost per video minute':<52}{'requests':>11}{'tokens':>20}"
+            f"{'generated/run':>15}{'ttft(ms)':>10}"
+        )
+        for key, result in costs.items():
+            ttft = result.get("ttft_ms")
+            print(
+                f"{key:<52}{result['requests_per_minute']:>11.1f}"
+                f"{result['tokens_per_minute']:>20.0f}"
+                f"{result['generated_tokens']:>15}"
+                f"{ttft if ttft is not None else '-':>10}"
+            )
+    if args.save_baseline:
+        print(f"\n基线已保存: {save_baseline(args.save_baseline, results)}")
+    if regressions:
+        print(f"\n❌ {len(regressions)} 项比基线慢 {args.threshold:.0%} 以上")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
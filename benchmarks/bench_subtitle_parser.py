@@ -0,0 +1,104 @@
+"""
+Benchmark the streaming subtitle parser against the previous whole-file parser
+
+用法:
+    python benchmarks/bench_subtitle_parser.py --sizes 1000 100000 1000000
+"""
+
+import argparse
+import contextlib
+import io
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from synthetic import make_srt
+from video_subtitle_translator.subtitle_parser import iter_subtitles, parse_time
+
+
+def legacy_parse_srt(srt_path: str) -> List[Dict]:
+    """原实现：整个文件读入内存，按空行正则切分，每条字幕再用未预编译的正则匹配"""
+    with open(srt_path, "r", encoding="utf-8") as f:
+        content = f.read()
+    entries = re.split(r"\n\s*\n", content.strip())
+    segments = []
+    for entry in entries:
+        lines = entry.strip().split("\n")
+        if len(lines) < 3:
+            continue
+        match = re.match(
+            r"(\d+:\d+:\d+[,.]\d+)\s*-->\s*(\d+:\d+:\d+[,.]\d+)", lines[1]
+        )
+        if not match:
+            continue
+        start_str, end_str = match.groups()
+        text = " ".join(lines[2:]).strip()
+        segments.append(
+            {"start": parse_time(start_str), "end": parse_time(end_str), "text": text}
+        )
+    return segments
+
+
+def run(func, path: str, repeat: int) -> Dict:
+    """计时（取最快一次）并记录Python堆内存峰值，两者分开测，避免tracemalloc影响耗时"""
+    elapsed = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = func(path)
+        elapsed.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": min(elapsed), "count": count, "peak_mb": peak / 1024 / 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="字幕解析基准测试")
+    parser.add_argument(
+        "--sizes", nargs="+", type=int, default=[1000, 100000], help="字幕条数"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="每项重复次数，取最快一次")
+    args = parser.parse_args()
+
+    implementations = {
+        "legacy (list)": lambda path: len(legacy_parse_srt(path)),
+        "stream (list)": lambda path: len(list(iter_subtitles(path))),
+        # 逐条消费、不保留结果时内存占用与文件大小无关
+        "stream (iter)": lambda path: sum(1 for _ in iter_subtitles(path)),
+    }
+
+    print(
+        f"{'cues':>9}  {'MB':>7}  {'parser':<15}"
+        f"{'time(s)':>9}{'cues/s':>11}{'peak MB':>9}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = Path(tmp) / f"cues_{size}.srt"
+            with contextlib.redirect_stdout(io.StringIO()):
+                make_srt(path, size)
+            file_mb = path.stat().st_size / 1024 / 1024
+
+            legacy = legacy_parse_srt(str(path))
+            if list(iter_subtitles(str(path))) != legacy:
+                raise RuntimeError("streaming parser output differs from legacy parser")
+
+            for name, func in implementations.items():
+                result = run(func, str(path), args.repeat)
+                print(
+                    f"{size:>9}  {file_mb:>7.1f}  {name:<15}{result['seconds']:>9.3f}"
+                    f"{result['count'] / result['seconds']:>11.0f}"
+                    f"{result['peak_mb']:>9.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark the chunked subtitle writers against the previous per-cue writers
+
+用法:
+    python benchmarks/bench_subtitle_writer.py --cues 100000
+"""
+
+import argparse
+import contextlib
+import io
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from synthetic import make_cues
+from video_subtitle_translator.segments import SegmentTable
+from video_subtitle_translator.subtitle_generator import (
+    DEFAULT_ASS_STYLE,
+    _ass_header,
+    write_subtitles,
+)
+
+
+def legacy_format_time(seconds: float) -> str:
+    """原实现：浮点取模，会出现 1.999 -> ",998" 的误差"""
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    secs = int(seconds % 60)
+    millis = int((seconds % 1) * 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+
+def legacy_generate_srt(segments: List[Dict], output_path: str):
+    """原实现：每条字幕4次write，每条调用未预编译的re.sub"""
+    with open(output_path, "w", encoding="utf-8") as f:
+        for i, segment in enumerate(segments, 1):
+            text = re.sub(r"\s+", " ", segment.get("translation", "").strip())
+            f.write(f"{i}\n")
+            f.write(
+                f"{legacy_format_time(segment['start'])} --> "
+                f"{legacy_format_time(segment['end'])}\n"
+            )
+            f.write(f"{text}\n")
+            f.write("\n")
+
+
+def legacy_generate_ass(segments: List[Dict], output_path: str):
+    def format_ass_time(seconds: float) -> str:
+        hours = int(seconds // 3600)
+        minutes = int((seconds % 3600) // 60)
+        secs = int(seconds % 60)
+        centis = int((seconds % 1) * 100)
+        return f"{hours}:{minutes:02d}:{secs:02d}.{centis:02d}"
+
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(_ass_header(DEFAULT_ASS_STYLE))
+        for segment in segments:
+            text = re.sub(r"\s+", " ", segment.get("translation", "").strip())
+            text = text.replace("{", "\\{").replace("}", "\\}")
+            f.write(
+                f"Dialogue: 0,{format_ass_time(segment['start'])},"
+                f"{format_ass_time(segment['end'])},Default,,0,0,0,,{text}\n"
+            )
+
+
+def measure(func, repeat: int) -> Dict:
+    """取最快一次的耗时，另测一次Python堆内存峰值"""
+    elapsed = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": min(elapsed), "peak_mb": peak / 1024 / 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="字幕写出基准测试")
+    parser.add_argument("--cues", type=int, default=100000, help="字幕条数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数，取最快一次")
+    args = parser.parse_args()
+
+    cues = make_cues(args.cues)
+    table = SegmentTable.from_segments(cues)
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp)
+        cases = {
+            "legacy srt": lambda: legacy_generate_srt(cues, str(out / "a.srt")),
+            "legacy srt+ass": lambda: (
+                legacy_generate_srt(cues, str(out / "a.srt")),
+                legacy_generate_ass(cues, str(out / "a.ass")),
+            ),
+            "new srt": lambda: write_subtitles(cues, {"srt": str(out / "b.srt")}),
+            "new srt+ass": lambda: write_subtitles(
+                cues, {"srt": str(out / "b.srt"), "ass": str(out / "b.ass")}
+            ),
+            "new srt+ass+vtt": lambda: write_subtitles(
+                cues,
+                {
+                    "srt": str(out / "b.srt"),
+                    "ass": str(out / "b.ass"),
+                    "vtt": str(out / "b.vtt"),
+                },
+            ),
+            "new srt (table)": lambda: write_subtitles(
+                table, {"srt": str(out / "c.srt")}
+            ),
+        }
+
+        print(f"{args.cues} cues")
+        print(f"{'writer':<20}{'time(s)':>9}{'cues/s':>11}{'peak MB':>9}")
+        for name, func in cases.items():
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = measure(func, args.repeat)
+            print(
+                f"{name:<20}{result['seconds']:>9.3f}"
+                f"{args.cues / result['seconds']:>11.0f}{result['peak_mb']:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark Translator.translate_segments against a local mock Ollama server
+
+用法:
+    python benchmarks/bench_translation.py --segments 500 --latency 0.01 -j 4
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mock_ollama import MockOllamaServer
+from video_subtitle_translator.translator import Translator
+
+
+class _UnpooledSession:
+    """每次请求都新建连接（模拟使用模块级requests.post的旧实现）"""
+
+    def post(self, *args, **kwargs):
+        return requests.post(*args, **kwargs)
+
+    def close(self):
+        pass
+
+
+def run(server, segments_count, concurrency, batch_size, pooled):
+    segments = [
+        {"text": f"This is synthetic subtitle line number {i}."}
+        for i in range(segments_count)
+    ]
+    translator = Translator(
+        host=server.url, concurrency=concurrency, batch_size=batch_size
+    )
+    if not pooled:
+        translator.session = _UnpooledSession()
+
+    requests_before, connections_before = server.requests, server.connections
+    start = time.perf_counter()
+    translator.translate_segments(segments)
+    elapsed = time.perf_counter() - start
+    translator.close()
+
+    return {
+        "elapsed": elapsed,
+        "per_segment_ms": elapsed / segments_count * 1000,
+        "requests": server.requests - requests_before,
+        "connections": server.connections - connections_before,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="翻译吞吐基准测试（本地模拟Ollama）")
+    parser.add_argument("--segments", type=int, default=500, help="字幕条数")
+    parser.add_argument("--latency", type=float, default=0.005, help="模拟推理延迟（秒）")
+    parser.add_argument("-j", "--concurrency", type=int, default=1, help="翻译并发数")
+    parser.add_argument("-b", "--batch-size", type=int, default=1, help="批量大小")
+    args = parser.parse_args()
+
+    with MockOllamaServer(latency=args.latency) as server:
+        results = {}
+        for name, pooled in (("unpooled", False), ("pooled", True)):
+            results[name] = run(
+                server, args.segments, args.concurrency, args.batch_size, pooled
+            )
+
+    print("\n" + "=" * 60)
+    print(f"{'mode':<10}{'total(s)':>10}{'ms/segment':>12}{'requests':>10}{'conns':>8}")
+    for name, r in results.items():
+        print(
+            f"{name:<10}{r['elapsed']:>10.2f}{r['per_segment_ms']:>12.2f}"
+            f"{r['requests']:>10}{r['connections']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Local stand-in for the Ollama HTTP API used by the benchmarks
+"""
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+_NUMBERED_LINE_RE = re.compile(r"^\s*(\d+)\.\s*(.*)$")
+
+
+def fake_translate(prompt: str) -> str:
+    """模拟翻译：编号提示词逐行返回编号译文，否则返回单行译文"""
+    body = prompt.rsplit("\n\n", 1)[-1]
+    lines = [line for line in body.splitlines() if line.strip()]
+    numbered = [_NUMBERED_LINE_RE.match(line) for line in lines]
+    if lines and all(numbered):
+        return "\n".join(f"{m.group(1)}. 译文：{m.group(2)}" for m in numbered)
+    return "译文：" + " ".join(lines)
+
+
+class MockOllamaServer:
+    """
+    模拟Ollama服务（/api/generate 与 /api/chat）
+
+    每个请求固定延迟后开始输出；stream为True时按token逐块返回NDJSON，
+    客户端提前断开时停止生成（与Ollama相同）。
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.02,
+        token_latency: float = 0.0,
+        ramble: int = 0,
+    ):
+        """
+        Args:
+            host: 监听地址
+            port: 监听端口，0表示随机端口
+            latency: 每个请求的模拟推理延迟（秒），即首token之前的耗时
+            token_latency: 每个输出token的生成耗时（秒）
+            ramble: 译文之后多输出的行数（模拟模型附带解释、多个版本）
+        """
+        self.latency = latency
+        self.token_latency = token_latency
+        self.ramble = ramble
+        self.tokens = 0  # 实际生成（发出）的token数
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # 支持keep-alive
+            disable_nagle_algorithm = True  # 响应头与响应体分开写出，避免延迟ACK
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                with server._lock:
+                    server.requests += 1
+                time.sleep(server.latency)
+
+                chat = self.path == "/api/chat"
+                if chat:
+                    messages = payload.get("messages", [])
+                    prompt = "".join(m.get("content", "") for m in messages)
+                    text = fake_translate(messages[-1]["content"] if messages else "")
+                else:
+                    prompt = payload.get("prompt", "")
+                    text = fake_translate(prompt)
+                text += "".join(
+                    f"\n（另一种译法 {i}：{text}）" for i in range(1, server.ramble + 1)
+                )
+                # 粗略的token划分（约2个字符一个token），供翻译器的吞吐统计
+                tokens = [text[i : i + 2] for i in range(0, len(text), 2)]
+                limit = payload.get("options", {}).get("num_predict")
+                if limit:
+                    tokens = tokens[:limit]
+
+                def chunk(piece: str, **fields) -> Dict:
+                    reply = (
+                        {"message": {"role": "assistant", "content": piece}}
+                        if chat
+                        else {"response": piece}
+                    )
+                    return {"model": payload.get("model"), **reply, **fields}
+
+                stats = {
+                    "prompt_eval_count": len(prompt) // 2,
+                    "eval_count": len(tokens),
+                    "eval_duration": int(
+                        (server.latency + server.token_latency * len(tokens)) * 1e9
+                    ),
+                }
+                if payload.get("stream", True):
+                    self._stream(tokens, chunk, stats)
+                    return
+
+                time.sleep(server.token_latency * len(tokens))
+                with server._lock:
+                    server.tokens += len(tokens)
+                data = json.dumps(chunk("".join(tokens), done=True, **stats))
+                data = data.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _stream(self, tokens: List[str], chunk, stats: Dict):
+                """按token逐块写出（chunked编码），客户端断开时停止"""
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                lines = [chunk(token, done=False) for token in tokens]
+                lines.append(chunk("", done=True, **stats))
+                try:
+                    for line in lines:
+                        if line["done"] is False:
+                            time.sleep(server.token_latency)
+                        data = (json.dumps(line) + "\n").encode("utf-8")
+                        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                        self.wfile.flush()
+                        if line["done"] is False:
+                            with server._lock:
+                                server.tokens += 1
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close_connection = True
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self.url = f"http://{host}:{self._httpd.server_address[1]}"
+        self._thread = None
+
+    def start(self) -> "MockOllamaServer":
+        """在后台线程启动服务"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """停止服务"""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,96 @@
+"""
+Synthetic media and subtitle generation for the benchmarks
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+# 添加项目根目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from video_subtitle_translator.subtitle_generator import generate_srt
+
+# 合成语音用的台词（循环使用）
+SPEECH_TEXT = (
+    "Welcome to the benchmark. This sentence is generated for testing "
+    "the subtitle pipeline. Every line should be recognized and translated."
+)
+
+
+def make_sample_clip(
+    path: Path, duration: float, size: str = "1280x720", audio: str = "tone"
+):
+    """
+    用ffmpeg测试源生成带音频的H.264样例视频
+
+    Args:
+        path: 输出路径
+        duration: 时长（秒）
+        size: 分辨率
+        audio: tone 为正弦音；speech 为flite合成语音（ffmpeg未编译libflite时退回tone）
+    """
+    if audio == "speech":
+        # flite一次只合成一段文字，循环到目标时长
+        source = f"flite=text='{SPEECH_TEXT}',aloop=loop=-1:size=2e9"
+    else:
+        source = "sine=frequency=440:sample_rate=16000"
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-f",
+        "lavfi",
+        "-i",
+        f"testsrc2=size={size}:rate=30:duration={duration}",
+        "-f",
+        "lavfi",
+        "-i",
+        source,
+        "-c:v",
+        "libx264",
+        "-preset",
+        "ultrafast",
+        "-g",
+        "60",  # 2秒一个关键帧，智能渲染/并行烧录才有切分点
+        "-c:a",
+        "aac",
+        "-shortest",
+        str(path),
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        if audio == "speech":
+            print("⚠ ffmpeg不支持flite语音合成，改用正弦音")
+            return make_sample_clip(path, duration, size, "tone")
+        raise RuntimeError(f"FFmpeg error: {result.stderr}")
+
+
+def make_cues(count: int, spacing: float = 2.0, length: float = 1.8) -> List[Dict]:
+    """
+    生成合成字幕片段（已带译文）
+
+    Args:
+        count: 条数
+        spacing: 相邻字幕的起点间隔（秒）
+        length: 每条字幕的显示时长（秒）
+
+    Returns:
+        字幕片段列表（start/end/text/translation）
+    """
+    return [
+        {
+            "start": i * spacing,
+            "end": i * spacing + length,
+            "text": f"This is synthetic subtitle line number {i}.",
+            "translation": f"这是第{i}条合成字幕。",
+        }
+        for i in range(count)
+    ]
+
+
+def make_srt(path: Path, count: int, spacing: float = 2.0) -> List[Dict]:
+    """生成含 count 条字幕的SRT文件，返回对应的字幕片段"""
+    cues = make_cues(count, spacing)
+    generate_srt(cues, str(path))
+    return cues
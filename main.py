@@ -3,19 +3,29 @@ Main entry point for Video Subtitle Translator
 """
 
 import argparse
-import os
 import sys
 from pathlib import Path
 
 # 添加项目根目录到路径
 sys.path.insert(0, str(Path(__file__).parent))
 
-from video_subtitle_translator.audio_extractor import extract_audio
-from video_subtitle_translator.transcriber import Transcriber
-from video_subtitle_translator.translator import Translator
-from video_subtitle_translator.subtitle_generator import generate_srt, generate_ass
-from video_subtitle_translator.video_merger import merge_subtitle_to_video
-from video_subtitle_translator.config import TEMP_DIR, WHISPER_MODEL_SIZE
+from video_subtitle_translator.cli import (
+    non_negative_int,
+    positive_int,
+    process_video,
+)
+from video_subtitle_translator.encoding import resolve_profile
+from video_subtitle_translator.config import (
+    DEFAULT_ENCODING_PROFILE,
+    DEFAULT_MERGE_MODE,
+    MERGE_MODES,
+    SUBTITLE_FORMATS,
+    ENCODING_PROFILES,
+    WHISPER_MODEL_SIZE,
+    TRANSLATION_CONCURRENCY,
+    TRANSLATION_BATCH_SIZE,
+    TRANSLATION_CONTEXT_LINES,
+)
 
 
 def main():
@@ -33,7 +43,7 @@ def main():
         "--subtitle",
         "-s",
         default=None,
-        help="英文字幕文件路径（SRT格式），提供则跳过语音识别",
+        help="英文字幕文件路径（SRT/VTT/ASS，编码自动识别），提供则跳过语音识别",
     )
     parser.add_argument(
         "--model",
@@ -45,128 +55,137 @@ def main():
     parser.add_argument(
         "--keep-srt", "-k", action="store_true", help="保留生成的字幕文件"
     )
+    parser.add_argument(
+        "--sidecar-formats",
+        nargs="+",
+        default=None,
+        choices=list(SUBTITLE_FORMATS),
+        metavar="FORMAT",
+        help="只保留这些格式的字幕文件（srt/ass/vtt，指定即保留；默认 -k 时为 ass srt）",
+    )
     parser.add_argument(
         "--language", "-l", default="en", help="视频语言代码（默认: en）"
     )
+    parser.add_argument(
+        "--concurrency",
+        "-j",
+        type=positive_int,
+        default=TRANSLATION_CONCURRENCY,
+        help=f"翻译并发数，建议与Ollama的OLLAMA_NUM_PARALLEL一致（默认: {TRANSLATION_CONCURRENCY}）",
+    )
+    parser.add_argument(
+        "--batch-size",
+        "-b",
+        type=int,
+        default=TRANSLATION_BATCH_SIZE,
+        help=f"每次请求打包翻译的字幕条数，1为逐句翻译（默认: {TRANSLATION_BATCH_SIZE}）",
+    )
+    parser.add_argument(
+        "--context-lines",
+        type=int,
+        default=TRANSLATION_CONTEXT_LINES,
+        help="上下文窗口翻译：每组字幕（-b条）经 /api/chat 翻译时附带的前文译文条数，"
+        f"0为关闭（默认: {TRANSLATION_CONTEXT_LINES}）",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="不使用转录缓存和翻译记忆库，重新识别并请求Ollama翻译所有句子",
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="丢弃上次中断留下的检查点，从头开始处理",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="流式模式：语音识别与翻译同时进行（总耗时接近两者中较慢的一个）",
+    )
+    parser.add_argument(
+        "--asr-workers",
+        type=non_negative_int,
+        default=None,
+        help="CPU多进程分块语音识别的进程数，大于1时启用，0为按CPU核数自动（默认: 关闭）",
+    )
+    parser.add_argument(
+        "--in-memory-audio",
+        action="store_true",
+        help="音频直接解码到内存交给Whisper，不写临时WAV文件",
+    )
+    parser.add_argument(
+        "--merge-mode",
+        default=DEFAULT_MERGE_MODE,
+        choices=list(MERGE_MODES),
+        help=f"字幕合成方式：burn 烧录进画面；mux 作为字幕轨封装，不重新编码；"
+        f"smart 只重新编码有字幕的区间；parallel 分块并行烧录（默认: {DEFAULT_MERGE_MODE}）",
+    )
+    parser.add_argument(
+        "--encode-profile",
+        default=DEFAULT_ENCODING_PROFILE,
+        choices=list(ENCODING_PROFILES),
+        help=f"烧录字幕时的视频编码配置（默认: {DEFAULT_ENCODING_PROFILE}）",
+    )
+    parser.add_argument(
+        "--encode-threads",
+        type=int,
+        default=None,
+        help="视频编码线程数，0为由ffmpeg自动决定（默认: 按编码配置）",
+    )
+    parser.add_argument(
+        "--encode-tune",
+        default=None,
+        help="编码器tune选项，如 film、animation（默认: 按编码配置）",
+    )
+    parser.add_argument(
+        "--match-bitrate",
+        action="store_true",
+        help="按源视频码率编码（代替固定质量），输出大小与源视频接近",
+    )
+    parser.add_argument(
+        "--metrics",
+        default=None,
+        metavar="PATH",
+        help="各阶段耗时/吞吐指标的JSON行文件，空字符串为不记录（默认: temp/metrics.jsonl）",
+    )
+    parser.add_argument(
+        "--prometheus",
+        default=None,
+        metavar="PATH",
+        help="同时写出Prometheus文本文件（供node_exporter textfile collector读取）",
+    )
 
     args = parser.parse_args()
 
-    # 验证输入视频存在
-    video_path = Path(args.video)
-    if not video_path.exists():
-        print(f"错误：视频文件不存在: {video_path}")
-        sys.exit(1)
-
-    # 创建临时目录
-    temp_dir = Path(TEMP_DIR)
-    temp_dir.mkdir(exist_ok=True)
-
-    # 视频基础名（用于临时文件）
-    video_name = video_path.stem
-
-    try:
-        # 检查是否提供了字幕文件
-        if args.subtitle:
-            # 步骤1-2: 直接读取提供的字幕文件
-            print("=" * 60)
-            print("步骤 1/3: 读取英文字幕文件...")
-            print("=" * 60)
-
-            from video_subtitle_translator.subtitle_parser import parse_srt
-
-            segments = parse_srt(args.subtitle)
-
-            if not segments:
-                print(f"警告：无法解析字幕文件: {args.subtitle}")
-                sys.exit(1)
-
-            print(f"成功读取 {len(segments)} 个字幕片段")
-            audio_path = temp_dir / f"{video_name}_audio.wav"  # 占位
-        else:
-            # 步骤1: 提取音频
-            print("=" * 60)
-            print("步骤 1/5: 提取音频...")
-            print("=" * 60)
-            audio_path = temp_dir / f"{video_name}_audio.wav"
-            extract_audio(str(video_path), str(audio_path))
-
-            # 步骤2: 语音转文字
-            print("\n" + "=" * 60)
-            print("步骤 2/5: 语音识别（Whisper）...")
-            print("=" * 60)
-            transcriber = Transcriber(model_size=args.model)
-            segments = transcriber.transcribe(str(audio_path), language=args.language)
-
-            if not segments:
-                print("警告：未识别到任何语音内容")
-                sys.exit(1)
-
-        # 步骤3: 翻译
-        if args.subtitle:
-            print("\n" + "=" * 60)
-            print("步骤 2/3: 翻译中文字幕（Ollama）...")
-            print("=" * 60)
-        else:
-            print("\n" + "=" * 60)
-            print("步骤 3/5: 翻译中文字幕（Ollama）...")
-            print("=" * 60)
-        translator = Translator()
-        segments = translator.translate_segments(segments)
-
-        # 步骤4: 生成字幕文件
-        if args.subtitle:
-            print("\n" + "=" * 60)
-            print("步骤 3/3: 生成字幕文件...")
-            print("=" * 60)
-        else:
-            print("\n" + "=" * 60)
-            print("步骤 4/5: 生成字幕文件...")
-            print("=" * 60)
-
-        # 生成ASS格式字幕（样式更丰富）
-        ass_path = temp_dir / f"{video_name}_bilingual.ass"
-        generate_ass(segments, str(ass_path))
-
-        # 也生成SRT格式备用
-        srt_path = temp_dir / f"{video_name}_bilingual.srt"
-        generate_srt(segments, str(srt_path))
-
-        # 步骤5: 合成视频
-        if args.subtitle:
-            print("\n" + "=" * 60)
-            print("烧录字幕到视频...")
-            print("=" * 60)
-        else:
-            print("\n" + "=" * 60)
-            print("步骤 5/5: 烧录字幕到视频...")
-            print("=" * 60)
-        # 使用备用方法，切换到字幕目录执行ffmpeg
-        from video_subtitle_translator.video_merger_alt import merge_with_drawtext
-
-        output_video = merge_with_drawtext(str(video_path), str(srt_path), args.output)
-
-        # 清理临时文件（如果不保留）
-        if not args.keep_srt:
-            print("\n清理临时文件...")
-            if not args.subtitle and audio_path.exists():
-                audio_path.unlink()
-            if ass_path.exists():
-                ass_path.unlink()
-            if srt_path.exists():
-                srt_path.unlink()
-        else:
-            print(f"\n保留的字幕文件:")
-            print(f"  - ASS: {ass_path}")
-            print(f"  - SRT: {srt_path}")
-
-        print("\n" + "=" * 60)
-        print("✓ 处理完成！")
-        print("=" * 60)
-        print(f"输出视频: {output_video}")
+    # 处理流程与CLI共用，检查点/断点续跑对两个入口同样生效
+    success = process_video(
+        video_path=args.video,
+        output_path=args.output,
+        subtitle_path=args.subtitle,
+        model_size=args.model,
+        keep_srt=args.keep_srt,
+        language=args.language,
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        context_lines=args.context_lines,
+        use_cache=not args.no_cache,
+        resume=not args.no_resume,
+        stream=args.stream,
+        asr_workers=args.asr_workers,
+        in_memory_audio=args.in_memory_audio,
+        encoding=resolve_profile(
+            args.encode_profile,
+            threads=args.encode_threads,
+            tune=args.encode_tune,
+            match_bitrate=args.match_bitrate,
+        ),
+        merge_mode=args.merge_mode,
+        metrics_path=args.metrics,
+        prometheus_path=args.prometheus,
+        sidecar_formats=args.sidecar_formats,
+    )
 
-    except Exception as e:
-        print(f"\n错误: {e}")
-        sys.exit(1)
+    sys.exit(0 if success else 1)
 
 
 if __name__ == "__main__":
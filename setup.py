@@ -28,11 +28,14 @@ setup(
     python_requires=">=3.8",
     install_requires=[
         "faster-whisper>=1.0.0",
+        "numpy",
         "requests>=2.31.0",
     ],
     entry_points={
         "console_scripts": [
             "videocut=video_subtitle_translator.cli:main",
+            "videocut-daemon=video_subtitle_translator.daemon:main",
+            "videocut-submit=video_subtitle_translator.client:main",
         ],
     },
     include_package_data=True,
@@ -0,0 +1,60 @@
+import pytest
+
+from video_subtitle_translator.segments import SegmentTable
+from video_subtitle_translator.translator import Translator
+
+CUES = [
+    {"start": 0.5, "end": 2.0, "text": "one"},
+    {"start": 2.5, "end": 4.0, "text": "two", "translation": "二"},
+    {"start": 5.0, "end": 7.5, "text": "three"},
+]
+
+
+def test_from_segments_round_trip():
+    table = SegmentTable.from_segments(iter(CUES))
+    assert len(table) == 3
+    assert table.to_segments() == CUES
+    assert table[1] == CUES[1]
+    assert SegmentTable.from_segments(table) is table
+
+
+def test_from_segments_empty():
+    table = SegmentTable.from_segments([])
+    assert len(table) == 0
+    assert table.to_segments() == []
+
+
+def test_clip_drops_outside_rows_and_truncates_crossing_ones():
+    table = SegmentTable.from_segments(CUES)
+    clipped = table.clip(1.0, 6.0)
+    assert [(s["start"], s["end"], s["text"]) for s in clipped] == [
+        (1.0, 2.0, "one"),
+        (2.5, 4.0, "two"),
+        (5.0, 6.0, "three"),
+    ]
+    assert clipped[1]["translation"] == "二"
+    # 原表不受影响
+    assert table.to_segments() == CUES
+
+
+def test_clip_excludes_rows_touching_the_edge():
+    clipped = SegmentTable.from_segments(CUES).clip(2.0, 2.5)
+    assert len(clipped) == 0
+
+
+def test_shift():
+    shifted = SegmentTable.from_segments(CUES).clip(2.5, 7.5).shift(-2.5)
+    assert [(s["start"], s["end"]) for s in shifted] == [(0.0, 1.5), (2.5, 5.0)]
+    assert [s["text"] for s in shifted] == ["two", "three"]
+
+
+@pytest.mark.parametrize("method", ["translate_segments", "translate_stream"])
+def test_translating_a_table_writes_back_translations(method):
+    translator = Translator(dedup=False)
+    translator._translate_group = lambda group, context=None: [
+        f"译{segment['text']}" for segment in group
+    ]
+    table = SegmentTable.from_segments(CUES).with_translation([None] * len(CUES))
+    getattr(translator, method)(table)
+    translator.close()
+    assert table.translation == ["译one", "译two", "译three"]
@@ -0,0 +1,36 @@
+import pytest
+
+from video_subtitle_translator.subtitle_parser import parse_srt, parse_time
+
+
+@pytest.mark.parametrize(
+    "time_str, expected",
+    [
+        ("00:00:01,000", 1.0),
+        ("00:01:02.250", 62.25),
+        ("00:00:01,5", 1.5),
+        ("0:00:01", 1.0),
+        ("00:00:07,1234", 7.123),
+        ("00:00:01,9996", 2.0),
+    ],
+)
+def test_parse_time(time_str, expected):
+    assert parse_time(time_str) == pytest.approx(expected)
+
+
+def test_parse_time_rejects_garbage():
+    with pytest.raises(ValueError):
+        parse_time("not a time")
+
+
+def test_parse_srt_keeps_cues_with_long_fractions(tmp_path):
+    srt = tmp_path / "long_fraction.srt"
+    srt.write_text(
+        "1\n00:00:01,000 --> 00:00:02,000\nFirst\n\n"
+        "2\n00:00:07,1234 --> 00:00:08,56789\nSecond\n",
+        encoding="utf-8",
+    )
+    segments = parse_srt(str(srt))
+    assert [s["text"] for s in segments] == ["First", "Second"]
+    assert segments[1]["start"] == pytest.approx(7.123)
+    assert segments[1]["end"] == pytest.approx(8.568)
@@ -4,7 +4,69 @@ Audio extraction from video using ffmpeg
 
 import os
 import subprocess
+import tempfile
 from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+
+from .media_info import parse_framecrc_keyframes, probe_media, record_keyframes
+
+SAMPLE_RATE = 16000
+
+# 从ffmpeg管道读取PCM数据的块大小（字节）
+_PIPE_BLOCK_BYTES = 1 << 20
+
+
+def _read_pcm_pipe(cmd: List[str], expected_seconds: Optional[float]) -> np.ndarray:
+    """
+    运行ffmpeg并逐块读取其标准输出的16位PCM，边读边转换写入预分配的float32数组
+
+    不在内存中保留完整的int16数据，峰值内存约为最终float32数组的大小。
+
+    Args:
+        cmd: 输出s16le到 pipe:1 的ffmpeg命令
+        expected_seconds: 预计音频时长，用于预分配（不准确时自动扩容）
+
+    Returns:
+        16kHz单声道float32音频数组，取值范围[-1, 1]
+    """
+    capacity = int((expected_seconds or 60) * SAMPLE_RATE) + SAMPLE_RATE
+    audio = np.empty(capacity, dtype=np.float32)
+    count = 0
+    block = bytearray(_PIPE_BLOCK_BYTES)
+    view = memoryview(block)
+    carry = 0  # 上一块末尾不足一个采样的字节数
+    # stderr写入临时文件，避免管道写满后ffmpeg阻塞
+    with tempfile.TemporaryFile() as stderr:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr)
+        with proc.stdout:
+            while True:
+                read = proc.stdout.readinto(view[carry:])
+                if not read:
+                    break
+                size = carry + read
+                samples = np.frombuffer(block, dtype="<i2", count=size // 2)
+                if count + len(samples) > len(audio):
+                    capacity = max(len(audio) * 2, count + len(samples))
+                    grown = np.empty(capacity, dtype=np.float32)
+                    grown[:count] = audio[:count]
+                    audio = grown
+                end = count + len(samples)
+                np.multiply(samples, np.float32(1 / 32768), out=audio[count:end])
+                count = end
+                del samples
+                carry = size % 2
+                if carry:
+                    block[0] = block[size - 1]
+        if proc.wait() != 0:
+            stderr.seek(0)
+            raise RuntimeError(
+                f"FFmpeg error: {stderr.read().decode('utf-8', 'replace')}"
+            )
+    # 就地截去预分配多出的部分（没有其他引用指向该数组）
+    audio.resize(count, refcheck=False)
+    return audio
 
 
 def extract_audio(video_path: str, output_audio_path: str = None) -> str:
@@ -47,3 +109,105 @@ def extract_audio(video_path: str, output_audio_path: str = None) -> str:
 
     print(f"Audio extracted to: {output_audio_path}")
     return str(output_audio_path)
+
+
+def extract_audio_array(video_path: str) -> np.ndarray:
+    """
+    从视频中解码音频到内存（不落盘），供Whisper直接使用
+
+    Args:
+        video_path: 视频文件路径
+
+    Returns:
+        16kHz单声道float32音频数组，取值范围[-1, 1]
+    """
+    # ffmpeg命令：解码为16位PCM裸数据并通过管道输出
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-i",
+        video_path,
+        "-vn",  # 不处理视频
+        "-f",
+        "s16le",  # 无文件头的16位PCM
+        "-acodec",
+        "pcm_s16le",
+        "-ar",
+        str(SAMPLE_RATE),  # 16kHz采样率
+        "-ac",
+        "1",  # 单声道
+        "pipe:1",
+    ]
+
+    print(f"Decoding audio in memory from: {video_path}")
+    audio = _read_pcm_pipe(cmd, probe_media(video_path)["duration"])
+    print(f"Audio decoded: {len(audio) / SAMPLE_RATE:.1f}s")
+    return audio
+
+
+def extract_audio_with_keyframes(
+    video_path: str, output_audio_path: Optional[str] = None
+) -> Tuple[Union[str, np.ndarray], List[float]]:
+    """
+    一次解复用同时提取音频和视频关键帧索引（供智能渲染/并行烧录复用，不再单独扫描视频）
+
+    视频流只做数据包复制写入framecrc（不解码），开销几乎只有读取文件本身。
+    关键帧索引会记录到 media_info 的缓存中。
+
+    Args:
+        video_path: 视频文件路径
+        output_audio_path: 输出WAV路径；为None时音频解码到内存
+
+    Returns:
+        (音频文件路径或16kHz单声道float32数组, 关键帧时间列表)
+    """
+    in_memory = output_audio_path is None
+    with tempfile.TemporaryDirectory() as tmp:
+        keyframes_path = os.path.join(tmp, "keyframes.crc")
+        cmd = [
+            "ffmpeg",
+            "-nostdin",
+            "-y",
+            "-i",
+            video_path,
+            # 输出1：16kHz单声道PCM音频
+            "-map",
+            "0:a:0",
+            "-acodec",
+            "pcm_s16le",
+            "-ar",
+            str(SAMPLE_RATE),
+            "-ac",
+            "1",
+            *(["-f", "s16le", "pipe:1"] if in_memory else [str(output_audio_path)]),
+            # 输出2：视频数据包（不解码）的时间戳和标志
+            "-map",
+            "0:v:0",
+            "-c:v",
+            "copy",
+            "-f",
+            "framecrc",
+            keyframes_path,
+        ]
+
+        print(f"Extracting audio and keyframe index from: {video_path}")
+        if in_memory:
+            audio = _read_pcm_pipe(cmd, probe_media(video_path)["duration"])
+        else:
+            result = subprocess.run(cmd, capture_output=True)
+            if result.returncode != 0:
+                raise RuntimeError(
+                    f"FFmpeg error: {result.stderr.decode('utf-8', 'replace')}"
+                )
+
+        with open(keyframes_path, "r", encoding="utf-8") as f:
+            keyframes = parse_framecrc_keyframes(f)
+
+    record_keyframes(video_path, keyframes)
+    print(f"Keyframes indexed: {len(keyframes)}")
+    if not in_memory:
+        print(f"Audio extracted to: {output_audio_path}")
+        return str(output_audio_path), keyframes
+
+    print(f"Audio decoded: {len(audio) / SAMPLE_RATE:.1f}s")
+    return audio, keyframes
@@ -0,0 +1,233 @@
+"""
+Batch processing of many videos with shared models and stage pools
+"""
+
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .config import (
+    BATCH_MAX_ENCODES,
+    BATCH_TRANSLATION_JOBS,
+    TRANSLATION_CONCURRENCY,
+)
+from .pipeline import VideoJob
+from .transcriber import Transcriber
+from .transcription_cache import TranscriptionCache
+from .translation_memory import TranslationMemory
+from .translator import Translator
+
+VIDEO_EXTENSIONS = {".mp4", ".mkv", ".mov", ".avi", ".webm", ".flv", ".m4v", ".ts"}
+
+
+def collect_videos(source: str) -> List[Path]:
+    """
+    收集批量任务的视频列表
+
+    Args:
+        source: 视频目录（不递归），或清单文件（每行一个视频路径，#开头为注释，
+            相对路径相对于清单文件所在目录）
+
+    Returns:
+        视频路径列表
+    """
+    source = Path(source)
+    if source.is_dir():
+        return sorted(
+            path
+            for path in source.iterdir()
+            if path.suffix.lower() in VIDEO_EXTENSIONS
+            and not path.stem.endswith("_translated")  # 跳过之前的输出
+        )
+
+    videos = []
+    with open(source, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            path = Path(line)
+            videos.append(path if path.is_absolute() else source.parent / path)
+    return videos
+
+
+def run_batch(
+    videos: List[Path],
+    output_dir: Optional[str] = None,
+    model_size: str = None,
+    language: str = "en",
+    keep_srt: bool = False,
+    concurrency: int = None,
+    batch_size: int = None,
+    context_lines: int = None,
+    use_cache: bool = True,
+    resume: bool = True,
+    asr_workers: int = None,
+    in_memory_audio: bool = False,
+    translation_jobs: int = None,
+    max_encodes: int = None,
+    encoding: Optional[Dict] = None,
+    merge_mode: str = None,
+    metrics_path: str = None,
+    prometheus_path: str = None,
+    sidecar_formats: Optional[List[str]] = None,
+) -> List[Dict]:
+    """
+    批量处理视频
+
+    语音识别在主线程中逐个进行，整批共用一个Transcriber（模型只加载一次）；
+    识别完成的任务交给翻译线程池，与下一个视频的识别重叠进行；
+    字幕生成后交给单独限流的编码线程池执行ffmpeg烧录。
+
+    Args:
+        videos: 视频路径列表
+        output_dir: 输出目录，默认输出到各视频所在目录
+        model_size: Whisper模型大小
+        language: 视频语言
+        keep_srt: 是否保留字幕文件
+        concurrency: 每个任务的翻译并发数
+        batch_size: 每次请求打包翻译的字幕条数
+        context_lines: 上下文窗口翻译附带的前文条数，0为关闭
+        use_cache: 是否使用转录缓存和翻译记忆库
+        resume: 是否从已有检查点继续
+        asr_workers: CPU多进程分块转录的进程数
+        in_memory_audio: 音频解码到内存，不写临时WAV文件
+        translation_jobs: 同时翻译的任务数
+        max_encodes: 同时进行的ffmpeg编码数
+        encoding: 烧录时的视频编码配置（见 encoding.resolve_profile）
+        merge_mode: 字幕合成方式（见 config.MERGE_MODES）
+        metrics_path: 运行指标JSON行文件，默认 config.METRICS_PATH
+        prometheus_path: Prometheus文本文件，默认 config.PROMETHEUS_PATH
+        sidecar_formats: 保留的字幕格式，默认 keep_srt 时为 config.SIDECAR_FORMATS
+
+    Returns:
+        每个任务的状态字典列表（video/status/output/error/elapsed）
+    """
+    translation_jobs = max(1, translation_jobs or BATCH_TRANSLATION_JOBS)
+    max_encodes = max(1, max_encodes or BATCH_MAX_ENCODES)
+    if output_dir:
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+
+    transcriber = Transcriber(
+        model_size=model_size,
+        cache=TranscriptionCache() if use_cache else None,
+        workers=asr_workers,
+    )
+    memory = TranslationMemory() if use_cache else None
+    # 各翻译任务各自按 concurrency 并发，共用的连接池要容纳所有任务的在途请求，
+    # 否则超出的请求每次都新建连接、用完即丢弃
+    concurrency = max(1, concurrency or TRANSLATION_CONCURRENCY)
+    translator = Translator(
+        concurrency=concurrency,
+        batch_size=batch_size,
+        memory=memory,
+        pool_size=concurrency * translation_jobs,
+        context_lines=context_lines,
+    )
+
+    statuses = [
+        {"video": str(video), "status": "pending", "output": None, "error": None}
+        for video in videos
+    ]
+    print(
+        f"Batch: {len(videos)} videos "
+        f"(translation jobs: {translation_jobs}, concurrent encodes: {max_encodes})"
+    )
+
+    def fail(status: Dict, error: Exception, job: Optional[VideoJob] = None):
+        traceback.print_exc()
+        if job is not None:
+            job.metrics.finish("failed", error=str(error))
+        status["status"] = "failed"
+        status["error"] = str(error)
+        status["elapsed"] = time.perf_counter() - status["started"]
+
+    def encode_stage(job: VideoJob, status: Dict):
+        try:
+            status["status"] = "encoding"
+            status["output"] = job.merge()
+            job.finish()
+            status["status"] = "done"
+            status["elapsed"] = time.perf_counter() - status["started"]
+            print(f"✓ [{status['video']}] -> {status['output']}")
+        except Exception as e:
+            fail(status, e, job)
+
+    def translate_stage(job: VideoJob, status: Dict):
+        try:
+            status["status"] = "translating"
+            job.translate(translator)
+            job.generate_subtitles()
+            status["status"] = "queued for encode"
+            return encode_pool.submit(encode_stage, job, status)
+        except Exception as e:
+            fail(status, e, job)
+            return None
+
+    translate_pool = ThreadPoolExecutor(max_workers=translation_jobs)
+    encode_pool = ThreadPoolExecutor(max_workers=max_encodes)
+    translate_futures = []
+    try:
+        for index, (video, status) in enumerate(zip(videos, statuses), 1):
+            status["started"] = time.perf_counter()
+            print(f"\n>>> [{index}/{len(videos)}] {video}")
+            job = None
+            try:
+                if not video.exists():
+                    raise FileNotFoundError(f"视频文件不存在: {video}")
+                output_path = None
+                if output_dir:
+                    output_path = str(
+                        Path(output_dir) / f"{video.stem}_translated{video.suffix}"
+                    )
+                job = VideoJob(
+                    str(video),
+                    output_path=output_path,
+                    model_size=transcriber.model_size,
+                    language=language,
+                    keep_srt=keep_srt,
+                    resume=resume,
+                    in_memory_audio=in_memory_audio,
+                    encoding=encoding,
+                    merge_mode=merge_mode,
+                    metrics_path=metrics_path,
+                    prometheus_path=prometheus_path,
+                    sidecar_formats=sidecar_formats,
+                )
+                status["status"] = "transcribing"
+                if not job.load_segments(transcriber):
+                    raise RuntimeError(job.error)
+            except Exception as e:
+                fail(status, e, job)
+                continue
+            translate_futures.append(translate_pool.submit(translate_stage, job, status))
+
+        for future in translate_futures:
+            encode_future = future.result()
+            if encode_future is not None:
+                encode_future.result()
+    finally:
+        translate_pool.shutdown(wait=True)
+        encode_pool.shutdown(wait=True)
+        translator.close()
+        if memory is not None:
+            memory.close()
+
+    print_summary(statuses)
+    return statuses
+
+
+def print_summary(statuses: List[Dict]):
+    """打印批量任务汇总"""
+    done = sum(1 for s in statuses if s["status"] == "done")
+    print("\n" + "=" * 60)
+    print(f"批量处理完成：成功 {done}/{len(statuses)}")
+    print("=" * 60)
+    for status in statuses:
+        elapsed = status.get("elapsed")
+        elapsed_text = f"{elapsed:7.1f}s" if elapsed is not None else "      -"
+        mark = "✓" if status["status"] == "done" else "❌"
+        detail = status["output"] if status["status"] == "done" else status["error"]
+        print(f"{mark} {elapsed_text}  {status['video']}  {detail or status['status']}")
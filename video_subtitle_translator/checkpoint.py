@@ -0,0 +1,209 @@
+"""
+Per-job stage checkpoints so an interrupted run can resume
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from .config import CHECKPOINT_DIR
+
+# 指纹采样块大小：只读取文件头/中/尾各一块，避免为数GB的视频计算完整哈希
+_SAMPLE_SIZE = 1024 * 1024
+
+
+def file_fingerprint(path: str) -> str:
+    """
+    计算文件的快速指纹（文件大小 + 头/中/尾采样块的SHA-256）
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        十六进制指纹字符串
+    """
+    size = os.path.getsize(path)
+    digest = hashlib.sha256(str(size).encode("ascii"))
+    offsets = (0, max(size // 2 - _SAMPLE_SIZE // 2, 0), max(size - _SAMPLE_SIZE, 0))
+    with open(path, "rb") as f:
+        for offset in offsets:
+            f.seek(offset)
+            digest.update(f.read(_SAMPLE_SIZE))
+    return digest.hexdigest()
+
+
+def _atomic_write_text(path: Path, content: str):
+    """先写临时文件再替换，保证检查点文件要么完整要么不存在"""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+class JobCheckpoint:
+    """单个处理任务的阶段检查点（音频、转录、翻译、字幕）"""
+
+    def __init__(self, video_path: str, params: Dict, root: str = None):
+        """
+        定位（或创建）任务的检查点目录
+
+        Args:
+            video_path: 输入视频路径
+            params: 影响中间结果的处理参数（模型、语言等）
+            root: 检查点根目录，默认 CHECKPOINT_DIR
+        """
+        video_path = Path(video_path)
+        raw = file_fingerprint(str(video_path)) + json.dumps(params, sort_keys=True)
+        key = hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+        self.dir = Path(root or CHECKPOINT_DIR) / f"{video_path.stem}_{key}"
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.audio_path = self.dir / "audio.wav"
+        self.transcript_path = self.dir / "transcript.json"
+        self.translations_path = self.dir / "translations.jsonl"
+        self.translation_settings_path = self.dir / "translation_settings.json"
+        self._lock = threading.Lock()
+
+    # ---- 音频 ----
+
+    @property
+    def audio_tmp_path(self) -> Path:
+        """音频提取的临时输出路径，完成后由 commit_audio 转正"""
+        return self.dir / "audio.partial.wav"
+
+    def has_audio(self) -> bool:
+        """音频是否已提取完成"""
+        return self.audio_path.exists()
+
+    def commit_audio(self):
+        """标记音频提取完成"""
+        os.replace(self.audio_tmp_path, self.audio_path)
+
+    # ---- 转录 ----
+
+    def load_transcript(self) -> Optional[List[Dict]]:
+        """读取已完成的转录结果，不存在时返回None"""
+        if not self.transcript_path.exists():
+            return None
+        with open(self.transcript_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save_transcript(self, segments: List[Dict]):
+        """保存转录结果（不含翻译）"""
+        data = [
+            {"start": s["start"], "end": s["end"], "text": s["text"]} for s in segments
+        ]
+        _atomic_write_text(self.transcript_path, json.dumps(data, ensure_ascii=False))
+
+    # ---- 翻译（逐条追加） ----
+
+    def load_translations(self) -> Dict[int, str]:
+        """
+        读取已完成的翻译
+
+        Returns:
+            片段序号到译文的映射（忽略崩溃时写了一半的末行；
+            翻译失败的记录不返回，续跑时重新翻译）
+        """
+        translations = {}
+        if not self.translations_path.exists():
+            return translations
+        with open(self.translations_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if not record.get("failed"):
+                    translations[record["index"]] = record["translation"]
+        return translations
+
+    def record_translation(self, index: int, translation: str, failed: bool = False):
+        """
+        追加一条译文并立即落盘
+
+        Args:
+            index: 片段序号
+            translation: 译文（翻译失败时为原文）
+            failed: 翻译是否失败
+        """
+        record = {"index": index, "translation": translation}
+        if failed:
+            record["failed"] = True
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            with open(self.translations_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+
+    def discard_translations(self):
+        """丢弃已记录的译文"""
+        if self.translations_path.exists():
+            self.translations_path.unlink()
+
+    def check_translation_settings(self, settings: Dict) -> bool:
+        """
+        核对已记录的译文所用的翻译设置，不一致时丢弃译文及由其生成的字幕
+
+        提示词版本、批量大小、上下文条数等会改变译文，不同设置的译文不能混在一起。
+
+        Args:
+            settings: 本次的翻译设置（可JSON序列化）
+
+        Returns:
+            是否丢弃了旧的译文
+        """
+        stale = False
+        if self.translation_settings_path.exists():
+            try:
+                with open(self.translation_settings_path, "r", encoding="utf-8") as f:
+                    stale = json.load(f) != settings
+            except ValueError:
+                stale = True
+        elif self.translations_path.exists():
+            stale = True  # 没有记录设置的旧检查点
+        if stale:
+            self.discard_translations()
+            for path in self.dir.glob("*subtitle.*"):
+                path.unlink()
+        _atomic_write_text(
+            self.translation_settings_path, json.dumps(settings, sort_keys=True)
+        )
+        return stale
+
+    # ---- 字幕 ----
+
+    def subtitle_path(self, fmt: str) -> Path:
+        """指定格式（srt/ass/vtt）的字幕文件路径"""
+        return self.dir / f"subtitle.{fmt}"
+
+    def subtitle_tmp_path(self, path: Path) -> Path:
+        """字幕文件的临时输出路径，完成后由 commit_subtitles 转正"""
+        return path.with_name("partial." + path.name)
+
+    def missing_subtitles(self, formats: Sequence[str]) -> List[str]:
+        """尚未生成的字幕格式"""
+        return [fmt for fmt in formats if not self.subtitle_path(fmt).exists()]
+
+    def has_subtitles(self, formats: Sequence[str]) -> bool:
+        """指定格式的字幕文件是否都已生成完成"""
+        return not self.missing_subtitles(formats)
+
+    def commit_subtitles(self, formats: Sequence[str]):
+        """标记字幕生成完成"""
+        for fmt in formats:
+            path = self.subtitle_path(fmt)
+            os.replace(self.subtitle_tmp_path(path), path)
+
+    def reset(self):
+        """丢弃已有检查点，重新开始"""
+        self.clear()
+        self.dir.mkdir(parents=True, exist_ok=True)
+
+    def clear(self):
+        """任务完成后删除整个检查点目录"""
+        shutil.rmtree(self.dir, ignore_errors=True)
@@ -14,12 +14,27 @@ project_root = Path(__file__).parent.parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
-from video_subtitle_translator.audio_extractor import extract_audio
 from video_subtitle_translator.transcriber import Transcriber
+from video_subtitle_translator.transcription_cache import TranscriptionCache
 from video_subtitle_translator.translator import Translator
-from video_subtitle_translator.subtitle_generator import generate_srt, generate_ass
-from video_subtitle_translator.subtitle_parser import parse_srt
-from video_subtitle_translator.config import TEMP_DIR, WHISPER_MODEL_SIZE
+from video_subtitle_translator.translation_memory import TranslationMemory
+from video_subtitle_translator.pipeline import VideoJob
+from video_subtitle_translator.batch import collect_videos, run_batch
+from video_subtitle_translator.encoding import resolve_profile
+from video_subtitle_translator.config import (
+    TEMP_DIR,
+    DEFAULT_ENCODING_PROFILE,
+    DEFAULT_MERGE_MODE,
+    MERGE_MODES,
+    SUBTITLE_FORMATS,
+    ENCODING_PROFILES,
+    BATCH_TRANSLATION_JOBS,
+    BATCH_MAX_ENCODES,
+    WHISPER_MODEL_SIZE,
+    TRANSLATION_CONCURRENCY,
+    TRANSLATION_BATCH_SIZE,
+    TRANSLATION_CONTEXT_LINES,
+)
 
 
 def process_video(
@@ -29,10 +44,26 @@ def process_video(
     model_size=None,
     keep_srt=False,
     language="en",
+    concurrency=None,
+    batch_size=None,
+    context_lines=None,
+    use_cache=True,
+    resume=True,
+    stream=False,
+    asr_workers=None,
+    in_memory_audio=False,
+    encoding=None,
+    merge_mode=None,
+    metrics_path=None,
+    prometheus_path=None,
+    sidecar_formats=None,
 ):
     """
     处理视频的主函数
 
+    各阶段结果（音频、转录、逐条译文、字幕文件）都会写入检查点目录，
+    中断后以相同参数重新运行会从第一个未完成的阶段继续。
+
     Args:
         video_path: 输入视频路径
         output_path: 输出视频路径
@@ -40,85 +71,69 @@ def process_video(
         model_size: Whisper模型大小
         keep_srt: 是否保留字幕文件
         language: 视频语言
+        concurrency: 翻译并发数（同时在途的Ollama请求数）
+        batch_size: 每次请求打包翻译的字幕条数
+        context_lines: 上下文窗口翻译附带的前文条数，0为关闭
+        use_cache: 是否使用转录缓存和翻译记忆库
+        resume: 是否从已有检查点继续，False则丢弃检查点重新处理
+        stream: 流式模式，语音识别每产出一个片段就交给翻译线程，两者同时进行
+        asr_workers: CPU多进程分块转录的进程数（大于1时启用，0为自动）
+        in_memory_audio: 音频经管道解码到内存直接交给Whisper，不写临时WAV文件
+        encoding: 烧录时的视频编码配置（见 encoding.resolve_profile），默认使用默认配置
+        merge_mode: 字幕合成方式，burn 烧录进画面，mux 作为字幕轨封装（不重新编码），
+            smart 只重新编码有字幕的关键帧区间，parallel 分块并行烧录
+        metrics_path: 运行指标JSON行文件，默认 config.METRICS_PATH
+        prometheus_path: Prometheus文本文件，默认 config.PROMETHEUS_PATH
+        sidecar_formats: 保留的字幕格式（srt/ass/vtt），默认 keep_srt 时为ASS与SRT
     """
     video_path = Path(video_path)
     if not video_path.exists():
         print(f"❌ 错误：视频文件不存在: {video_path}")
         return False
+    if subtitle_path and not Path(subtitle_path).exists():
+        print(f"❌ 错误：字幕文件不存在: {subtitle_path}")
+        return False
 
     # 创建临时目录
     temp_dir = Path(TEMP_DIR)
     temp_dir.mkdir(exist_ok=True)
-    video_name = video_path.stem
-    model_size = model_size or WHISPER_MODEL_SIZE
 
-    try:
-        # 步骤1-2: 语音识别或读取字幕
-        if subtitle_path:
-            print("=" * 60)
-            print("步骤 1/3: 读取英文字幕文件...")
-            print("=" * 60)
-            segments = parse_srt(subtitle_path)
-            if not segments:
-                print(f"❌ 警告：无法解析字幕文件: {subtitle_path}")
-                return False
-            print(f"✓ 成功读取 {len(segments)} 个字幕片段")
-            audio_path = temp_dir / f"{video_name}_audio.wav"
-        else:
-            print("=" * 60)
-            print("步骤 1/5: 提取音频...")
-            print("=" * 60)
-            audio_path = temp_dir / f"{video_name}_audio.wav"
-            extract_audio(str(video_path), str(audio_path))
-
-            print("\n" + "=" * 60)
-            print("步骤 2/5: 语音识别（Whisper）...")
-            print("=" * 60)
-            transcriber = Transcriber(model_size=model_size)
-            segments = transcriber.transcribe(str(audio_path), language=language)
-            if not segments:
-                print("❌ 警告：未识别到任何语音内容")
-                return False
-
-        # 步骤3: 翻译
-        step_num = "2/3" if subtitle_path else "3/5"
-        print("\n" + "=" * 60)
-        print(f"步骤 {step_num}: 翻译中文字幕（Ollama）...")
-        print("=" * 60)
-        translator = Translator()
-        segments = translator.translate_segments(segments)
-
-        # 步骤4: 生成字幕文件
-        step_num = "3/3" if subtitle_path else "4/5"
-        print("\n" + "=" * 60)
-        print(f"步骤 {step_num}: 生成字幕文件...")
-        print("=" * 60)
-        ass_path = temp_dir / f"{video_name}_bilingual.ass"
-        srt_path = temp_dir / f"{video_name}_bilingual.srt"
-        generate_ass(segments, str(ass_path))
-        generate_srt(segments, str(srt_path))
+    job = VideoJob(
+        str(video_path),
+        output_path=output_path,
+        subtitle_path=subtitle_path,
+        model_size=model_size,
+        language=language,
+        keep_srt=keep_srt,
+        resume=resume,
+        in_memory_audio=in_memory_audio,
+        encoding=encoding,
+        merge_mode=merge_mode,
+        metrics_path=metrics_path,
+        prometheus_path=prometheus_path,
+        sidecar_formats=sidecar_formats,
+    )
+    transcriber = Transcriber(
+        model_size=job.model_size,
+        cache=TranscriptionCache() if use_cache else None,
+        workers=asr_workers,
+    )
+    memory = TranslationMemory() if use_cache else None
+    translator = Translator(
+        concurrency=concurrency,
+        batch_size=batch_size,
+        memory=memory,
+        context_lines=context_lines,
+    )
 
-        # 步骤5: 合成视频
-        print("\n" + "=" * 60)
-        print("烧录字幕到视频...")
-        print("=" * 60)
-        from video_subtitle_translator.video_merger_alt import merge_with_drawtext
-
-        output_video = merge_with_drawtext(str(video_path), str(srt_path), output_path)
-
-        # 清理临时文件
-        if not keep_srt:
-            print("\n清理临时文件...")
-            if not subtitle_path and audio_path.exists():
-                audio_path.unlink()
-            if ass_path.exists():
-                ass_path.unlink()
-            if srt_path.exists():
-                srt_path.unlink()
-        else:
-            print(f"\n保留的字幕文件:")
-            print(f"  - ASS: {ass_path}")
-            print(f"  - SRT: {srt_path}")
+    try:
+        if not job.load_segments(transcriber, translator, stream=stream):
+            job.metrics.finish("failed", error=job.error)
+            return False
+        job.translate(translator)
+        job.generate_subtitles()
+        output_video = job.merge()
+        job.finish()
 
         print("\n" + "=" * 60)
         print("✓ 处理完成！")
@@ -127,12 +142,42 @@ def process_video(
         return True
 
     except Exception as e:
+        job.metrics.finish("failed", error=str(e))
         print(f"\n❌ 错误: {e}")
         import traceback
 
         traceback.print_exc()
+        print(f"\n已完成的阶段保存在: {job.checkpoint.dir}")
+        print("使用相同参数重新运行即可从中断处继续（--no-resume 可重新开始）")
         return False
 
+    finally:
+        translator.close()
+        if memory is not None:
+            memory.close()
+
+
+def positive_int(value: str) -> int:
+    """argparse类型：不小于1的整数"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"需要整数: {value}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"需要不小于1的整数: {value}")
+    return number
+
+
+def non_negative_int(value: str) -> int:
+    """argparse类型：不小于0的整数（0通常表示自动）"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"需要整数: {value}")
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"需要不小于0的整数: {value}")
+    return number
+
 
 def main():
     """CLI入口函数"""
@@ -147,23 +192,30 @@ def main():
   videocut "video.mp4" -s "english.srt"               # 使用已有字幕
   videocut "video.mp4" -m small                       # 使用small模型（更快）
   videocut "video.mp4" -k                             # 保留字幕文件
+  videocut "video.mp4" -j 8                           # 8个翻译请求并发
+  videocut "video.mp4" -b 10                          # 每次请求翻译10条字幕
+  videocut "video.mp4" --encode-profile fast          # 更快的编码（文件稍大）
+  videocut "video.mkv" --merge-mode mux               # 封装为软字幕轨（不重新编码）
+  videocut "D:\\videos" --batch -o "D:\\out"            # 批量处理目录中的所有视频
 
 更多信息: https://github.com/xiaosen6/VedioCut
         """,
     )
 
-    parser.add_argument("video", help="输入视频文件的绝对路径")
+    parser.add_argument(
+        "video", help="输入视频文件的绝对路径（批量模式下为视频目录或清单文件）"
+    )
     parser.add_argument(
         "-o",
         "--output",
         default=None,
-        help="输出视频文件路径（默认: 原视频名_translated.mp4）",
+        help="输出视频文件路径，批量模式下为输出目录（默认: 原视频名_translated.mp4）",
     )
     parser.add_argument(
         "-s",
         "--subtitle",
         default=None,
-        help="英文字幕文件路径（SRT格式），提供则跳过语音识别",
+        help="英文字幕文件路径（SRT/VTT/ASS，编码自动识别），提供则跳过语音识别",
     )
     parser.add_argument(
         "-m",
@@ -175,12 +227,160 @@ def main():
     parser.add_argument(
         "-k", "--keep-srt", action="store_true", help="保留生成的字幕文件"
     )
+    parser.add_argument(
+        "--sidecar-formats",
+        nargs="+",
+        default=None,
+        choices=list(SUBTITLE_FORMATS),
+        metavar="FORMAT",
+        help="只保留这些格式的字幕文件（srt/ass/vtt，指定即保留；默认 -k 时为 ass srt）",
+    )
     parser.add_argument(
         "-l", "--language", default="en", help="视频语言代码（默认: en）"
     )
+    parser.add_argument(
+        "-j",
+        "--concurrency",
+        type=positive_int,
+        default=TRANSLATION_CONCURRENCY,
+        help=f"翻译并发数，建议与Ollama的OLLAMA_NUM_PARALLEL一致（默认: {TRANSLATION_CONCURRENCY}）",
+    )
+    parser.add_argument(
+        "-b",
+        "--batch-size",
+        type=int,
+        default=TRANSLATION_BATCH_SIZE,
+        help=f"每次请求打包翻译的字幕条数，1为逐句翻译（默认: {TRANSLATION_BATCH_SIZE}）",
+    )
+    parser.add_argument(
+        "--context-lines",
+        type=int,
+        default=TRANSLATION_CONTEXT_LINES,
+        help="上下文窗口翻译：每组字幕（-b条）经 /api/chat 翻译时附带的前文译文条数，"
+        f"0为关闭（默认: {TRANSLATION_CONTEXT_LINES}）",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="不使用转录缓存和翻译记忆库，重新识别并请求Ollama翻译所有句子",
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="丢弃上次中断留下的检查点，从头开始处理",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="流式模式：语音识别与翻译同时进行（总耗时接近两者中较慢的一个）",
+    )
+    parser.add_argument(
+        "--asr-workers",
+        type=non_negative_int,
+        default=None,
+        help="CPU多进程分块语音识别的进程数，大于1时启用，0为按CPU核数自动（默认: 关闭）",
+    )
+    parser.add_argument(
+        "--in-memory-audio",
+        action="store_true",
+        help="音频直接解码到内存交给Whisper，不写临时WAV文件",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="批量模式：输入为视频目录或清单文件（每行一个视频路径），整批共用一个Whisper模型",
+    )
+    parser.add_argument(
+        "--translation-jobs",
+        type=int,
+        default=BATCH_TRANSLATION_JOBS,
+        help=f"批量模式下同时翻译的视频数（默认: {BATCH_TRANSLATION_JOBS}）",
+    )
+    parser.add_argument(
+        "--max-encodes",
+        type=int,
+        default=BATCH_MAX_ENCODES,
+        help=f"批量模式下同时进行的ffmpeg编码数（默认: {BATCH_MAX_ENCODES}）",
+    )
+    parser.add_argument(
+        "--merge-mode",
+        default=DEFAULT_MERGE_MODE,
+        choices=list(MERGE_MODES),
+        help=f"字幕合成方式：burn 烧录进画面；mux 作为字幕轨封装，音视频直接复制，"
+        f"几秒完成（需要播放器支持字幕轨）；smart 只重新编码有字幕的区间，"
+        f"其余直接复制；parallel 分块后多个ffmpeg进程同时烧录（默认: {DEFAULT_MERGE_MODE}）",
+    )
+    parser.add_argument(
+        "--encode-profile",
+        default=DEFAULT_ENCODING_PROFILE,
+        choices=list(ENCODING_PROFILES),
+        help=f"烧录字幕时的视频编码配置（默认: {DEFAULT_ENCODING_PROFILE}）",
+    )
+    parser.add_argument(
+        "--encode-threads",
+        type=int,
+        default=None,
+        help="视频编码线程数，0为由ffmpeg自动决定（默认: 按编码配置）",
+    )
+    parser.add_argument(
+        "--encode-tune",
+        default=None,
+        help="编码器tune选项，如 film、animation（默认: 按编码配置）",
+    )
+    parser.add_argument(
+        "--match-bitrate",
+        action="store_true",
+        help="按源视频码率编码（代替固定质量），输出大小与源视频接近",
+    )
+    parser.add_argument(
+        "--metrics",
+        default=None,
+        metavar="PATH",
+        help="各阶段耗时/吞吐指标的JSON行文件，空字符串为不记录（默认: temp/metrics.jsonl）",
+    )
+    parser.add_argument(
+        "--prometheus",
+        default=None,
+        metavar="PATH",
+        help="同时写出Prometheus文本文件（供node_exporter textfile collector读取）",
+    )
     parser.add_argument("-v", "--version", action="version", version="%(prog)s 1.0.0")
 
     args = parser.parse_args()
+    encoding = resolve_profile(
+        args.encode_profile,
+        threads=args.encode_threads,
+        tune=args.encode_tune,
+        match_bitrate=args.match_bitrate,
+    )
+
+    if args.batch:
+        videos = collect_videos(args.video)
+        if not videos:
+            print(f"❌ 错误：没有找到要处理的视频: {args.video}")
+            sys.exit(1)
+        statuses = run_batch(
+            videos,
+            output_dir=args.output,
+            model_size=args.model,
+            language=args.language,
+            keep_srt=args.keep_srt,
+            concurrency=args.concurrency,
+            batch_size=args.batch_size,
+            context_lines=args.context_lines,
+            use_cache=not args.no_cache,
+            resume=not args.no_resume,
+            asr_workers=args.asr_workers,
+            in_memory_audio=args.in_memory_audio,
+            translation_jobs=args.translation_jobs,
+            max_encodes=args.max_encodes,
+            encoding=encoding,
+            merge_mode=args.merge_mode,
+            metrics_path=args.metrics,
+            prometheus_path=args.prometheus,
+            sidecar_formats=args.sidecar_formats,
+        )
+        sys.exit(0 if all(s["status"] == "done" for s in statuses) else 1)
 
     success = process_video(
         video_path=args.video,
@@ -189,6 +389,19 @@ def main():
         model_size=args.model,
         keep_srt=args.keep_srt,
         language=args.language,
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        context_lines=args.context_lines,
+        use_cache=not args.no_cache,
+        resume=not args.no_resume,
+        stream=args.stream,
+        asr_workers=args.asr_workers,
+        in_memory_audio=args.in_memory_audio,
+        encoding=encoding,
+        merge_mode=args.merge_mode,
+        metrics_path=args.metrics,
+        prometheus_path=args.prometheus,
+        sidecar_formats=args.sidecar_formats,
     )
 
     sys.exit(0 if success else 1)
@@ -0,0 +1,186 @@
+"""
+Thin client for the resident service (videocut-submit)
+
+只依赖标准库，不导入Whisper等重量级模块，启动几乎没有延迟。
+"""
+
+import argparse
+import json
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Dict, Optional
+
+from .config import DAEMON_HOST, DAEMON_PORT, MERGE_MODES, SUBTITLE_FORMATS
+
+
+class DaemonClient:
+    """常驻服务的HTTP客户端"""
+
+    def __init__(self, url: str = None, timeout: float = 10):
+        """
+        Args:
+            url: 服务地址，默认 http://DAEMON_HOST:DAEMON_PORT
+            timeout: 请求超时（秒）
+        """
+        self.url = (url or f"http://{DAEMON_HOST}:{DAEMON_PORT}").rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, method: str, path: str, payload: Optional[Dict] = None):
+        data = None
+        headers = {}
+        if payload is not None:
+            data = json.dumps(payload).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        request = urllib.request.Request(
+            self.url + path, data=data, headers=headers, method=method
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get("error", str(e))
+            except ValueError:
+                message = str(e)
+            raise RuntimeError(message) from e
+
+    def health(self) -> Dict:
+        """服务状态"""
+        return self._request("GET", "/health")
+
+    def submit(self, **params) -> Dict:
+        """提交任务（参数见 daemon.JOB_PARAMS），返回任务状态"""
+        return self._request("POST", "/jobs", params)
+
+    def status(self, job_id: str) -> Dict:
+        """查询任务状态"""
+        return self._request("GET", f"/jobs/{job_id}")
+
+    def jobs(self):
+        """所有任务的状态"""
+        return self._request("GET", "/jobs")
+
+    def wait(self, job_id: str, interval: float = 1.0) -> Dict:
+        """
+        等待任务结束，期间打印阶段与进度
+
+        Returns:
+            任务最终状态
+        """
+        last = None
+        while True:
+            record = self.status(job_id)
+            if record["status"] in ("done", "failed"):
+                return record
+            line = _describe(record)
+            if line != last:
+                print(line)
+                last = line
+            time.sleep(interval)
+
+
+def _describe(record: Dict) -> str:
+    """任务状态的一行描述"""
+    if record["status"] == "queued":
+        return f"[{record['id']}] 排队中（第 {record.get('queue_position')} 位）"
+    line = f"[{record['id']}] {record['status']}"
+    if record.get("stage"):
+        line += f" - {record['stage']}"
+    if record.get("segments"):
+        line += f" ({record['translated']}/{record['segments']})"
+    return line
+
+
+def _absolute(path: Optional[str]) -> Optional[str]:
+    # 服务进程的工作目录与客户端不同，统一转为绝对路径
+    return str(Path(path).resolve()) if path else None
+
+
+def main():
+    """提交任务入口"""
+    parser = argparse.ArgumentParser(
+        prog="videocut-submit",
+        description="向VideoCut常驻服务（videocut-daemon）提交任务",
+    )
+    parser.add_argument("video", nargs="?", help="输入视频文件路径")
+    parser.add_argument("-o", "--output", default=None, help="输出视频文件路径")
+    parser.add_argument("-s", "--subtitle", default=None, help="英文字幕文件路径（SRT/VTT/ASS）")
+    parser.add_argument("-m", "--model", default=None, help="Whisper模型大小")
+    parser.add_argument("-l", "--language", default="en", help="视频语言代码（默认: en）")
+    parser.add_argument("-k", "--keep-srt", action="store_true", help="保留生成的字幕文件")
+    parser.add_argument(
+        "--sidecar-formats",
+        nargs="+",
+        default=None,
+        choices=list(SUBTITLE_FORMATS),
+        metavar="FORMAT",
+        help="只保留这些格式的字幕文件（srt/ass/vtt）",
+    )
+    parser.add_argument("--no-resume", action="store_true", help="丢弃已有检查点，从头开始处理")
+    parser.add_argument("--stream", action="store_true", help="流式模式：语音识别与翻译同时进行")
+    parser.add_argument(
+        "--in-memory-audio", action="store_true", help="音频直接解码到内存，不写临时WAV文件"
+    )
+    parser.add_argument("--encode-profile", default=None, help="烧录字幕时的视频编码配置")
+    parser.add_argument(
+        "--merge-mode", default=None, choices=list(MERGE_MODES), help="字幕合成方式"
+    )
+    parser.add_argument(
+        "--url",
+        default=None,
+        help=f"服务地址（默认: http://{DAEMON_HOST}:{DAEMON_PORT}）",
+    )
+    parser.add_argument("--no-wait", action="store_true", help="提交后立即返回，不等待任务完成")
+    parser.add_argument("--status", metavar="JOB_ID", help="查询任务状态")
+    parser.add_argument("--list", action="store_true", help="列出服务中的所有任务")
+    args = parser.parse_args()
+
+    client = DaemonClient(args.url)
+    try:
+        if args.list:
+            for record in client.jobs():
+                print(f"{_describe(record)}  {record['params']['video']}")
+            return
+        if args.status:
+            print(json.dumps(client.status(args.status), ensure_ascii=False, indent=2))
+            return
+        if not args.video:
+            parser.error("需要提供视频路径")
+
+        record = client.submit(
+            video=_absolute(args.video),
+            output=_absolute(args.output),
+            subtitle=_absolute(args.subtitle),
+            model=args.model,
+            language=args.language,
+            keep_srt=args.keep_srt,
+            resume=not args.no_resume,
+            stream=args.stream,
+            in_memory_audio=args.in_memory_audio,
+            encode_profile=args.encode_profile,
+            merge_mode=args.merge_mode,
+            sidecar_formats=args.sidecar_formats,
+        )
+        print(f"✓ 已提交任务: {record['id']}")
+        if args.no_wait:
+            return
+        record = client.wait(record["id"])
+    except urllib.error.URLError as e:
+        print(f"❌ 无法连接服务 {client.url}: {e.reason}（请先运行 videocut-daemon）")
+        sys.exit(1)
+    except RuntimeError as e:
+        print(f"❌ 错误: {e}")
+        sys.exit(1)
+
+    if record["status"] == "done":
+        print(f"✓ 处理完成！输出视频: {record['output']}")
+    else:
+        print(f"❌ 任务失败: {record['error']}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -17,10 +17,82 @@ MODELS_DIR = os.path.join(BASE_DIR, "models")
 WHISPER_MODEL_SIZE = "medium"  # tiny, base, small, medium, large
 WHISPER_DEVICE = "cuda"  # 如果有NVIDIA GPU用"cuda"，否则用"cpu"
 WHISPER_COMPUTE_TYPE = "float16"  # float16或int8
+# CPU多进程分块转录：进程数（1为关闭，0为按CPU核数自动），仅在CPU上使用
+WHISPER_CPU_WORKERS = 1
+WHISPER_CHUNK_SECONDS = 300  # 每块的最短目标长度（秒），实际切点落在静音处
 
 # Ollama配置
 OLLAMA_HOST = "http://localhost:11434"
 OLLAMA_MODEL = "translategemma:4b"
+OLLAMA_KEEP_ALIVE = "30m"  # 请求间保持模型常驻显存，避免反复卸载/加载
+OLLAMA_TIMEOUT = (5, 60)  # (连接超时, 读取超时) 秒
+
+# 翻译并发数（同时在途的Ollama请求数），建议与服务端OLLAMA_NUM_PARALLEL保持一致
+TRANSLATION_CONCURRENCY = 4
+
+# 批量翻译：每次请求打包的连续片段数（1为逐句翻译），回复无法对齐时自动逐句回退
+TRANSLATION_BATCH_SIZE = 1
+
+# 上下文窗口翻译：每组片段（TRANSLATION_BATCH_SIZE条）经 /api/chat 翻译时附带的
+# 前文译文条数，0为关闭；系统提示词固定不变，Ollama可复用这部分前缀的KV缓存
+TRANSLATION_CONTEXT_LINES = 0
+
+# 流式读取Ollama回复：单句得到第一行完整译文、批量得到全部编号行后即断开，
+# 不再等待模型生成多余的解释或多个版本。
+# 代价：Ollama只能通过断开连接来停止生成，提前断开的请求不能复用连接池中的
+# 连接，下次请求重新连接（本地Ollama的建连开销远小于省下的生成时间；
+# 远程且建连昂贵的部署可设为False）
+TRANSLATION_STREAM = True
+
+# 最大生成token数按原文长度估算：每个字符 TRANSLATION_TOKENS_PER_CHAR 个token，
+# 每条不少于 TRANSLATION_MIN_PREDICT
+TRANSLATION_TOKENS_PER_CHAR = 0.5
+TRANSLATION_MIN_PREDICT = 24
+
+# 任务内去重：忽略大小写、空白与标点后相同的片段只翻译一次，译文分发给所有重复片段
+TRANSLATION_DEDUP = True
+
+# 流式模式：语音识别与翻译之间的有界队列容量（片段数）
+TRANSLATION_QUEUE_SIZE = 64
+
+# 批量模式：同时翻译的任务数、同时进行的ffmpeg编码数
+BATCH_TRANSLATION_JOBS = 1
+BATCH_MAX_ENCODES = 1
+
+# 常驻服务（videocut-daemon）：监听地址、同时执行的任务数
+DAEMON_HOST = "127.0.0.1"
+DAEMON_PORT = 8765
+DAEMON_WORKERS = 1
+
+# 烧录字幕时的视频编码配置（--encode-profile 选择）
+# encoder/preset/crf(或nvenc的cq)/tune/threads 均可按需修改，threads为0表示由ffmpeg自动决定
+ENCODING_PROFILES = {
+    "fast": {"encoder": "libx264", "preset": "veryfast", "crf": 23, "tune": None, "threads": 0},
+    "balanced": {"encoder": "libx264", "preset": "medium", "crf": 18, "tune": None, "threads": 0},
+    "archive": {"encoder": "libx264", "preset": "slow", "crf": 16, "tune": None, "threads": 0},
+    # NVIDIA GPU硬件编码（需要带nvenc的ffmpeg）
+    "nvenc": {"encoder": "h264_nvenc", "preset": "p4", "cq": 19, "tune": None, "threads": 0},
+}
+DEFAULT_ENCODING_PROFILE = "balanced"
+
+# 字幕合成方式：burn 烧录进画面（重新编码）；mux 作为字幕轨封装（音视频直接复制，几秒完成）；
+# smart 只重新编码有字幕的区间；parallel 在关键帧处分块，多个ffmpeg进程同时烧录后拼接
+MERGE_MODES = ("burn", "mux", "smart", "parallel")
+DEFAULT_MERGE_MODE = "burn"
+SOFT_SUBTITLE_LANGUAGE = "chi"  # 软字幕轨的语言标记（ISO 639-2）
+SOFT_SUBTITLE_TITLE = "中英双语"
+
+# 智能渲染（--merge-mode smart）：只重新编码有字幕的关键帧区间，其余直接复制
+SMART_RENDER_MIN_GAP = 2.0  # 间隔短于此值（秒）的两个区间合并为一个，避免过多小片段
+SMART_RENDER_MAX_COVERAGE = 0.8  # 需要重新编码的比例超过此值时直接完整烧录
+
+# 并行分块烧录（--merge-mode parallel）：块数即同时运行的ffmpeg进程数，0为按CPU核数自动
+PARALLEL_BURN_CHUNKS = 0
+
+# 字幕文件格式：只生成合成方式实际用到的格式（烧录用SRT，MKV字幕轨用ASS），
+# 另外按需保留到 temp/ 的字幕文件格式；-k 未指定格式时保留 SIDECAR_FORMATS
+SUBTITLE_FORMATS = ("srt", "ass", "vtt")
+SIDECAR_FORMATS = ("ass", "srt")
 
 # 字幕样式配置
 SUBTITLE_STYLE = {
@@ -44,3 +116,20 @@ SUBTITLE_STYLE = {
 # 临时文件目录
 TEMP_DIR = os.path.join(BASE_DIR, "temp")
 os.makedirs(TEMP_DIR, exist_ok=True)
+
+# 翻译记忆库：按 原文 + OLLAMA_MODEL + 提示词版本 缓存译文，重复句子不再请求Ollama
+TRANSLATION_MEMORY_PATH = os.path.join(TEMP_DIR, "translation_memory.sqlite3")
+TRANSLATION_MEMORY_MAX_ENTRIES = 200000  # 超出后淘汰最久未使用的条目
+
+
+# 转录缓存：按 音频内容 + 模型大小 + 语言 + VAD参数 缓存Whisper结果，命中时跳过模型加载和推理
+TRANSCRIPTION_CACHE_DIR = os.path.join(TEMP_DIR, "transcription_cache")
+TRANSCRIPTION_CACHE_MAX_BYTES = 256 * 1024 * 1024  # 超出后淘汰最久未使用的条目
+
+# 阶段检查点目录：中断后重新运行会从第一个未完成的阶段继续
+CHECKPOINT_DIR = os.path.join(TEMP_DIR, "checkpoints")
+
+# 运行指标：每个任务结束时向JSON行文件追加各阶段耗时/吞吐/内存峰值（空字符串为不记录）
+METRICS_PATH = os.path.join(TEMP_DIR, "metrics.jsonl")
+# 可选：供node_exporter textfile collector读取的Prometheus文本文件，None为不写
+PROMETHEUS_PATH = None
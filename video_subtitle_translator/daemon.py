@@ -0,0 +1,449 @@
+"""
+Resident service that keeps Whisper models warm and runs queued jobs
+
+启动：videocut-daemon [--preload]
+提交：videocut-submit <视频路径>（见 client.py）
+
+HTTP接口（仅监听本机）：
+    GET  /health       服务状态与已加载的模型
+    POST /jobs         提交任务，返回任务ID
+    GET  /jobs         所有任务的状态
+    GET  /jobs/<id>    单个任务的状态与进度
+"""
+
+import argparse
+import json
+import queue
+import threading
+import time
+import traceback
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .config import (
+    DAEMON_HOST,
+    DAEMON_PORT,
+    DAEMON_WORKERS,
+    MERGE_MODES,
+    SUBTITLE_FORMATS,
+    TRANSLATION_CONCURRENCY,
+    WHISPER_COMPUTE_TYPE,
+    WHISPER_DEVICE,
+    WHISPER_MODEL_SIZE,
+)
+from .cli import non_negative_int, positive_int
+from .encoding import resolve_profile
+from .pipeline import VideoJob
+from .transcriber import Transcriber
+from .transcription_cache import TranscriptionCache
+from .translation_memory import TranslationMemory
+from .translator import Translator
+
+# 任务参数及默认值（未列出的字段会被忽略）
+JOB_PARAMS = {
+    "video": None,
+    "output": None,
+    "subtitle": None,
+    "model": None,
+    "device": None,
+    "compute_type": None,
+    "language": "en",
+    "keep_srt": False,
+    "resume": True,
+    "stream": False,
+    "in_memory_audio": False,
+    "encode_profile": None,
+    "merge_mode": None,
+    "sidecar_formats": None,
+}
+
+
+class ModelPool:
+    """常驻内存的Whisper模型，按 模型大小/设备/计算类型 复用"""
+
+    def __init__(self, cache: Optional[TranscriptionCache] = None, asr_workers: int = None):
+        """
+        Args:
+            cache: 转录缓存，所有模型共用
+            asr_workers: CPU多进程分块转录的进程数
+        """
+        self.cache = cache
+        self.asr_workers = asr_workers
+        self._entries: Dict[Tuple[str, str, str], Tuple[Transcriber, threading.Lock]] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self, model_size: str = None, device: str = None, compute_type: str = None
+    ) -> Tuple[Transcriber, threading.Lock]:
+        """
+        取得（必要时创建）识别器
+
+        Returns:
+            (识别器, 使用锁)，同一模型同一时间只执行一个识别任务
+        """
+        key = (
+            model_size or WHISPER_MODEL_SIZE,
+            device or WHISPER_DEVICE,
+            compute_type or WHISPER_COMPUTE_TYPE,
+        )
+        with self._lock:
+            if key not in self._entries:
+                transcriber = Transcriber(
+                    model_size=key[0],
+                    device=key[1],
+                    compute_type=key[2],
+                    cache=self.cache,
+                    workers=self.asr_workers,
+                )
+                self._entries[key] = (transcriber, threading.Lock())
+            return self._entries[key]
+
+    def loaded(self):
+        """已加载到内存的模型列表"""
+        with self._lock:
+            return [
+                {"model": key[0], "device": key[1], "compute_type": key[2]}
+                for key, (transcriber, _) in self._entries.items()
+                if transcriber.model is not None
+            ]
+
+
+class JobQueue:
+    """任务队列：由若干工作线程按提交顺序执行VideoJob流水线"""
+
+    def __init__(
+        self,
+        models: ModelPool,
+        translator: Translator,
+        workers: int = None,
+    ):
+        """
+        Args:
+            models: 常驻模型池
+            translator: 所有任务共用的翻译器
+            workers: 同时执行的任务数
+        """
+        self.models = models
+        self.translator = translator
+        self._queue = queue.Queue()
+        self._jobs: Dict[str, Dict] = {}
+        self._running: Dict[str, VideoJob] = {}
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._worker, daemon=True)
+            for _ in range(max(1, workers or DAEMON_WORKERS))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, params: Dict) -> Dict:
+        """
+        提交任务
+
+        Args:
+            params: 任务参数（见 JOB_PARAMS），video 必需
+
+        Returns:
+            任务状态字典
+
+        Raises:
+            ValueError: 参数无效或文件不存在
+        """
+        params = {name: params.get(name, default) for name, default in JOB_PARAMS.items()}
+        if not params["video"]:
+            raise ValueError("缺少参数: video")
+        if not Path(params["video"]).exists():
+            raise ValueError(f"视频文件不存在: {params['video']}")
+        if params["subtitle"] and not Path(params["subtitle"]).exists():
+            raise ValueError(f"字幕文件不存在: {params['subtitle']}")
+        resolve_profile(params["encode_profile"])  # 未知的编码配置在提交时报错
+        if params["merge_mode"] not in (None, *MERGE_MODES):
+            raise ValueError(f"未知的字幕合成方式: {params['merge_mode']}")
+        unknown = set(params["sidecar_formats"] or ()) - set(SUBTITLE_FORMATS)
+        if unknown:
+            raise ValueError(f"未知的字幕格式: {', '.join(sorted(unknown))}")
+
+        record = {
+            "id": uuid.uuid4().hex[:12],
+            "params": params,
+            "status": "queued",
+            "stage": None,
+            "segments": None,
+            "translated": 0,
+            "output": None,
+            "error": None,
+            "submitted": time.time(),
+            "started": None,
+            "finished": None,
+        }
+        with self._lock:
+            self._jobs[record["id"]] = record
+        self._queue.put(record["id"])
+        print(f"[daemon] 已接收任务 {record['id']}: {params['video']}")
+        return self.get(record["id"])
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """单个任务的状态（含翻译进度），不存在时返回None"""
+        with self._lock:
+            record = self._jobs.get(job_id)
+            if record is None:
+                return None
+            record = dict(record)
+            job = self._running.get(job_id)
+        if job is not None:
+            record["translated"] = job.translated
+            if job.segments is not None:
+                record["segments"] = len(job.segments)
+        record["queue_position"] = self._position(job_id)
+        return record
+
+    def list(self):
+        """所有任务的状态，按提交顺序"""
+        with self._lock:
+            ids = list(self._jobs)
+        return [self.get(job_id) for job_id in ids]
+
+    def pending(self) -> int:
+        """排队中的任务数"""
+        return self._queue.qsize()
+
+    def _position(self, job_id: str) -> Optional[int]:
+        with self._queue.mutex:
+            waiting = list(self._queue.queue)
+        return waiting.index(job_id) + 1 if job_id in waiting else None
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _worker(self):
+        while True:
+            job_id = self._queue.get()
+            try:
+                self._run(job_id)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job_id: str):
+        with self._lock:
+            params = self._jobs[job_id]["params"]
+        self._update(job_id, status="running", stage="loading", started=time.time())
+        job = None
+        try:
+            transcriber, model_lock = self.models.get(
+                params["model"], params["device"], params["compute_type"]
+            )
+            job = VideoJob(
+                params["video"],
+                output_path=params["output"],
+                subtitle_path=params["subtitle"],
+                model_size=transcriber.model_size,
+                language=params["language"],
+                keep_srt=params["keep_srt"],
+                resume=params["resume"],
+                in_memory_audio=params["in_memory_audio"],
+                encoding=resolve_profile(params["encode_profile"]),
+                merge_mode=params["merge_mode"],
+                sidecar_formats=params["sidecar_formats"],
+            )
+            with self._lock:
+                self._running[job_id] = job
+
+            self._update(job_id, stage="transcribing")
+            with model_lock:
+                if not job.load_segments(
+                    transcriber, self.translator, stream=params["stream"]
+                ):
+                    raise RuntimeError(job.error)
+            self._update(job_id, stage="translating", segments=len(job.segments))
+            job.translate(self.translator)
+            self._update(job_id, stage="generating subtitles")
+            job.generate_subtitles()
+            self._update(job_id, stage="encoding")
+            output = job.merge()
+            job.finish()
+            self._update(job_id, status="done", stage=None, output=output)
+            print(f"[daemon] ✓ 任务 {job_id} 完成: {output}")
+        except Exception as e:
+            traceback.print_exc()
+            if job is not None:
+                job.metrics.finish("failed", error=str(e))
+            self._update(job_id, status="failed", error=str(e))
+            print(f"[daemon] ❌ 任务 {job_id} 失败: {e}")
+        finally:
+            with self._lock:
+                self._running.pop(job_id, None)
+                if job is not None:
+                    self._jobs[job_id]["translated"] = job.translated
+                    self._jobs[job_id]["metrics"] = list(job.metrics.stages)
+            self._update(job_id, finished=time.time())
+
+
+def _make_handler(jobs: JobQueue, models: ModelPool):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, payload):
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            path = self.path.rstrip("/")
+            if path == "/health":
+                self._send(
+                    200,
+                    {"status": "ok", "models": models.loaded(), "queued": jobs.pending()},
+                )
+            elif path == "/jobs":
+                self._send(200, jobs.list())
+            elif path.startswith("/jobs/"):
+                record = jobs.get(path[len("/jobs/"):])
+                if record is None:
+                    self._send(404, {"error": "任务不存在"})
+                else:
+                    self._send(200, record)
+            else:
+                self._send(404, {"error": "未知接口"})
+
+        def do_POST(self):
+            if self.path.rstrip("/") != "/jobs":
+                self._send(404, {"error": "未知接口"})
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                params = json.loads(self.rfile.read(length) or b"{}")
+                if not isinstance(params, dict):
+                    raise ValueError("请求体必须是JSON对象")
+                record = jobs.submit(params)
+            except ValueError as e:
+                self._send(400, {"error": str(e)})
+                return
+            self._send(202, record)
+
+    return Handler
+
+
+def serve(
+    host: str = None,
+    port: int = None,
+    workers: int = None,
+    preload: bool = False,
+    use_cache: bool = True,
+    concurrency: int = None,
+    batch_size: int = None,
+    asr_workers: int = None,
+    context_lines: int = None,
+):
+    """
+    启动常驻服务（阻塞直到Ctrl+C）
+
+    Args:
+        host: 监听地址
+        port: 监听端口
+        workers: 同时执行的任务数
+        preload: 启动时预先加载默认Whisper模型
+        use_cache: 是否使用转录缓存和翻译记忆库
+        concurrency: 翻译并发数
+        batch_size: 每次请求打包翻译的字幕条数
+        asr_workers: CPU多进程分块转录的进程数
+        context_lines: 上下文窗口翻译附带的前文条数，0为关闭
+    """
+    host = host or DAEMON_HOST
+    port = port or DAEMON_PORT
+    models = ModelPool(TranscriptionCache() if use_cache else None, asr_workers)
+    memory = TranslationMemory() if use_cache else None
+    # 各任务共用一个翻译器，连接池要容纳所有同时执行的任务的在途请求
+    concurrency = max(1, concurrency or TRANSLATION_CONCURRENCY)
+    translator = Translator(
+        concurrency=concurrency,
+        batch_size=batch_size,
+        memory=memory,
+        pool_size=concurrency * max(1, workers or DAEMON_WORKERS),
+        context_lines=context_lines,
+    )
+    if preload:
+        transcriber, _ = models.get()
+        transcriber.load_model()
+
+    jobs = JobQueue(models, translator, workers)
+    httpd = ThreadingHTTPServer((host, port), _make_handler(jobs, models))
+    httpd.daemon_threads = True
+    print(f"[daemon] 服务已启动: http://{host}:{port}（Ctrl+C 退出）")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[daemon] 正在退出...")
+    finally:
+        httpd.server_close()
+        translator.close()
+        if memory is not None:
+            memory.close()
+
+
+def main():
+    """常驻服务入口"""
+    parser = argparse.ArgumentParser(
+        prog="videocut-daemon",
+        description="VideoCut常驻服务：Whisper模型常驻内存，通过本地HTTP接口接收任务",
+    )
+    parser.add_argument("--host", default=DAEMON_HOST, help=f"监听地址（默认: {DAEMON_HOST}）")
+    parser.add_argument(
+        "--port", type=int, default=DAEMON_PORT, help=f"监听端口（默认: {DAEMON_PORT}）"
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=positive_int,
+        default=DAEMON_WORKERS,
+        help=f"同时执行的任务数（默认: {DAEMON_WORKERS}）",
+    )
+    parser.add_argument(
+        "--preload",
+        action="store_true",
+        help=f"启动时预先加载默认Whisper模型（{WHISPER_MODEL_SIZE}）",
+    )
+    parser.add_argument(
+        "-j", "--concurrency", type=positive_int, default=None, help="翻译并发数"
+    )
+    parser.add_argument(
+        "-b", "--batch-size", type=int, default=None, help="每次请求打包翻译的字幕条数"
+    )
+    parser.add_argument(
+        "--context-lines", type=int, default=None, help="上下文窗口翻译附带的前文译文条数"
+    )
+    parser.add_argument(
+        "--asr-workers",
+        type=non_negative_int,
+        default=None,
+        help="CPU多进程分块语音识别的进程数，大于1时启用，0为按CPU核数自动",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="不使用转录缓存和翻译记忆库"
+    )
+    args = parser.parse_args()
+
+    serve(
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        preload=args.preload,
+        use_cache=not args.no_cache,
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        asr_workers=args.asr_workers,
+        context_lines=args.context_lines,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Video encoding profiles for subtitle burn-in
+"""
+
+from typing import Dict, List, Optional
+
+from .config import DEFAULT_ENCODING_PROFILE, ENCODING_PROFILES
+from .media_info import probe_media
+
+
+def resolve_profile(
+    name: str = None,
+    threads: int = None,
+    tune: str = None,
+    match_bitrate: bool = False,
+) -> Dict:
+    """
+    取得编码配置（在 ENCODING_PROFILES 的基础上应用覆盖项）
+
+    Args:
+        name: 配置名称，默认 DEFAULT_ENCODING_PROFILE
+        threads: 编码线程数（0为ffmpeg自动）
+        tune: 编码器tune选项（如 film、animation）
+        match_bitrate: 按源视频码率编码，代替固定质量（crf/cq）
+
+    Returns:
+        编码配置字典
+
+    Raises:
+        ValueError: 未知的配置名称
+    """
+    name = name or DEFAULT_ENCODING_PROFILE
+    if name not in ENCODING_PROFILES:
+        raise ValueError(
+            f"未知的编码配置: {name}（可选: {', '.join(ENCODING_PROFILES)}）"
+        )
+    profile = dict(ENCODING_PROFILES[name], name=name, match_bitrate=match_bitrate)
+    if threads is not None:
+        profile["threads"] = threads
+    if tune:
+        profile["tune"] = tune
+    return profile
+
+
+def probe_video_bitrate(video_path: str) -> Optional[int]:
+    """
+    读取源视频的视频流码率（bit/s）
+
+    部分容器（如MKV）不记录流码率，此时退回整个文件的码率。
+
+    Returns:
+        码率，无法获取时返回None
+    """
+    info = probe_media(video_path)
+    if info["video"] and info["video"]["bitrate"]:
+        return info["video"]["bitrate"]
+    return info["bitrate"]
+
+
+def video_encode_args(
+    encoding: Optional[Dict] = None, video_path: Optional[str] = None
+) -> List[str]:
+    """
+    生成ffmpeg视频编码参数
+
+    Args:
+        encoding: 编码配置（resolve_profile 的返回值），默认使用默认配置
+        video_path: 源视频路径，按源码率编码时用于读取码率
+
+    Returns:
+        ffmpeg参数列表（-c:v ... ）
+    """
+    encoding = encoding or resolve_profile()
+    args = ["-c:v", encoding["encoder"]]
+    if encoding.get("preset"):
+        args += ["-preset", encoding["preset"]]
+    if encoding.get("tune"):
+        args += ["-tune", encoding["tune"]]
+
+    bitrate = None
+    if encoding.get("match_bitrate") and video_path:
+        bitrate = probe_video_bitrate(video_path)
+        if bitrate is None:
+            print("⚠ 无法读取源视频码率，改用固定质量编码")
+    if bitrate:
+        # 平均码率与源一致，峰值不超过源码率，缓冲区为2秒
+        args += ["-b:v", str(bitrate), "-maxrate", str(bitrate), "-bufsize", str(bitrate * 2)]
+    elif "cq" in encoding:
+        args += ["-rc", "vbr", "-cq", str(encoding["cq"]), "-b:v", "0"]
+    else:
+        args += ["-crf", str(encoding["crf"])]
+
+    if encoding.get("threads"):
+        args += ["-threads", str(encoding["threads"])]
+    return args
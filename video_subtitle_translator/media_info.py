@@ -0,0 +1,196 @@
+"""
+ffprobe-based media inspection with a per-input cache
+"""
+
+import json
+import subprocess
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# 进程内缓存的文件数上限（批量模式/常驻服务会处理大量文件）
+_CACHE_SIZE = 256
+_cache: "OrderedDict[Tuple, Dict]" = OrderedDict()
+_lock = threading.Lock()
+
+# ffmpeg中表示无时间戳的值（AV_NOPTS_VALUE）
+_NOPTS_VALUE = -(2**63)
+
+
+def _cache_key(video_path: str) -> Tuple:
+    """按 绝对路径 + 大小 + 修改时间 定位，文件被替换后自动失效"""
+    path = Path(video_path).resolve()
+    stat = path.stat()
+    return (str(path), stat.st_size, stat.st_mtime_ns)
+
+
+def _ffprobe(video_path: str, *args: str) -> str:
+    cmd = ["ffprobe", "-v", "error", *args, str(video_path)]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"FFprobe error: {result.stderr}")
+    return result.stdout
+
+
+def _to_int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_rate(value: str) -> Optional[float]:
+    """解析 "30000/1001" 形式的帧率"""
+    num, _, den = (value or "").partition("/")
+    num, den = _to_float(num), _to_float(den or "1")
+    return num / den if num and den else None
+
+
+def _probe(video_path: str) -> Dict:
+    data = json.loads(
+        _ffprobe(video_path, "-show_format", "-show_streams", "-of", "json")
+    )
+    fmt = data.get("format", {})
+    video = next(
+        (
+            s
+            for s in data.get("streams", [])
+            if s.get("codec_type") == "video"
+            and not s.get("disposition", {}).get("attached_pic")  # 跳过封面图
+        ),
+        None,
+    )
+    audio = next(
+        (s for s in data.get("streams", []) if s.get("codec_type") == "audio"), None
+    )
+    info = {
+        "duration": _to_float(fmt.get("duration")),
+        "start_time": _to_float(fmt.get("start_time")) or 0.0,
+        "format": fmt.get("format_name"),
+        "bitrate": _to_int(fmt.get("bit_rate")),
+        "video": None,
+        "audio": None,
+        "keyframes": None,  # 关键帧索引按需读取，见 get_keyframes
+    }
+    if video is not None:
+        info["video"] = {
+            "codec": video.get("codec_name"),
+            "width": video.get("width"),
+            "height": video.get("height"),
+            "fps": _parse_rate(video.get("avg_frame_rate")),
+            "bitrate": _to_int(video.get("bit_rate")),
+            "pix_fmt": video.get("pix_fmt"),
+            "profile": video.get("profile"),
+            "level": _to_int(video.get("level")),
+        }
+    if audio is not None:
+        info["audio"] = {
+            "codec": audio.get("codec_name"),
+            "sample_rate": _to_int(audio.get("sample_rate")),
+            "channels": audio.get("channels"),
+        }
+    return info
+
+
+def probe_media(video_path: str, use_cache: bool = True) -> Dict:
+    """
+    读取媒体文件信息（时长、编码、分辨率、码率、是否有音频）
+
+    Args:
+        video_path: 媒体文件路径
+        use_cache: 是否使用进程内缓存（临时文件传False）
+
+    Returns:
+        信息字典：duration/start_time/format/bitrate/video/audio/keyframes，
+        没有视频流或音频流时对应项为None
+    """
+    if not use_cache:
+        return _probe(video_path)
+
+    key = _cache_key(video_path)
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    info = _probe(video_path)
+    with _lock:
+        info = _cache.setdefault(key, info)
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return info
+
+
+def record_keyframes(video_path: str, keyframes: List[float]):
+    """记录已知的关键帧索引（例如提取音频时顺带得到的），供后续阶段复用"""
+    probe_media(video_path)["keyframes"] = list(keyframes)
+
+
+def get_keyframes(video_path: str) -> List[float]:
+    """
+    视频流的关键帧时间（相对文件起点，与ffmpeg -ss 的时间一致）
+
+    已有记录时直接返回，否则用ffprobe读取数据包标志（不解码）。
+
+    Returns:
+        升序排列的关键帧时间（秒）
+    """
+    info = probe_media(video_path)
+    if info["keyframes"] is not None:
+        return info["keyframes"]
+
+    output = _ffprobe(
+        video_path,
+        "-select_streams",
+        "v:0",
+        "-show_entries",
+        "packet=pts_time,flags",
+        "-of",
+        "csv=p=0",
+    )
+    keyframes = []
+    for line in output.splitlines():
+        pts_time, _, flags = line.partition(",")
+        if "K" in flags and pts_time not in ("", "N/A"):
+            keyframes.append(float(pts_time) - info["start_time"])
+    info["keyframes"] = sorted(keyframes)
+    return info["keyframes"]
+
+
+def parse_framecrc_keyframes(lines) -> List[float]:
+    """
+    从ffmpeg framecrc输出中解析关键帧时间
+
+    framecrc每个数据包一行（流序号, dts, pts, 时长, 大小, 校验和[, F=标志]），
+    时间单位由 "#tb 0: 1/12800" 头部给出；只有关键帧标志时省略F字段。
+
+    Returns:
+        升序排列的关键帧时间（秒）
+    """
+    time_base = None
+    keyframes = []
+    for line in lines:
+        line = line.strip()
+        if line.startswith("#tb 0:"):
+            num, _, den = line.split(":", 1)[1].strip().partition("/")
+            time_base = int(num) / int(den)
+            continue
+        if not line or line.startswith("#") or time_base is None:
+            continue
+        fields = [field.strip() for field in line.split(",")]
+        flags = next((f[2:] for f in fields[6:] if f.startswith("F=")), None)
+        if flags is not None and not int(flags, 16) & 1:
+            continue
+        pts = int(fields[2])
+        if pts == _NOPTS_VALUE:
+            pts = int(fields[1])
+        keyframes.append(pts * time_base)
+    return sorted(keyframes)
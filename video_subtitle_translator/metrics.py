@@ -0,0 +1,201 @@
+"""
+Per-job stage timing, throughput and resource instrumentation
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from .config import METRICS_PATH, PROMETHEUS_PATH
+
+try:
+    import resource
+except ImportError:  # Windows没有resource模块，不统计内存峰值
+    resource = None
+
+
+# 批量模式和常驻服务中多个任务可能同时结束，写出指标文件时串行进行
+_write_lock = threading.Lock()
+
+# Prometheus指标说明，未列出的数值字段使用通用说明
+_PROMETHEUS_HELP = {
+    "seconds": "Wall time of each stage of the last job.",
+    "process_peak_rss_mb": (
+        "Peak RSS of this process since it started, read at the end of each stage."
+    ),
+    "process_peak_child_rss_mb": (
+        "Largest peak RSS of any finished child process (ffmpeg etc.) "
+        "since this process started, read at the end of each stage."
+    ),
+}
+
+
+def peak_rss_mb() -> Dict[str, Optional[float]]:
+    """
+    本进程与子进程（ffmpeg等）的内存峰值（MB）
+
+    ru_maxrss 是整个进程生命周期的最高值，不会随阶段或任务重置：批量模式和
+    常驻服务中包含此前任务的占用，只能看出读取时刻为止的进程级峰值。
+
+    Returns:
+        {"self": ..., "children": ...}，平台不支持时为None
+    """
+    if resource is None:
+        return {"self": None, "children": None}
+    # Linux上ru_maxrss单位为KB，macOS上为字节
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale,
+    }
+
+
+class JobMetrics:
+    """单个任务的各阶段耗时与吞吐指标，任务结束时写出为JSON行（可选Prometheus文本文件）"""
+
+    def __init__(
+        self,
+        video_path: str,
+        metrics_path: str = None,
+        prometheus_path: str = None,
+    ):
+        """
+        Args:
+            video_path: 输入视频路径
+            metrics_path: JSON行输出文件（追加写入），默认 METRICS_PATH，空字符串表示不写
+            prometheus_path: Prometheus文本文件（覆盖写入），默认 PROMETHEUS_PATH
+        """
+        self.job_id = uuid.uuid4().hex[:12]
+        self.video_path = str(video_path)
+        self.metrics_path = METRICS_PATH if metrics_path is None else metrics_path
+        self.prometheus_path = (
+            PROMETHEUS_PATH if prometheus_path is None else prometheus_path
+        )
+        self.stages: List[Dict] = []
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str, **fields) -> Iterator[Dict]:
+        """
+        记录一个阶段的耗时，with块内可向返回的字典补充指标
+
+        示例:
+            with metrics.stage("transcribe") as m:
+                m["segments"] = len(segments)
+        """
+        record = {"stage": name, **fields}
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = round(time.perf_counter() - start, 4)
+            # 进程级峰值（见 peak_rss_mb），阶段之间的增量才与本阶段有关
+            rss = peak_rss_mb()
+            record["process_peak_rss_mb"] = rss["self"]
+            record["process_peak_child_rss_mb"] = rss["children"]
+            with self._lock:
+                self.stages.append(record)
+
+    def add_stage(self, name: str, seconds: float, **fields):
+        """记录在别处计时的阶段（如识别过程中顺带完成的模型加载）"""
+        with self._lock:
+            self.stages.append({"stage": name, "seconds": round(seconds, 4), **fields})
+
+    def finish(self, status: str = "done", **fields) -> Dict:
+        """
+        任务结束：追加写出各阶段及汇总的JSON行，并更新Prometheus文本文件
+
+        写出失败只打印警告，不影响任务本身的结果。
+
+        Args:
+            status: 任务状态（done/failed）
+            fields: 汇总行中的附加字段
+
+        Returns:
+            汇总记录
+        """
+        summary = {
+            "stage": "job",
+            "status": status,
+            "seconds": round(time.time() - self.started, 4),
+            **fields,
+        }
+        rss = peak_rss_mb()
+        summary["process_peak_rss_mb"] = rss["self"]
+        summary["process_peak_child_rss_mb"] = rss["children"]
+        with self._lock:
+            records = self.stages + [summary]
+
+        try:
+            with _write_lock:
+                if self.metrics_path:
+                    self._write_jsonl(records)
+                if self.prometheus_path:
+                    self._write_prometheus(records)
+        except OSError as e:
+            print(f"⚠️  写出运行指标失败: {e}")
+        return summary
+
+    def _write_jsonl(self, records: List[Dict]):
+        """追加写出各阶段及汇总的JSON行"""
+        common = {"job": self.job_id, "video": self.video_path, "ts": self.started}
+        lines = "".join(
+            json.dumps({**common, **record}, ensure_ascii=False) + "\n"
+            for record in records
+        )
+        Path(self.metrics_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(self.metrics_path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+    def _write_prometheus(self, records: List[Dict]):
+        """以node_exporter文本文件格式写出最近一个任务的指标（原子替换）"""
+        # 同一指标的所有样本须连续出现在其HELP/TYPE之后，先按字段归组
+        families: Dict[str, List[str]] = {"seconds": []}
+        for record in records:
+            for key, value in record.items():
+                if key == "stage" or isinstance(value, bool):
+                    continue
+                if isinstance(value, (int, float)):
+                    families.setdefault(key, []).append(
+                        f'videocut_stage_{key}{{stage="{record["stage"]}"}} {value}'
+                    )
+
+        lines = []
+        for key, samples in families.items():
+            help_text = _PROMETHEUS_HELP.get(key, f"Per-stage {key} of the last job.")
+            lines.append(f"# HELP videocut_stage_{key} {help_text}")
+            lines.append(f"# TYPE videocut_stage_{key} gauge")
+            lines.extend(samples)
+        lines.append(
+            "# HELP videocut_last_job_timestamp_seconds "
+            "Unix time when the last job finished."
+        )
+        lines.append("# TYPE videocut_last_job_timestamp_seconds gauge")
+        lines.append(f"videocut_last_job_timestamp_seconds {time.time():.0f}")
+
+        path = Path(self.prometheus_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # 临时文件名唯一（另一个进程可能同时写同一路径），且不以.prom结尾，
+        # 避免textfile collector读到写了一半的文件
+        with tempfile.NamedTemporaryFile(
+            "w",
+            encoding="utf-8",
+            dir=path.parent,
+            prefix=path.name + ".",
+            suffix=".tmp",
+            delete=False,
+        ) as f:
+            f.write("\n".join(lines) + "\n")
+        try:
+            os.replace(f.name, path)
+        except OSError:
+            os.unlink(f.name)
+            raise
@@ -0,0 +1,265 @@
+"""
+Parallel burn-in: split at keyframes, encode chunks concurrently, concat
+"""
+
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .config import PARALLEL_BURN_CHUNKS
+from .encoding import resolve_profile, video_encode_args
+from .media_info import get_keyframes, probe_media
+from .smart_render import run_ffmpeg, write_srt_slice
+from .subtitle_parser import parse_srt, parse_table
+
+# 字幕时间校验的容差（秒）：SRT精度为1ms，写入时再取整一次
+TIMING_TOLERANCE = 0.002
+# 拼接后各分界点处画面相对字幕的累计偏差上限（秒），约为30fps下的1.5帧
+DRIFT_TOLERANCE = 0.05
+
+
+def plan_chunk_boundaries(
+    keyframes: List[float], duration: float, chunks: int
+) -> List[float]:
+    """
+    按时长均分并对齐到最近的关键帧，得到各块的分界点
+
+    Args:
+        keyframes: 升序关键帧时间
+        duration: 视频时长
+        chunks: 目标块数
+
+    Returns:
+        分界点列表，首项为0、末项为duration（关键帧稀疏时块数可能少于目标）
+    """
+    candidates = [k for k in keyframes if 0 < k < duration]
+    boundaries = [0.0]
+    for i in range(1, chunks):
+        target = duration * i / chunks
+        if not candidates:
+            break
+        nearest = min(candidates, key=lambda k: abs(k - target))
+        if nearest > boundaries[-1]:
+            boundaries.append(nearest)
+    boundaries.append(duration)
+    return boundaries
+
+
+def verify_chunk_timing(
+    cues: List[Dict], slices: List[List[Dict]], boundaries: List[float]
+):
+    """
+    校验各块字幕平移回原时间轴后与原字幕一致（跨块的字幕被切成两段，需能首尾相接）
+
+    Args:
+        cues: 原字幕片段（start/end/text）
+        slices: 各块读回的字幕片段（时间相对块起点）
+        boundaries: 分界点
+
+    Raises:
+        RuntimeError: 时间或文本不一致
+    """
+    # 跨越分界点的字幕（分界点, 文本），只有这些字幕应在分界点处接上
+    spanning = {
+        (boundary, cue["text"])
+        for boundary in boundaries[1:-1]
+        for cue in cues
+        if cue["start"] < boundary < cue["end"]
+    }
+    restored = []
+    # 在分界点处被截断、等待下一块接上的字幕：(分界点, 文本) -> 字幕列表
+    open_pieces: Dict[tuple, List[Dict]] = {}
+    for chunk_start, chunk_end, chunk_cues in zip(
+        boundaries, boundaries[1:], slices
+    ):
+        for cue in chunk_cues:
+            piece = {
+                "start": cue["start"] + chunk_start,
+                "end": cue["end"] + chunk_start,
+                "text": cue["text"],
+            }
+            # 上一块末尾被截断的同一条字幕，从分界点接上（同一分界点可能有多条
+            # 字幕同时被截断，块内顺序也不一定一致，按分界点和文本匹配）
+            waiting = open_pieces.get((chunk_start, piece["text"]))
+            if waiting and abs(piece["start"] - chunk_start) <= TIMING_TOLERANCE:
+                previous = waiting.pop(0)
+                previous["end"] = piece["end"]
+                piece = previous
+            else:
+                restored.append(piece)
+            # 在本块末尾被截断的跨块字幕，等待下一块接上
+            key = (chunk_end, piece["text"])
+            if key in spanning and abs(piece["end"] - chunk_end) <= TIMING_TOLERANCE:
+                open_pieces.setdefault(key, []).append(piece)
+
+    # 超出视频范围的部分不会写入任何切片，按视频范围截取后再比较
+    start, end = boundaries[0], boundaries[-1]
+    expected = sorted(
+        (
+            {
+                "start": max(c["start"], start),
+                "end": min(c["end"], end),
+                "text": c["text"],
+            }
+            for c in cues
+            if min(c["end"], end) > max(c["start"], start)
+        ),
+        key=lambda c: (c["start"], c["end"], c["text"]),
+    )
+    restored.sort(key=lambda c: (c["start"], c["end"], c["text"]))
+    if len(restored) != len(expected):
+        raise RuntimeError(
+            f"Chunk subtitle check failed: {len(expected)} cues, "
+            f"{len(restored)} after splitting"
+        )
+    for original, piece in zip(expected, restored):
+        if (
+            original["text"] != piece["text"]
+            or abs(original["start"] - piece["start"]) > TIMING_TOLERANCE
+            or abs(original["end"] - piece["end"]) > TIMING_TOLERANCE
+        ):
+            raise RuntimeError(
+                f"Chunk subtitle check failed at {original['start']:.3f}s: "
+                f"expected {original['start']:.3f}-{original['end']:.3f}, "
+                f"got {piece['start']:.3f}-{piece['end']:.3f}"
+            )
+
+
+def merge_parallel_chunks(
+    video_path: str,
+    srt_path: str,
+    output_path: Optional[str] = None,
+    encoding: Optional[Dict] = None,
+    chunks: int = None,
+) -> str:
+    """
+    并行分块烧录：在关键帧处切成若干块，各块烧录平移后的字幕切片并同时编码，
+    最后用concat无损拼接，音频从源视频整体复制一次
+
+    Args:
+        video_path: 输入视频路径
+        srt_path: SRT字幕路径
+        output_path: 输出视频路径，默认在原视频名后加 "_translated"
+        encoding: 视频编码配置（见 encoding.resolve_profile）
+        chunks: 块数（同时进行的ffmpeg进程数），0或None为按CPU核数自动
+
+    Returns:
+        输出视频路径
+    """
+    video_path = Path(video_path)
+    if output_path is None:
+        output_path = (
+            video_path.parent / f"{video_path.stem}_translated{video_path.suffix}"
+        )
+    else:
+        output_path = Path(output_path)
+
+    chunks = PARALLEL_BURN_CHUNKS if chunks is None else chunks
+    if chunks <= 0:
+        # 单个x264进程大约用满8个核，更多核拆成更多块
+        chunks = max(2, (os.cpu_count() or 1) // 8)
+
+    print(f"Using parallel chunked burn-in...")
+    print(f"Input: {video_path}")
+    print(f"Subtitle: {srt_path}")
+    print(f"Output: {output_path}")
+
+    source = str(video_path.resolve())
+    duration = probe_media(source)["duration"]
+    boundaries = plan_chunk_boundaries(get_keyframes(source), duration, chunks)
+    ranges = list(zip(boundaries[:-1], boundaries[1:]))
+    print(f"Encoding {len(ranges)} chunks in parallel")
+
+    # 各进程平分CPU，避免每个编码器都按全部核数开线程
+    encoding = dict(encoding or resolve_profile())
+    if not encoding.get("threads"):
+        encoding["threads"] = max(1, (os.cpu_count() or 1) // len(ranges))
+    encode_args = video_encode_args(encoding, source)
+
+    cues = parse_table(srt_path)
+    work_dir = Path(
+        tempfile.mkdtemp(prefix="parallel_burn_", dir=Path(srt_path).parent)
+    )
+    try:
+        slice_names = []
+        for index, (start, end) in enumerate(ranges):
+            slice_names.append(f"chunk{index:04d}.srt")
+            write_srt_slice(cues, start, end, str(work_dir / slice_names[-1]))
+        # 读回实际写出的切片，确认跨块字幕的时间没有被截错或平移错
+        slices = [parse_srt(str(work_dir / name)) for name in slice_names]
+        verify_chunk_timing(cues, slices, boundaries)
+
+        def encode(index: int) -> str:
+            start, end = ranges[index]
+            part = f"chunk{index:04d}.ts"
+            run_ffmpeg(
+                [
+                    "ffmpeg",
+                    "-y",
+                    "-ss",
+                    f"{start:.6f}",  # 重新编码时输入定位是逐帧精确的
+                    "-i",
+                    source,
+                    "-t",
+                    f"{end - start:.6f}",
+                    "-map",
+                    "0:v:0",
+                    "-vf",
+                    f"subtitles='{slice_names[index]}'",
+                    *encode_args,
+                    "-an",
+                    part,
+                ],
+                cwd=work_dir,
+            )
+            return part
+
+        # 编码在ffmpeg子进程中进行，线程池只负责调度
+        with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+            parts = list(executor.map(encode, range(len(ranges))))
+
+        # 拼接后每块的起点是前面各块实际时长之和，单块的误差会逐块累积，
+        # 按累计时长与各分界点比较
+        offset = boundaries[0]
+        for part, (start, end) in zip(parts, ranges):
+            offset += probe_media(str(work_dir / part), use_cache=False)["duration"]
+            if abs(offset - end) > DRIFT_TOLERANCE:
+                raise RuntimeError(
+                    f"Chunks up to {part} add up to {offset:.3f}s, expected "
+                    f"{end:.3f}s; subtitle timing after concat would drift"
+                )
+
+        list_path = work_dir / "chunks.txt"
+        list_path.write_text(
+            "".join(f"file '{p}'\n" for p in parts), encoding="utf-8"
+        )
+        run_ffmpeg(
+            [
+                "ffmpeg",
+                "-y",
+                "-f",
+                "concat",
+                "-safe",
+                "0",
+                "-i",
+                list_path.name,
+                "-i",
+                source,
+                "-map",
+                "0:v",
+                "-map",
+                "1:a?",
+                "-c",
+                "copy",
+                str(output_path.resolve()),
+            ],
+            cwd=work_dir,
+        )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"Success! Output: {output_path}")
+    return str(output_path)
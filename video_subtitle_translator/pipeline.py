@@ -0,0 +1,406 @@
+"""
+Processing stages for a single video job
+"""
+
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from .audio_extractor import (
+    extract_audio,
+    extract_audio_array,
+    extract_audio_with_keyframes,
+)
+from .checkpoint import JobCheckpoint, file_fingerprint
+from .config import (
+    DEFAULT_MERGE_MODE,
+    OLLAMA_MODEL,
+    SIDECAR_FORMATS,
+    TEMP_DIR,
+    WHISPER_MODEL_SIZE,
+)
+from .media_info import probe_media
+from .metrics import JobMetrics
+from .subtitle_generator import write_subtitles
+from .subtitle_parser import parse_srt
+from .transcriber import Transcriber
+from .translator import PROMPT_VERSION, Translator
+
+
+def _banner(title: str, leading_newline: bool = True):
+    """打印阶段标题"""
+    print(("\n" if leading_newline else "") + "=" * 60)
+    print(title)
+    print("=" * 60)
+
+
+class VideoJob:
+    """单个视频的处理任务，各阶段可以单独调度（供单文件与批量模式共用）"""
+
+    def __init__(
+        self,
+        video_path: str,
+        output_path: Optional[str] = None,
+        subtitle_path: Optional[str] = None,
+        model_size: str = None,
+        language: str = "en",
+        keep_srt: bool = False,
+        resume: bool = True,
+        in_memory_audio: bool = False,
+        encoding: Optional[Dict] = None,
+        merge_mode: str = None,
+        metrics_path: str = None,
+        prometheus_path: str = None,
+        sidecar_formats: Optional[Sequence[str]] = None,
+    ):
+        """
+        Args:
+            video_path: 输入视频路径
+            output_path: 输出视频路径
+            subtitle_path: 字幕文件路径（可选）
+            model_size: Whisper模型大小
+            language: 视频语言
+            keep_srt: 是否保留字幕文件（格式见 sidecar_formats）
+            resume: 是否从已有检查点继续，False则丢弃检查点重新处理
+            in_memory_audio: 音频经管道解码到内存直接交给Whisper，不写临时WAV文件
+            encoding: 烧录时的视频编码配置（见 encoding.resolve_profile）
+            merge_mode: 字幕合成方式（见 config.MERGE_MODES）
+            metrics_path: 运行指标JSON行文件，默认 config.METRICS_PATH
+            prometheus_path: Prometheus文本文件，默认 config.PROMETHEUS_PATH
+            sidecar_formats: 保留到 temp/ 的字幕格式（见 config.SUBTITLE_FORMATS），
+                指定后即保留；默认 keep_srt 时为 config.SIDECAR_FORMATS
+        """
+        self.video_path = Path(video_path)
+        self.output_path = output_path
+        self.subtitle_path = subtitle_path
+        self.model_size = model_size or WHISPER_MODEL_SIZE
+        self.language = language
+        if sidecar_formats is None:
+            sidecar_formats = SIDECAR_FORMATS if keep_srt else ()
+        self.sidecar_formats = tuple(dict.fromkeys(sidecar_formats))
+        self.keep_srt = bool(self.sidecar_formats)
+        self.in_memory_audio = in_memory_audio
+        self.encoding = encoding
+        self.merge_mode = merge_mode or DEFAULT_MERGE_MODE
+        if self.merge_mode == "mux" and output_path:
+            self.output_path = self._mux_output_path(output_path)
+        self.segments: Optional[List[Dict]] = None
+        self.output_video: Optional[str] = None
+        self.translated = 0  # 已完成翻译的片段数（供进度查询）
+        self.error: Optional[str] = None  # load_segments 未得到片段时的原因
+        self.metrics = JobMetrics(str(self.video_path), metrics_path, prometheus_path)
+
+        # 检查点按 视频内容 + 影响中间结果的参数 定位
+        self.checkpoint = JobCheckpoint(
+            str(self.video_path),
+            {
+                "subtitle": file_fingerprint(subtitle_path) if subtitle_path else None,
+                "model_size": self.model_size,
+                "language": language,
+                "ollama_model": OLLAMA_MODEL,
+            },
+        )
+        if not resume:
+            self.checkpoint.reset()
+
+    def _step(self, number: int) -> str:
+        """步骤编号，读取已有字幕时共3步，否则共5步"""
+        if self.subtitle_path:
+            return f"{number - 1}/3"
+        return f"{number}/5"
+
+    def _check_translation_settings(self, translator: Translator):
+        """影响译文的设置变化后，丢弃检查点中按旧设置得到的译文"""
+        settings = {
+            "prompt_version": PROMPT_VERSION,
+            "batch_size": translator.batch_size,
+            "context_lines": translator.context_lines,
+        }
+        if self.checkpoint.check_translation_settings(settings):
+            print("⚠️  翻译设置已改变，丢弃检查点中的旧译文")
+
+    def _record_translation(self, index: int, segment: Dict):
+        self.translated += 1
+        # 翻译失败时译文为原文，带失败标记写入检查点，下次运行会重新翻译；
+        # 与原文相同的正常译文照常记录，续跑时不再请求
+        self.checkpoint.record_translation(
+            index, segment["translation"], segment.get("translation_failed", False)
+        )
+
+    def load_segments(
+        self,
+        transcriber: Optional[Transcriber] = None,
+        translator: Optional[Translator] = None,
+        stream: bool = False,
+    ) -> bool:
+        """
+        步骤1-2：从检查点恢复、读取字幕文件或语音识别
+
+        Args:
+            transcriber: 语音识别器（读取字幕文件时不需要）
+            translator: 流式模式下边识别边翻译所用的翻译器
+            stream: 流式模式，语音识别与翻译同时进行
+
+        Returns:
+            是否得到了字幕片段，未得到时原因记录在 self.error
+        """
+        checkpoint = self.checkpoint
+        segments = checkpoint.load_transcript()
+        if segments is not None:
+            _banner(f"✓ 从检查点恢复识别结果：{len(segments)} 个字幕片段", False)
+        elif self.subtitle_path:
+            _banner("步骤 1/3: 读取英文字幕文件...", False)
+            with self.metrics.stage("parse_subtitles") as m:
+                segments = parse_srt(self.subtitle_path)
+                m["cues"] = len(segments)
+            if not segments:
+                print(f"❌ 警告：无法解析字幕文件: {self.subtitle_path}")
+                self.error = f"无法解析字幕文件: {self.subtitle_path}"
+                return False
+            print(f"✓ 成功读取 {len(segments)} 个字幕片段")
+            checkpoint.save_transcript(segments)
+        else:
+            _banner("步骤 1/5: 提取音频...", False)
+            info = probe_media(str(self.video_path))
+            if info["audio"] is None:
+                print("❌ 错误：视频中没有音轨，无法进行语音识别（可用 -s 提供字幕文件）")
+                self.error = "视频中没有音轨，无法提取音频"
+                return False
+            audio_seconds = info["duration"]
+
+            # 智能渲染/并行烧录需要关键帧索引，在提取音频的同一次解复用中顺带取得
+            with_keyframes = self.merge_mode in ("smart", "parallel")
+            with self.metrics.stage("extract_audio", audio_seconds=audio_seconds) as m:
+                if self.in_memory_audio:
+                    # 解码结果直接留在内存中交给Whisper，不写临时WAV
+                    if with_keyframes:
+                        audio, _ = extract_audio_with_keyframes(str(self.video_path))
+                    else:
+                        audio = extract_audio_array(str(self.video_path))
+                elif checkpoint.has_audio():
+                    print(f"✓ 使用检查点中的音频: {checkpoint.audio_path}")
+                    audio = str(checkpoint.audio_path)
+                    m["cached"] = True
+                else:
+                    if with_keyframes:
+                        extract_audio_with_keyframes(
+                            str(self.video_path), str(checkpoint.audio_tmp_path)
+                        )
+                    else:
+                        extract_audio(
+                            str(self.video_path), str(checkpoint.audio_tmp_path)
+                        )
+                    checkpoint.commit_audio()
+                    audio = str(checkpoint.audio_path)
+
+            # 模型在首次识别时才加载，加载耗时单独记录，不计入识别速度
+            model_loaded = transcriber.model is not None
+            if stream and translator is not None:
+                # 识别与翻译同时进行；转录尚未保存时，旧的逐条译文序号不可靠，先丢弃
+                _banner("步骤 2-3/5: 语音识别（Whisper）+ 翻译（Ollama），流式进行...")
+                checkpoint.discard_translations()
+                self._check_translation_settings(translator)
+                before = translator.stats_snapshot()
+                with self.metrics.stage("transcribe_translate") as m:
+                    segments = translator.translate_stream(
+                        transcriber.iter_segments(audio, language=self.language),
+                        on_translated=self._record_translation,
+                    )
+            else:
+                _banner("步骤 2/5: 语音识别（Whisper）...")
+                with self.metrics.stage("transcribe") as m:
+                    segments = transcriber.transcribe(audio, language=self.language)
+            if not model_loaded and transcriber.load_seconds is not None:
+                self.metrics.add_stage("load_model", transcriber.load_seconds)
+                m["seconds"] = round(m["seconds"] - transcriber.load_seconds, 4)
+            m["segments"] = len(segments)
+            if audio_seconds and m["seconds"] > 0:
+                # 实时率：识别耗时 / 音频时长，小于1表示快于实时
+                m["real_time_factor"] = round(m["seconds"] / audio_seconds, 4)
+            if stream and translator is not None:
+                self._record_translation_metrics(
+                    m, translator, before, segments, audio_seconds
+                )
+            if not segments:
+                print("❌ 警告：未识别到任何语音内容")
+                self.error = "未识别到任何语音内容"
+                return False
+            checkpoint.save_transcript(segments)
+
+        self.segments = segments
+        return True
+
+    def translate(self, translator: Translator):
+        """步骤3：翻译尚未翻译的片段（已记录在检查点中的译文直接复用）"""
+        segments = self.segments
+        self._check_translation_settings(translator)
+        for index, translation in self.checkpoint.load_translations().items():
+            if index < len(segments):
+                segments[index]["translation"] = translation
+        pending = [i for i, s in enumerate(segments) if "translation" not in s]
+        self.translated = len(segments) - len(pending)
+        if not pending:
+            return
+
+        _banner(f"步骤 {self._step(3)}: 翻译中文字幕（Ollama）...")
+        if len(pending) < len(segments):
+            print(f"✓ 从检查点恢复 {len(segments) - len(pending)} 条译文")
+        before = translator.stats_snapshot()
+        with self.metrics.stage("translate") as m:
+            translator.translate_segments(
+                [segments[i] for i in pending],
+                on_translated=lambda i, segment: self._record_translation(
+                    pending[i], segment
+                ),
+            )
+        self._record_translation_metrics(
+            m, translator, before, pending, probe_media(str(self.video_path))["duration"]
+        )
+
+    @staticmethod
+    def _record_translation_metrics(
+        record: Dict,
+        translator: Translator,
+        before: Dict,
+        segments: List,
+        video_seconds: Optional[float] = None,
+    ):
+        """
+        补充翻译吞吐指标（翻译器被多个任务共用时，计数包含同期其他任务的请求）
+
+        video_seconds 为视频时长，提供时另记每分钟视频的请求数与token数，
+        用于比较逐句、批量与上下文窗口各翻译方式的开销。
+        """
+        after = translator.stats_snapshot()
+        seconds = record["seconds"]
+        record["segments"] = len(segments)
+        for key in ("requests", "prompt_tokens", "completion_tokens", "deduplicated"):
+            record[key] = after[key] - before[key]
+        if segments:
+            # 去重比例：重复片段复用译文、没有单独请求的比例
+            record["dedup_ratio"] = round(record["deduplicated"] / len(segments), 4)
+        if seconds > 0:
+            record["segments_per_second"] = round(len(segments) / seconds, 3)
+            record["tokens_per_second"] = round(record["completion_tokens"] / seconds, 2)
+        # 流式请求：首token平均耗时、生成速度、得到完整译文后提前断开的请求数
+        record.update(translator.stream_summary(before))
+        if video_seconds:
+            minutes = video_seconds / 60
+            tokens = record["prompt_tokens"] + record["completion_tokens"]
+            record["requests_per_minute"] = round(record["requests"] / minutes, 2)
+            record["tokens_per_minute"] = round(tokens / minutes, 1)
+
+    def generate_subtitles(self):
+        """步骤4：生成字幕文件"""
+        checkpoint = self.checkpoint
+        _banner(f"步骤 {self._step(4)}: 生成字幕文件...")
+        formats = checkpoint.missing_subtitles(self.subtitle_formats())
+        if not formats:
+            print("✓ 使用检查点中的字幕文件")
+            return
+
+        outputs = {
+            fmt: str(checkpoint.subtitle_tmp_path(checkpoint.subtitle_path(fmt)))
+            for fmt in formats
+        }
+        with self.metrics.stage(
+            "generate_subtitles", cues=len(self.segments), formats=",".join(formats)
+        ):
+            # 一次遍历同时写出所需的各个格式
+            write_subtitles(self.segments, outputs)
+        checkpoint.commit_subtitles(formats)
+        print(f"✓ 已生成字幕: {', '.join(f.upper() for f in formats)}")
+
+    def subtitle_formats(self) -> List[str]:
+        """
+        本任务需要生成的字幕格式：合成方式实际读取的格式，加上要保留的格式
+
+        烧录（burn/smart/parallel）读取SRT；mux封装到MKV时用ASS，其余容器用SRT。
+        """
+        if self.merge_mode == "mux" and self._mux_container() == ".mkv":
+            needed = ["ass"]
+        else:
+            needed = ["srt"]
+        return list(dict.fromkeys(needed + list(self.sidecar_formats)))
+
+    def merge(self) -> str:
+        """步骤5：烧录字幕到视频（mux模式下封装为字幕轨）"""
+        if self.merge_mode == "mux":
+            return self._mux()
+
+        _banner("烧录字幕到视频...")
+        if self.encoding:
+            print(f"编码配置: {self.encoding['name']}")
+        if self.merge_mode == "smart":
+            from .smart_render import merge_smart_render as merge
+        elif self.merge_mode == "parallel":
+            from .parallel_burn import merge_parallel_chunks as merge
+        else:
+            from .video_merger_alt import merge_with_drawtext as merge
+
+        with self.metrics.stage(
+            "merge",
+            merge_mode=self.merge_mode,
+            encoding=self.encoding["name"] if self.encoding else None,
+        ) as m:
+            self.output_video = merge(
+                str(self.video_path),
+                str(self.checkpoint.subtitle_path("srt")),
+                self.output_path,
+                encoding=self.encoding,
+            )
+        video = probe_media(str(self.video_path))["video"]
+        if video and video["fps"] and m["seconds"] > 0:
+            duration = probe_media(str(self.video_path))["duration"] or 0
+            # 编码速度按源视频帧数计算（智能渲染中复制的部分同样计入）
+            m["encode_fps"] = round(duration * video["fps"] / m["seconds"], 2)
+        return self.output_video
+
+    def _mux_container(self) -> str:
+        """mux模式的输出容器（不支持字幕轨的容器改为MKV）"""
+        from .video_merger import SOFT_SUBTITLE_CODECS
+
+        container = Path(self.output_path or self.video_path).suffix.lower()
+        if container not in SOFT_SUBTITLE_CODECS:
+            container = ".mkv"
+        return container
+
+    @staticmethod
+    def _mux_output_path(output_path: str) -> str:
+        """指定的输出容器不支持字幕轨时，改用同名的MKV文件"""
+        from .video_merger import SOFT_SUBTITLE_CODECS
+
+        path = Path(output_path)
+        if path.suffix.lower() in SOFT_SUBTITLE_CODECS:
+            return output_path
+        mkv_path = str(path.with_suffix(".mkv"))
+        print(f"⚠️  {path.suffix or '无扩展名'} 容器不支持字幕轨，输出改为: {mkv_path}")
+        return mkv_path
+
+    def _mux(self) -> str:
+        """音视频直接复制，字幕作为独立字幕轨封装"""
+        _banner("封装字幕轨到视频（不重新编码）...")
+        from .video_merger import mux_subtitle_track
+
+        # MKV原生支持ASS样式；mov_text/webvtt只保留文字，用SRT即可
+        subtitle = self.checkpoint.subtitle_path(
+            "ass" if self._mux_container() == ".mkv" else "srt"
+        )
+        with self.metrics.stage("merge", merge_mode="mux"):
+            self.output_video = mux_subtitle_track(
+                str(self.video_path), str(subtitle), self.output_path
+            )
+        return self.output_video
+
+    def finish(self):
+        """保留需要的字幕文件，并清理整个检查点目录"""
+        checkpoint = self.checkpoint
+        if self.sidecar_formats:
+            print(f"\n保留的字幕文件:")
+            for fmt in self.sidecar_formats:
+                path = Path(TEMP_DIR) / f"{self.video_path.stem}_bilingual.{fmt}"
+                shutil.copyfile(checkpoint.subtitle_path(fmt), path)
+                print(f"  - {fmt.upper()}: {path}")
+        print("\n清理临时文件...")
+        checkpoint.clear()
+        self.metrics.finish("done", output=self.output_video)
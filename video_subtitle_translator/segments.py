@@ -0,0 +1,155 @@
+"""
+Columnar subtitle segment table
+"""
+
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+Segments = Union["SegmentTable", Sequence[Dict]]
+
+
+class SegmentTable:
+    """
+    列式存储的字幕片段：start/end 为float64数组，text/translation 为字符串列表
+
+    可以当作片段字典列表使用（len、下标、迭代返回与原来相同的字典），
+    接收 List[Dict] 的现有函数无需修改即可接受；时间运算按列整体进行。
+    迭代得到的字典是副本，修改它们不会写回表中。
+    """
+
+    __slots__ = ("start", "end", "text", "translation")
+
+    def __init__(
+        self,
+        start: Iterable[float] = (),
+        end: Iterable[float] = (),
+        text: Iterable[str] = (),
+        translation: Optional[Iterable[Optional[str]]] = None,
+    ):
+        """
+        Args:
+            start: 起点列（秒）
+            end: 终点列（秒）
+            text: 原文列
+            translation: 译文列，None表示都没有译文
+        """
+        self.start = np.asarray(start, dtype=np.float64)
+        self.end = np.asarray(end, dtype=np.float64)
+        self.text = list(text)
+        self.translation = (
+            [None] * len(self.text) if translation is None else list(translation)
+        )
+        if not (
+            len(self.start) == len(self.end) == len(self.text) == len(self.translation)
+        ):
+            raise ValueError("SegmentTable columns must have the same length")
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[Dict]) -> "SegmentTable":
+        """
+        由片段字典构建（一次遍历，可直接接收字幕解析的迭代器）
+
+        已经是 SegmentTable 时原样返回。
+        """
+        if isinstance(segments, cls):
+            return segments
+        start, end = array("d"), array("d")
+        text, translation = [], []
+        for segment in segments:
+            start.append(segment["start"])
+            end.append(segment["end"])
+            text.append(segment.get("text", ""))
+            translation.append(segment.get("translation"))
+        return cls(
+            np.frombuffer(start, dtype=np.float64) if start else (),
+            np.frombuffer(end, dtype=np.float64) if end else (),
+            text,
+            translation,
+        )
+
+    def to_segments(self) -> List[Dict]:
+        """转换为片段字典列表"""
+        return list(self)
+
+    # ---- 与 List[Dict] 兼容的接口 ----
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def __iter__(self) -> Iterator[Dict]:
+        for start, end, text, translation in zip(
+            self.start.tolist(), self.end.tolist(), self.text, self.translation
+        ):
+            segment = {"start": start, "end": end, "text": text}
+            if translation is not None:
+                segment["translation"] = translation
+            yield segment
+
+    def __getitem__(self, index):
+        """整数下标返回片段字典；切片、布尔掩码或下标数组返回新表"""
+        if isinstance(index, (int, np.integer)):
+            segment = {
+                "start": float(self.start[index]),
+                "end": float(self.end[index]),
+                "text": self.text[index],
+            }
+            if self.translation[index] is not None:
+                segment["translation"] = self.translation[index]
+            return segment
+        return self.take(index)
+
+    def __repr__(self) -> str:
+        return f"SegmentTable({len(self)} segments)"
+
+    # ---- 列运算 ----
+
+    @property
+    def durations(self) -> np.ndarray:
+        return self.end - self.start
+
+    def take(self, index) -> "SegmentTable":
+        """按切片、布尔掩码或下标数组取出若干行"""
+        if isinstance(index, slice):
+            return SegmentTable(
+                self.start[index],
+                self.end[index],
+                self.text[index],
+                self.translation[index],
+            )
+        index = np.asarray(index)
+        if index.dtype == bool:
+            index = np.flatnonzero(index)
+        rows = index.tolist()
+        return SegmentTable(
+            self.start[index],
+            self.end[index],
+            [self.text[i] for i in rows],
+            [self.translation[i] for i in rows],
+        )
+
+    def with_translation(self, translation: Iterable[Optional[str]]) -> "SegmentTable":
+        """替换译文列（时间与原文列共用）"""
+        return SegmentTable(self.start, self.end, self.text, translation)
+
+    def sort(self) -> "SegmentTable":
+        """按起点排序（稳定排序，起点相同的保持原顺序）"""
+        return self.take(np.argsort(self.start, kind="stable"))
+
+    def shift(self, offset: float) -> "SegmentTable":
+        """整体平移 offset 秒"""
+        return SegmentTable(
+            self.start + offset, self.end + offset, self.text, self.translation
+        )
+
+    def intersecting(self, start: float, end: float) -> np.ndarray:
+        """与区间 (start, end) 有交集的行（布尔掩码）"""
+        return (self.end > start) & (self.start < end)
+
+    def clip(self, start: float = 0.0, end: float = np.inf) -> "SegmentTable":
+        """截取到区间 [start, end] 内，去掉区间外的行，跨边界的行截断"""
+        table = self.take(self.intersecting(start, end))
+        np.maximum(table.start, start, out=table.start)
+        np.minimum(table.end, end, out=table.end)
+        return table
@@ -0,0 +1,310 @@
+"""
+Smart render: re-encode only the keyframe-aligned ranges that show subtitles
+"""
+
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .config import SMART_RENDER_MAX_COVERAGE, SMART_RENDER_MIN_GAP
+from .encoding import video_encode_args
+from .media_info import get_keyframes, probe_media
+from .segments import Segments, SegmentTable
+from .subtitle_generator import generate_srt
+from .subtitle_parser import parse_table
+
+# (起点, 终点, 是否需要重新编码)
+RenderRange = Tuple[float, float, bool]
+
+# 重新编码的片段与复制的片段拼接时必须一致的视频流参数
+STREAM_PARAMS = ("codec", "pix_fmt", "profile", "level", "width", "height")
+
+# ffprobe报告的H.264 profile → 编码器 -profile:v 参数
+_H264_PROFILES = {
+    "Constrained Baseline": "baseline",
+    "Main": "main",
+    "High": "high",
+    "High 10": "high10",
+    "High 4:2:2": "high422",
+    "High 4:4:4 Predictive": "high444p",
+}
+
+
+def plan_render_ranges(
+    cues: Segments,
+    keyframes: List[float],
+    duration: float,
+    min_gap: float = None,
+) -> List[RenderRange]:
+    """
+    按字幕时间规划需要重新编码的区间
+
+    每条字幕扩展到前后最近的关键帧，重叠或间隔小于 min_gap 的区间合并，
+    其余部分直接复制。返回的区间首尾相接，覆盖 [0, duration]。
+
+    Args:
+        cues: 字幕片段（start/end，秒）
+        keyframes: 升序关键帧时间
+        duration: 视频时长
+        min_gap: 两个重新编码区间之间可直接复制的最短间隔（秒）
+
+    Returns:
+        (起点, 终点, 是否重新编码) 列表
+    """
+    min_gap = SMART_RENDER_MIN_GAP if min_gap is None else min_gap
+    # 第一个关键帧之前的帧无法单独复制，起点统一从0开始
+    keyframes = np.array(
+        [0.0] + sorted(k for k in keyframes if 0 < k < duration) + [duration]
+    )
+    table = SegmentTable.from_segments(cues).clip(0.0, duration).sort()
+    table = table.take(table.durations > 0)
+    # 起点向前对齐到关键帧，终点向后对齐到下一个关键帧
+    span_starts = keyframes[np.searchsorted(keyframes, table.start, "right") - 1]
+    span_ends = keyframes[np.searchsorted(keyframes, table.end, "left")]
+
+    spans = []
+    for span_start, span_end in zip(span_starts.tolist(), span_ends.tolist()):
+        if spans and span_start - spans[-1][1] < min_gap:
+            spans[-1][1] = max(spans[-1][1], span_end)
+        else:
+            spans.append([span_start, span_end])
+
+    ranges = []
+    position = 0.0
+    for span_start, span_end in spans:
+        if span_start > position:
+            ranges.append((position, span_start, False))
+        ranges.append((span_start, span_end, True))
+        position = span_end
+    if position < duration:
+        ranges.append((position, duration, False))
+    return ranges
+
+
+def write_srt_slice(cues: Segments, start: float, end: float, output_path: str):
+    """
+    截取 [start, end) 内的字幕并平移到从0开始，写为SRT
+
+    Args:
+        cues: 字幕片段（start/end/text）
+        start: 截取起点（秒）
+        end: 截取终点（秒）
+        output_path: 输出文件路径
+    """
+    sliced = SegmentTable.from_segments(cues).clip(start, end).shift(-start)
+    generate_srt(sliced.with_translation(sliced.text), output_path)
+
+
+def match_stream_args(video: Dict) -> List[str]:
+    """
+    让重新编码的片段沿用源视频的像素格式、profile和level的编码参数
+
+    Args:
+        video: probe_media 返回的视频流信息
+
+    Returns:
+        ffmpeg参数列表，源视频未提供的参数不指定
+    """
+    args = []
+    if video.get("pix_fmt"):
+        args += ["-pix_fmt", video["pix_fmt"]]
+    if video.get("profile") in _H264_PROFILES:
+        args += ["-profile:v", _H264_PROFILES[video["profile"]]]
+    if video.get("level") and video["level"] > 0:
+        # ffprobe的level为整数（如40），编码器参数写作 "4.0"
+        args += ["-level", f"{video['level'] / 10:.1f}"]
+    return args
+
+
+def stream_mismatch(expected: Dict, part_path: str) -> Optional[str]:
+    """
+    比较重新编码的片段与源视频的流参数
+
+    Args:
+        expected: 源视频的视频流信息
+        part_path: 重新编码的片段路径
+
+    Returns:
+        第一个不一致的参数描述，全部一致时返回None
+    """
+    actual = probe_media(part_path, use_cache=False)["video"] or {}
+    for key in STREAM_PARAMS:
+        if actual.get(key) != expected.get(key):
+            return f"{key} {actual.get(key)} != {expected.get(key)}"
+    return None
+
+
+def run_ffmpeg(cmd: List[str], cwd: Optional[Path] = None):
+    """执行ffmpeg命令，失败时抛出RuntimeError"""
+    result = subprocess.run(cmd, capture_output=True, text=True, cwd=cwd)
+    if result.returncode != 0:
+        raise RuntimeError(f"FFmpeg error: {result.stderr}")
+
+
+def merge_smart_render(
+    video_path: str,
+    srt_path: str,
+    output_path: Optional[str] = None,
+    encoding: Optional[Dict] = None,
+) -> str:
+    """
+    智能渲染：只重新编码显示字幕的关键帧区间，其余部分直接复制后无损拼接
+
+    重新编码区间内的画面与完整烧录一致。源视频不是H.264、没有可复制的区间、
+    字幕覆盖比例超过 SMART_RENDER_MAX_COVERAGE，或重新编码的片段与源视频的
+    流参数（见 STREAM_PARAMS）不一致而无法无损拼接时，退回完整烧录。
+
+    Args:
+        video_path: 输入视频路径
+        srt_path: SRT字幕路径
+        output_path: 输出视频路径，默认在原视频名后加 "_translated"
+        encoding: 视频编码配置（见 encoding.resolve_profile）
+
+    Returns:
+        输出视频路径
+    """
+    from .video_merger_alt import merge_with_drawtext
+
+    video_path = Path(video_path)
+    if output_path is None:
+        output_path = (
+            video_path.parent / f"{video_path.stem}_translated{video_path.suffix}"
+        )
+    else:
+        output_path = Path(output_path)
+
+    print(f"Using smart render...")
+    print(f"Input: {video_path}")
+    print(f"Subtitle: {srt_path}")
+    print(f"Output: {output_path}")
+
+    info = probe_media(str(video_path))
+    codec = info["video"]["codec"] if info["video"] else None
+    if codec != "h264":
+        # 拼接要求重新编码的片段与源视频编码一致，目前只支持H.264
+        print(f"Source codec is {codec}, falling back to full burn-in")
+        return merge_with_drawtext(
+            str(video_path), srt_path, str(output_path), encoding
+        )
+
+    duration = info["duration"]
+    cues = parse_table(srt_path)
+    ranges = plan_render_ranges(cues, get_keyframes(str(video_path)), duration)
+    rendered = sum(end - start for start, end, render in ranges if render)
+    print(
+        f"Re-encoding {rendered:.1f}s of {duration:.1f}s "
+        f"({sum(1 for r in ranges if r[2])} ranges), copying the rest"
+    )
+    if rendered > duration * SMART_RENDER_MAX_COVERAGE:
+        print("Subtitles cover most of the video, falling back to full burn-in")
+        return merge_with_drawtext(
+            str(video_path), srt_path, str(output_path), encoding
+        )
+
+    source = str(video_path.resolve())
+    encode_args = video_encode_args(encoding, source) + match_stream_args(
+        info["video"]
+    )
+    mismatch = None
+    work_dir = Path(
+        tempfile.mkdtemp(prefix="smart_render_", dir=Path(srt_path).parent)
+    )
+    try:
+        parts = []
+        for index, (start, end, render) in enumerate(ranges):
+            part = work_dir / f"part{index:05d}.ts"
+            if render:
+                slice_name = f"part{index:05d}.srt"
+                write_srt_slice(cues, start, end, str(work_dir / slice_name))
+                cmd = [
+                    "ffmpeg",
+                    "-y",
+                    "-ss",
+                    f"{start:.6f}",  # 重新编码时输入定位是逐帧精确的
+                    "-i",
+                    source,
+                    "-t",
+                    f"{end - start:.6f}",
+                    "-map",
+                    "0:v:0",
+                    "-vf",
+                    f"subtitles='{slice_name}'",
+                    *encode_args,
+                    "-an",
+                    part.name,
+                ]
+            else:
+                # 复制时定位到不晚于该时间的关键帧，加1ms避免浮点误差落到前一个关键帧
+                cmd = [
+                    "ffmpeg",
+                    "-y",
+                    "-ss",
+                    f"{start + 0.001:.6f}",
+                    "-i",
+                    source,
+                    "-t",
+                    f"{end - start:.6f}",
+                    "-map",
+                    "0:v:0",
+                    "-c:v",
+                    "copy",
+                    "-bsf:v",
+                    "h264_mp4toannexb",  # TS片段内嵌参数集，便于拼接
+                    "-an",
+                    part.name,
+                ]
+            run_ffmpeg(cmd, cwd=work_dir)
+            if render:
+                # 编码器可能不支持或自行调整部分参数，拼接前逐段确认
+                mismatch = stream_mismatch(info["video"], str(part))
+                if mismatch:
+                    break
+            parts.append(part.name)
+
+        if mismatch is None:
+            list_path = work_dir / "parts.txt"
+            list_path.write_text(
+                "".join(f"file '{p}'\n" for p in parts), encoding="utf-8"
+            )
+
+            # 拼接视频片段，音频从源视频整体复制一次
+            run_ffmpeg(
+                [
+                    "ffmpeg",
+                    "-y",
+                    "-f",
+                    "concat",
+                    "-safe",
+                    "0",
+                    "-i",
+                    list_path.name,
+                    "-i",
+                    source,
+                    "-map",
+                    "0:v",
+                    "-map",
+                    "1:a?",
+                    "-c",
+                    "copy",
+                    str(output_path.resolve()),
+                ],
+                cwd=work_dir,
+            )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if mismatch:
+        print(
+            f"Re-encoded stream does not match the source ({mismatch}), "
+            "falling back to full burn-in"
+        )
+        return merge_with_drawtext(
+            str(video_path), srt_path, str(output_path), encoding
+        )
+
+    print(f"Success! Output: {output_path}")
+    return str(output_path)
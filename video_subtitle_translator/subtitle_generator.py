@@ -1,19 +1,176 @@
 """
-Subtitle file generation (.srt format)
+Subtitle file generation (.srt / .ass / .vtt)
 """
 
-from pathlib import Path
-from typing import List, Dict
-import re
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Union
+
+import numpy as np
+
+from .config import SUBTITLE_FORMATS
+from .segments import SegmentTable
+
+# 每次格式化并写出的字幕条数：超大字幕列表分块写出，不在内存中拼出整个文件
+WRITE_CHUNK_SIZE = 10000
+
+# ASS默认样式
+DEFAULT_ASS_STYLE = {
+    "font_name": "Source Han Sans CN",
+    "font_size": 24,
+    "primary_color": "&H00FFFFFF",  # 白色
+    "secondary_color": "&H00FFFFFF",
+    "outline_color": "&H00000000",
+    "back_color": "&H80000000",  # 半透明黑色
+    "bold": 1,
+    "italic": 0,
+    "border_style": 4,  # 背景框
+    "outline": 1,
+    "shadow": 0,
+    "alignment": 2,  # 底部居中
+    "margin_l": 10,
+    "margin_r": 10,
+    "margin_v": 30,
+}
+
+
+def _ass_header(style: dict) -> str:
+    return f"""[Script Info]
+Title: Bilingual Subtitles
+ScriptType: v4.00+
+WrapStyle: 0
+ScaledBorderAndShadow: yes
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Default,{style["font_name"]},{style["font_size"]},{style["primary_color"]},{style["secondary_color"]},{style["outline_color"]},{style["back_color"]},{style["bold"]},{style["italic"]},0,0,100,100,0,0,{style["border_style"]},{style["outline"]},{style["shadow"]},{style["alignment"]},{style["margin_l"]},{style["margin_r"]},{style["margin_v"]},1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+
+def _clock(seconds: np.ndarray):
+    """秒数组 -> 时、分、秒、毫秒整数列表（先四舍五入到整毫秒，避免浮点取模误差）"""
+    millis = np.maximum(np.rint(seconds * 1000), 0).astype(np.int64)
+    hours, rest = np.divmod(millis, 3_600_000)
+    minutes, rest = np.divmod(rest, 60_000)
+    secs, millis = np.divmod(rest, 1000)
+    return hours.tolist(), minutes.tolist(), secs.tolist(), millis.tolist()
+
+
+def _timestamps(clock, fmt: str) -> List[str]:
+    if fmt == "ass":
+        return [f"{h}:{m:02d}:{s:02d}.{ms // 10:02d}" for h, m, s, ms in zip(*clock)]
+    sep = "," if fmt == "srt" else "."
+    return [f"{h:02d}:{m:02d}:{s:02d}{sep}{ms:03d}" for h, m, s, ms in zip(*clock)]
+
+
+def format_timestamps(seconds: Iterable[float], fmt: str = "srt") -> List[str]:
+    """
+    批量格式化时间戳
+
+    Args:
+        seconds: 秒数序列
+        fmt: srt 为 HH:MM:SS,mmm；vtt 为 HH:MM:SS.mmm；ass 为 H:MM:SS.cc
+
+    Returns:
+        时间字符串列表
+    """
+    return _timestamps(_clock(np.asarray(seconds, dtype=np.float64)), fmt)
 
 
 def format_time(seconds: float) -> str:
     """将秒数格式化为SRT时间格式 HH:MM:SS,mmm"""
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
-    millis = int((seconds % 1) * 1000)
-    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+    return format_timestamps([seconds])[0]
+
+
+def _iter_chunks(
+    segments: Union[SegmentTable, Iterable[Dict]], size: int
+) -> Iterator[SegmentTable]:
+    """按块取出字幕，片段字典的迭代器只按块转换，不需要整体放进内存"""
+    if isinstance(segments, SegmentTable):
+        for offset in range(0, len(segments), size):
+            yield segments.take(slice(offset, offset + size))
+        return
+    iterator = iter(segments)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield SegmentTable.from_segments(batch)
+
+
+def _format_chunk(clocks, texts: List[str], fmt: str, first_index: int) -> str:
+    starts = _timestamps(clocks[0], fmt)
+    ends = _timestamps(clocks[1], fmt)
+    if fmt == "srt":
+        indexes = range(first_index, first_index + len(texts))
+        return "".join(
+            f"{i}\n{a} --> {b}\n{t}\n\n"
+            for i, a, b, t in zip(indexes, starts, ends, texts)
+        )
+    if fmt == "vtt":
+        texts = [
+            t.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+            for t in texts
+        ]
+        return "".join(
+            f"{a} --> {b}\n{t}\n\n" for a, b, t in zip(starts, ends, texts)
+        )
+    texts = [t.replace("{", "\\{").replace("}", "\\}") for t in texts]
+    return "".join(
+        f"Dialogue: 0,{a},{b},Default,,0,0,0,,{t}\n"
+        for a, b, t in zip(starts, ends, texts)
+    )
+
+
+def write_subtitles(
+    segments: Union[SegmentTable, Iterable[Dict]],
+    outputs: Dict[str, str],
+    style_config: dict = None,
+    chunk_size: int = None,
+) -> Dict[str, str]:
+    """
+    一次遍历字幕，同时写出多种格式
+
+    时间按整毫秒批量格式化，每块字幕先拼成一个字符串再一次写出；
+    segments 可以是迭代器，按块消费，超大字幕列表也不会整体转成字符串。
+
+    Args:
+        segments: 字幕片段（已翻译），片段字典序列/迭代器或 SegmentTable
+        outputs: {格式: 输出路径}，格式为 srt / ass / vtt
+        style_config: ASS样式配置
+        chunk_size: 每块条数，默认 WRITE_CHUNK_SIZE
+
+    Returns:
+        outputs
+    """
+    unknown = set(outputs) - set(SUBTITLE_FORMATS)
+    if unknown:
+        raise ValueError(f"未知的字幕格式: {', '.join(sorted(unknown))}")
+
+    files = {}
+    try:
+        for fmt, path in outputs.items():
+            files[fmt] = open(path, "w", encoding="utf-8")
+            if fmt == "ass":
+                files[fmt].write(_ass_header(style_config or DEFAULT_ASS_STYLE))
+            elif fmt == "vtt":
+                files[fmt].write("WEBVTT\n\n")
+
+        index = 1
+        for chunk in _iter_chunks(segments, chunk_size or WRITE_CHUNK_SIZE):
+            # 时间拆分与文本清理每块只做一次，各格式共用
+            clocks = (_clock(chunk.start), _clock(chunk.end))
+            # 只显示译文；合并多余空白（含换行）
+            texts = [" ".join((t or "").split()) for t in chunk.translation]
+            for fmt, f in files.items():
+                f.write(_format_chunk(clocks, texts, fmt, index))
+            index += len(chunk)
+    finally:
+        for f in files.values():
+            f.close()
+    return outputs
 
 
 def generate_srt(segments: List[Dict], output_path: str) -> str:
@@ -28,24 +185,7 @@ def generate_srt(segments: List[Dict], output_path: str) -> str:
         生成的字幕文件路径
     """
     print(f"Generating SRT file: {output_path}")
-
-    with open(output_path, "w", encoding="utf-8") as f:
-        for i, segment in enumerate(segments, 1):
-            start_time = format_time(segment["start"])
-            end_time = format_time(segment["end"])
-
-            # 获取翻译（只显示中文）
-            translated_text = segment.get("translation", "").strip()
-
-            # 清理文本中的换行符
-            translated_text = re.sub(r"\s+", " ", translated_text)
-
-            # SRT格式：序号、时间轴、文本行（只显示中文）
-            f.write(f"{i}\n")
-            f.write(f"{start_time} --> {end_time}\n")
-            f.write(f"{translated_text}\n")  # 只显示中文
-            f.write("\n")
-
+    write_subtitles(segments, {"srt": output_path})
     print(f"SRT file generated: {output_path}")
     return output_path
 
@@ -65,67 +205,23 @@ def generate_ass(
         生成的字幕文件路径
     """
     print(f"Generating ASS file: {output_path}")
+    write_subtitles(segments, {"ass": output_path}, style_config)
+    print(f"ASS file generated: {output_path}")
+    return output_path
 
-    # 默认样式
-    default_style = {
-        "font_name": "Source Han Sans CN",
-        "font_size": 24,
-        "primary_color": "&H00FFFFFF",  # 白色
-        "secondary_color": "&H00FFFFFF",
-        "outline_color": "&H00000000",
-        "back_color": "&H80000000",  # 半透明黑色
-        "bold": 1,
-        "italic": 0,
-        "border_style": 4,  # 背景框
-        "outline": 1,
-        "shadow": 0,
-        "alignment": 2,  # 底部居中
-        "margin_l": 10,
-        "margin_r": 10,
-        "margin_v": 30,
-    }
-
-    style = style_config or default_style
-
-    # ASS头部
-    ass_header = f"""[Script Info]
-Title: Bilingual Subtitles
-ScriptType: v4.00+
-WrapStyle: 0
-ScaledBorderAndShadow: yes
-
-[V4+ Styles]
-Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
-Style: Default,{style["font_name"]},{style["font_size"]},{style["primary_color"]},{style["secondary_color"]},{style["outline_color"]},{style["back_color"]},{style["bold"]},{style["italic"]},0,0,100,100,0,0,{style["border_style"]},{style["outline"]},{style["shadow"]},{style["alignment"]},{style["margin_l"]},{style["margin_r"]},{style["margin_v"]},1
-
-[Events]
-Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
-"""
-
-    def format_ass_time(seconds: float) -> str:
-        """ASS时间格式: H:MM:SS.cc"""
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        centis = int((seconds % 1) * 100)
-        return f"{hours}:{minutes:02d}:{secs:02d}.{centis:02d}"
-
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(ass_header)
-
-        for segment in segments:
-            start_time = format_ass_time(segment["start"])
-            end_time = format_ass_time(segment["end"])
-
-            translated_text = segment.get("translation", "").strip()
-
-            # 清理和转义
-            translated_text = re.sub(r"\s+", " ", translated_text)
 
-            # 单语字幕：只显示中文
-            text = translated_text.replace("{", "\\{").replace("}", "\\}")
+def generate_vtt(segments: List[Dict], output_path: str) -> str:
+    """
+    生成WebVTT字幕文件（网页播放器使用）
 
-            f.write(f"Dialogue: 0,{start_time},{end_time},Default,,0,0,0,,{text}\n")
+    Args:
+        segments: 转录结果列表（已翻译）
+        output_path: 输出文件路径
 
-    print(f"ASS file generated: {output_path}")
+    Returns:
+        生成的字幕文件路径
+    """
+    print(f"Generating VTT file: {output_path}")
+    write_subtitles(segments, {"vtt": output_path})
+    print(f"VTT file generated: {output_path}")
     return output_path
@@ -1,63 +1,266 @@
 """
-Subtitle parser for reading SRT files
+Streaming subtitle parser for SRT, WebVTT and ASS files
 """
 
+import codecs
+import html
+import itertools
 import re
 from pathlib import Path
-from typing import List, Dict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
+from .segments import SegmentTable
 
-def parse_srt(srt_path: str) -> List[Dict]:
+# 时间戳：[时:]分:秒[,.]毫秒（SRT为逗号，VTT可省略小时，ASS为厘秒）
+# 小数部分可省略（如 "0:00:01"），超过3位的按毫秒四舍五入
+_TIME = r"(?:(\d+):)?(\d{1,2}):(\d{1,2})(?:[,.](\d+))?"
+_TIME_RE = re.compile(_TIME)
+_TIMING_RE = re.compile(rf"{_TIME}\s*-->\s*{_TIME}")
+
+_VTT_TAG_RE = re.compile(r"<[^>]*>")
+_ASS_OVERRIDE_RE = re.compile(r"(?<!\\)\{[^}]*\}")
+_ASS_BREAK_RE = re.compile(r"\\[Nnh]")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# 编码检测读取的文件头大小
+_SAMPLE_SIZE = 1024 * 1024
+
+# 按BOM识别的编码（UTF-32 LE的BOM以UTF-16 LE的BOM开头，需先判断）
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+def detect_encoding(path: str) -> str:
     """
-    解析SRT字幕文件
+    检测字幕文件编码
 
-    Args:
-        srt_path: SRT文件路径
+    依次按BOM、UTF-16无BOM时的零字节分布、UTF-8与GB18030（兼容GBK）试解码判断，
+    只读取文件头 _SAMPLE_SIZE 字节。
 
     Returns:
-        字幕片段列表，每个包含 start, end, text
+        可传给open()的编码名称
     """
-    srt_path = Path(srt_path)
+    with open(path, "rb") as f:
+        sample = f.read(_SAMPLE_SIZE)
+
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+
+    # 字幕以ASCII字符为主，UTF-16时每两个字节中有一个为零
+    zeros_even = sample[0::2].count(0)
+    zeros_odd = sample[1::2].count(0)
+    if zeros_even + zeros_odd > len(sample) // 4:
+        return "utf-16-le" if zeros_odd > zeros_even else "utf-16-be"
+
+    final = len(sample) < _SAMPLE_SIZE  # 样本在多字节字符中间截断时不算错误
+    for encoding in ("utf-8", "gb18030"):
+        try:
+            codecs.getincrementaldecoder(encoding)().decode(sample, final)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return "latin-1"
+
+
+def _to_seconds(
+    hours: Optional[str], minutes: str, seconds: str, fraction: Optional[str]
+) -> float:
+    # 小数部分按位数解释：",5" 为500毫秒，ASS的 ".25" 为250毫秒，",1234" 为123毫秒
+    millis = round(int(fraction) * 1000 / 10 ** len(fraction)) if fraction else 0
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds) + millis / 1000
 
-    if not srt_path.exists():
-        raise FileNotFoundError(f"字幕文件不存在: {srt_path}")
 
-    with open(srt_path, "r", encoding="utf-8") as f:
-        content = f.read()
+def _timing(match: "re.Match") -> Tuple[float, float]:
+    """时间行匹配结果 -> (起点, 终点)"""
+    groups = match.groups()
+    return _to_seconds(*groups[:4]), _to_seconds(*groups[4:])
 
-    # 分割字幕条目（按空行分割）
-    entries = re.split(r"\n\s*\n", content.strip())
 
-    segments = []
+def _segment(start: float, end: float, lines: List[str]) -> Optional[Dict]:
+    text = " ".join(lines)
+    if not text:
+        return None
+    return {"start": start, "end": end, "text": text}
 
-    for entry in entries:
-        lines = entry.strip().split("\n")
-        if len(lines) < 3:
+
+def _iter_srt(lines: Iterable[str]) -> Iterator[Dict]:
+    """逐行解析SRT：时间行开始一条字幕，空行结束；序号行可有可无"""
+    timing = None
+    text: List[str] = []
+    for line in lines:
+        line = line.strip()
+        # 先做子串判断，文本行不必再跑正则
+        match = _TIMING_RE.match(line) if "-->" in line else None
+        if match:
+            if timing is not None:
+                # 缺少空行分隔时，上一条末尾的纯数字行是本条的序号
+                if text and text[-1].isdigit():
+                    text.pop()
+                segment = _segment(*timing, text)
+                if segment:
+                    yield segment
+            timing = _timing(match)
+            text = []
+        elif not line:
+            if timing is not None:
+                segment = _segment(*timing, text)
+                if segment:
+                    yield segment
+            timing = None
+            text = []
+        elif timing is not None:
+            text.append(line)
+    if timing is not None:
+        segment = _segment(*timing, text)
+        if segment:
+            yield segment
+
+
+def _iter_vtt(lines: Iterable[str]) -> Iterator[Dict]:
+    """逐行解析WebVTT：跳过文件头与NOTE/STYLE/REGION块，去掉cue标签"""
+    timing = None
+    text: List[str] = []
+    skipping = False
+    for line in lines:
+        line = line.strip()
+        if not line:
+            if timing is not None:
+                segment = _segment(*timing, text)
+                if segment:
+                    yield segment
+            timing = None
+            text = []
+            skipping = False
+            continue
+        if timing is None and (
+            line.startswith(("WEBVTT", "NOTE")) or line in ("STYLE", "REGION")
+        ):
+            skipping = True
+        if skipping:
             continue
+        match = _TIMING_RE.match(line) if "-->" in line else None
+        if match:
+            timing = _timing(match)
+        elif timing is not None:
+            text.append(html.unescape(_VTT_TAG_RE.sub("", line)).strip())
+        # 时间行之前的是cue标识，忽略
+    if timing is not None:
+        segment = _segment(*timing, text)
+        if segment:
+            yield segment
 
-        # 第一行是序号，第二行是时间，剩余是文本
-        try:
-            # 解析时间行
-            time_line = lines[1]
-            match = re.match(
-                r"(\d+:\d+:\d+[,.]\d+)\s*-->\s*(\d+:\d+:\d+[,.]\d+)", time_line
-            )
-            if not match:
+
+def _iter_ass(lines: Iterable[str]) -> Iterator[Dict]:
+    """逐行解析ASS/SSA的[Events]段，字段顺序按Format行，去掉样式覆盖标签"""
+    in_events = False
+    fields: Optional[List[str]] = None
+    for line in lines:
+        line = line.strip()
+        if line.startswith("["):
+            in_events = line.lower() == "[events]"
+            continue
+        if not in_events:
+            continue
+        key, _, value = line.partition(":")
+        if key == "Format":
+            fields = [field.strip().lower() for field in value.split(",")]
+        elif key == "Dialogue" and fields:
+            # 最后一个字段（Text）中可以有逗号
+            values = value.split(",", len(fields) - 1)
+            if len(values) < len(fields):
                 continue
+            row = dict(zip(fields, values))
+            start = _TIME_RE.match(row.get("start", "").strip())
+            end = _TIME_RE.match(row.get("end", "").strip())
+            if not start or not end:
+                continue
+            text = _ASS_OVERRIDE_RE.sub("", row.get("text", ""))
+            text = _ASS_BREAK_RE.sub(" ", text).replace("\\{", "{").replace("\\}", "}")
+            text = _WHITESPACE_RE.sub(" ", text).strip()
+            segment = _segment(
+                _to_seconds(*start.groups()), _to_seconds(*end.groups()), [text]
+            )
+            if segment:
+                yield segment
 
-            start_str, end_str = match.groups()
-            start = parse_time(start_str)
-            end = parse_time(end_str)
 
-            # 剩余行是文本
-            text = " ".join(lines[2:]).strip()
+def _detect_format(path: Path, first_line: str) -> str:
+    suffix = path.suffix.lower()
+    if suffix == ".vtt" or first_line.startswith("WEBVTT"):
+        return "vtt"
+    if suffix in (".ass", ".ssa") or first_line.lower() == "[script info]":
+        return "ass"
+    return "srt"
+
+
+def _read(path: Path, encoding: str) -> Iterator[Dict]:
+    # newline=None：CRLF与单独的CR都按换行处理
+    with open(path, "r", encoding=encoding, errors="replace", newline=None) as f:
+        lines = iter(f)
+        head = []
+        for line in lines:
+            head.append(line)
+            if line.strip():
+                break
+        first_line = head[-1].strip() if head else ""
+        parser = {"srt": _iter_srt, "vtt": _iter_vtt, "ass": _iter_ass}[
+            _detect_format(path, first_line)
+        ]
+        yield from parser(itertools.chain(head, lines))
 
-            segments.append({"start": start, "end": end, "text": text})
-        except Exception as e:
-            print(f"警告：解析字幕条目失败: {e}")
-            continue
 
-    return segments
+def iter_subtitles(subtitle_path: str, encoding: str = None) -> Iterator[Dict]:
+    """
+    逐条读取字幕文件（SRT/WebVTT/ASS），边读边产出，不把整个文件读入内存
+
+    格式按扩展名或文件首行判断，编码自动检测（BOM、UTF-16、UTF-8、GBK）。
+
+    Args:
+        subtitle_path: 字幕文件路径
+        encoding: 指定编码，默认自动检测
+
+    Returns:
+        字幕片段迭代器，每个包含 start, end, text
+
+    Raises:
+        FileNotFoundError: 文件不存在
+    """
+    subtitle_path = Path(subtitle_path)
+    if not subtitle_path.exists():
+        raise FileNotFoundError(f"字幕文件不存在: {subtitle_path}")
+    return _read(subtitle_path, encoding or detect_encoding(str(subtitle_path)))
+
+
+def parse_srt(srt_path: str) -> List[Dict]:
+    """
+    解析字幕文件（SRT，也支持WebVTT/ASS）
+
+    Args:
+        srt_path: 字幕文件路径
+
+    Returns:
+        字幕片段列表，每个包含 start, end, text
+    """
+    return list(iter_subtitles(srt_path))
+
+
+def parse_table(subtitle_path: str) -> SegmentTable:
+    """
+    解析字幕文件为列式片段表（大文件时比片段字典列表省内存）
+
+    Args:
+        subtitle_path: 字幕文件路径
+
+    Returns:
+        SegmentTable
+    """
+    return SegmentTable.from_segments(iter_subtitles(subtitle_path))
 
 
 def parse_time(time_str: str) -> float:
@@ -65,20 +268,13 @@ def parse_time(time_str: str) -> float:
     将时间字符串转换为秒数
 
     Args:
-        time_str: 时间字符串，格式为 "HH:MM:SS,mmm" 或 "HH:MM:SS.mmm"
+        time_str: 时间字符串，格式为 "HH:MM:SS,mmm" 或 "HH:MM:SS.mmm"，
+            小时和小数部分可省略
 
     Returns:
         秒数（浮点数）
     """
-    # 替换逗号为点
-    time_str = time_str.replace(",", ".")
-
-    parts = time_str.split(":")
-    if len(parts) != 3:
+    match = _TIME_RE.fullmatch(time_str.strip())
+    if not match:
         raise ValueError(f"无效的时间格式: {time_str}")
-
-    hours = int(parts[0])
-    minutes = int(parts[1])
-    seconds = float(parts[2])
-
-    return hours * 3600 + minutes * 60 + seconds
+    return _to_seconds(*match.groups())
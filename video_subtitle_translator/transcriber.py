@@ -3,18 +3,138 @@ Speech-to-Text using faster-whisper
 """
 
 import os
-from pathlib import Path
-from typing import List, Tuple
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
 from faster_whisper import WhisperModel
+from faster_whisper.audio import decode_audio
+from faster_whisper.utils import download_model
+from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+from .config import (
+    MODELS_DIR,
+    WHISPER_MODEL_SIZE,
+    WHISPER_DEVICE,
+    WHISPER_COMPUTE_TYPE,
+    WHISPER_CPU_WORKERS,
+    WHISPER_CHUNK_SECONDS,
+)
+from .transcription_cache import TranscriptionCache, audio_content_hash
+
+SAMPLE_RATE = 16000
+
+# 音频输入：WAV文件路径，或内存中的16kHz单声道float32数组
+AudioInput = Union[str, np.ndarray]
+
+# 多进程分块转录时每个工作进程持有的模型实例
+_worker_model = None
+
+
+def _describe_audio(audio: AudioInput) -> str:
+    """用于日志输出的音频描述"""
+    if isinstance(audio, np.ndarray):
+        return f"<in-memory audio, {len(audio) / SAMPLE_RATE:.1f}s>"
+    return str(audio)
+
+
+def _init_worker(model_path: str, compute_type: str, cpu_threads: int):
+    """工作进程初始化：加载一份独立的模型实例"""
+    global _worker_model
+    _worker_model = WhisperModel(
+        model_path, device="cpu", compute_type=compute_type, cpu_threads=cpu_threads
+    )
+
+
+def _transcribe_chunk(audio, offset: float, language: str, vad_parameters: Dict):
+    """
+    在工作进程中转录一个音频块
+
+    Args:
+        audio: 16kHz float32 音频数组
+        offset: 该块在原音频中的起始时间（秒）
+        language: 音频语言代码
+        vad_parameters: VAD参数
+
+    Returns:
+        时间戳已加上偏移的转录片段列表
+    """
+    segments, _ = _worker_model.transcribe(
+        audio,
+        language=language,
+        task="transcribe",
+        vad_filter=True,
+        vad_parameters=vad_parameters,
+    )
+    return [
+        {
+            "start": offset + segment.start,
+            "end": offset + segment.end,
+            "text": segment.text.strip(),
+        }
+        for segment in segments
+    ]
+
+
+def plan_chunks(
+    speech: List[Dict], total_samples: int, target_samples: int
+) -> List[Tuple[int, int]]:
+    """
+    按VAD检测到的语音区间规划分块，切点取两段语音之间静音的中点
+
+    Args:
+        speech: 语音区间列表，每个包含 start/end（采样点）
+        total_samples: 音频总采样点数
+        target_samples: 每块的目标长度（采样点）
+
+    Returns:
+        (起始采样点, 结束采样点) 列表，首尾相接覆盖整段音频
+    """
+    chunks = []
+    chunk_start = 0
+    for current, following in zip(speech, speech[1:]):
+        if current["end"] - chunk_start < target_samples:
+            continue
+        cut = (current["end"] + following["start"]) // 2
+        chunks.append((chunk_start, cut))
+        chunk_start = cut
+    chunks.append((chunk_start, total_samples))
+    return chunks
+
 
-from .config import MODELS_DIR, WHISPER_MODEL_SIZE, WHISPER_DEVICE, WHISPER_COMPUTE_TYPE
+def _iter_stitched(chunk_results: Iterable[List[dict]]) -> Iterator[dict]:
+    """
+    按顺序拼接各块结果：去掉块边界处重复识别的句子，并保证时间轴不重叠
+
+    每取到一块就产出该块的片段，不需要等所有块完成。
+    """
+    previous = None
+    for chunk in chunk_results:
+        for segment in chunk:
+            if previous is not None:
+                if (
+                    segment["start"] < previous["end"]
+                    and segment["text"].lower() == previous["text"].lower()
+                ):
+                    continue
+                if segment["start"] < previous["end"]:
+                    segment["start"] = previous["end"]
+                    segment["end"] = max(segment["end"], segment["start"])
+            previous = segment
+            yield segment
 
 
 class Transcriber:
     """语音识别器"""
 
     def __init__(
-        self, model_size: str = None, device: str = None, compute_type: str = None
+        self,
+        model_size: str = None,
+        device: str = None,
+        compute_type: str = None,
+        cache: Optional[TranscriptionCache] = None,
+        workers: int = None,
     ):
         """
         初始化Whisper模型
@@ -23,11 +143,22 @@ class Transcriber:
             model_size: 模型大小 (tiny, base, small, medium, large)
             device: 计算设备 (cpu, cuda)
             compute_type: 计算类型 (float16, int8)
+            cache: 转录缓存，提供则命中时跳过模型加载和推理
+            workers: CPU多进程分块转录的进程数，大于1时启用（仅限CPU），0为按核数自动
         """
         self.model_size = model_size or WHISPER_MODEL_SIZE
         self.device = device or WHISPER_DEVICE
         self.compute_type = compute_type or WHISPER_COMPUTE_TYPE
+        self.cache = cache
+        self.vad_parameters = dict(min_silence_duration_ms=500)
         self.model = None
+        self.load_seconds = None  # 模型加载耗时，加载后记录（供运行指标使用）
+
+        workers = WHISPER_CPU_WORKERS if workers is None else workers
+        if workers == 0:
+            # 自动：每个进程约4个线程
+            workers = max(1, (os.cpu_count() or 1) // 4)
+        self.workers = workers
 
     def load_model(self):
         """加载Whisper模型"""
@@ -44,6 +175,7 @@ class Transcriber:
         # 设置环境变量让faster-whisper使用自定义缓存目录
         os.environ["WHISPER_CACHE_DIR"] = model_dir
 
+        start = time.perf_counter()
         self.model = WhisperModel(
             self.model_size,
             device=self.device,
@@ -51,36 +183,65 @@ class Transcriber:
             download_root=model_dir,
             local_files_only=False,  # 允许下载
         )
-        print("Model loaded successfully!")
+        self.load_seconds = time.perf_counter() - start
+        print(f"Model loaded successfully! ({self.load_seconds:.1f}s)")
 
-    def transcribe(self, audio_path: str, language: str = "en") -> List[dict]:
+    def iter_segments(self, audio: AudioInput, language: str = "en") -> Iterator[dict]:
         """
-        转录音频
+        流式转录音频：faster-whisper每解码出一个片段就立即产出
 
         Args:
-            audio_path: 音频文件路径
+            audio: 音频文件路径，或内存中的16kHz float32音频数组
             language: 音频语言代码
 
-        Returns:
-            转录结果列表，每个元素包含:
-            {
-                "start": 开始时间(秒),
-                "end": 结束时间(秒),
-                "text": 文本内容,
-                "words": [可选]单词级别时间戳
-            }
+        Yields:
+            转录片段，格式同 transcribe 的返回元素
         """
+        cache_key = None
+        if self.cache is not None:
+            # 分块转录的切分点随进程数变化，计算类型也不同，结果与整段转录分开缓存
+            chunked = self.workers > 1
+            cache_key = self.cache.make_key(
+                audio_content_hash(audio),
+                self.model_size,
+                language,
+                self.vad_parameters,
+                self._chunk_compute_type() if chunked else self.compute_type,
+                self.workers if chunked else 0,
+            )
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                print(f"Transcription cache hit: {len(cached)} segments")
+                yield from cached
+                return
+
+        if self.workers > 1:
+            # 每块完成即按顺序产出，流式模式下翻译不必等整段识别结束
+            results = []
+            for segment in self.iter_chunked(audio, language):
+                results.append(segment)
+                yield segment
+            if cache_key is not None:
+                self.cache.put(
+                    cache_key,
+                    [
+                        {"start": r["start"], "end": r["end"], "text": r["text"]}
+                        for r in results
+                    ],
+                )
+            return
+
         if self.model is None:
             self.load_model()
 
-        print(f"Transcribing audio: {audio_path}")
+        print(f"Transcribing audio: {_describe_audio(audio)}")
 
         segments, info = self.model.transcribe(
-            audio_path,
+            audio,
             language=language,
             task="transcribe",
             vad_filter=True,  # 语音活动检测，过滤静音
-            vad_parameters=dict(min_silence_duration_ms=500),
+            vad_parameters=self.vad_parameters,
         )
 
         print(
@@ -89,13 +250,101 @@ class Transcriber:
 
         results = []
         for segment in segments:
-            results.append(
-                {
-                    "start": segment.start,
-                    "end": segment.end,
-                    "text": segment.text.strip(),
-                }
-            )
+            result = {
+                "start": segment.start,
+                "end": segment.end,
+                "text": segment.text.strip(),
+            }
+            results.append(result)
+            yield result
 
         print(f"Transcription complete: {len(results)} segments")
-        return results
+        # 只有完整迭代结束才写入缓存；流式模式下片段可能已被写入译文，只缓存识别字段
+        if cache_key is not None:
+            self.cache.put(
+                cache_key,
+                [{"start": r["start"], "end": r["end"], "text": r["text"]} for r in results],
+            )
+
+    def _chunk_compute_type(self) -> str:
+        """分块转录在CPU上进行，float16在CPU上不受支持，改用int8"""
+        return "int8" if self.compute_type == "float16" else self.compute_type
+
+    def iter_chunked(self, audio: AudioInput, language: str = "en") -> Iterator[dict]:
+        """
+        CPU多进程分块转录：在VAD检测到的静音处切块，
+        每个工作进程持有独立模型并行转录，按偏移拼接时间轴
+
+        各块同时提交，按块的顺序等待：前面的块完成即产出其片段，
+        后面的块仍在其他进程中转录。
+
+        Args:
+            audio: 音频文件路径（16kHz单声道WAV），或内存中的16kHz float32音频数组
+            language: 音频语言代码
+
+        Yields:
+            转录片段，格式同 transcribe 的返回元素
+        """
+        if self.device != "cpu":
+            print(f"Chunked transcription runs on CPU (configured device: {self.device})")
+        compute_type = self._chunk_compute_type()
+        cpu_threads = max(1, (os.cpu_count() or 1) // self.workers)
+
+        model_dir = os.path.join(MODELS_DIR, f"faster-whisper-{self.model_size}")
+        os.makedirs(model_dir, exist_ok=True)
+        # 主进程先确保模型已下载，避免多个工作进程同时下载
+        model_path = download_model(self.model_size, cache_dir=model_dir)
+
+        source = _describe_audio(audio)
+        if not isinstance(audio, np.ndarray):
+            audio = decode_audio(audio, sampling_rate=SAMPLE_RATE)
+        speech = get_speech_timestamps(audio, VadOptions(**self.vad_parameters))
+        target_samples = max(
+            WHISPER_CHUNK_SECONDS * SAMPLE_RATE, len(audio) // self.workers
+        )
+        chunks = plan_chunks(speech, len(audio), target_samples)
+        print(
+            f"Transcribing audio in {len(chunks)} chunks with {self.workers} workers "
+            f"({cpu_threads} threads each): {source}"
+        )
+
+        with ProcessPoolExecutor(
+            max_workers=min(self.workers, len(chunks)),
+            initializer=_init_worker,
+            initargs=(model_path, compute_type, cpu_threads),
+        ) as executor:
+            futures = [
+                executor.submit(
+                    _transcribe_chunk,
+                    audio[start:end],
+                    start / SAMPLE_RATE,
+                    language,
+                    self.vad_parameters,
+                )
+                for start, end in chunks
+            ]
+            count = 0
+            for segment in _iter_stitched(future.result() for future in futures):
+                count += 1
+                yield segment
+
+        print(f"Transcription complete: {count} segments")
+
+    def transcribe(self, audio: AudioInput, language: str = "en") -> List[dict]:
+        """
+        转录音频
+
+        Args:
+            audio: 音频文件路径，或内存中的16kHz float32音频数组
+            language: 音频语言代码
+
+        Returns:
+            转录结果列表，每个元素包含:
+            {
+                "start": 开始时间(秒),
+                "end": 结束时间(秒),
+                "text": 文本内容,
+                "words": [可选]单词级别时间戳
+            }
+        """
+        return list(self.iter_segments(audio, language))
@@ -0,0 +1,166 @@
+"""
+Content-addressed cache for Whisper transcription results
+"""
+
+import hashlib
+import json
+import os
+import wave
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from .config import TRANSCRIPTION_CACHE_DIR, TRANSCRIPTION_CACHE_MAX_BYTES
+
+
+def _is_pcm16_mono(wav: wave.Wave_read) -> bool:
+    """是否为 extract_audio 输出的16kHz单声道16位PCM"""
+    return (
+        wav.getsampwidth() == 2
+        and wav.getnchannels() == 1
+        and wav.getframerate() == 16000
+    )
+
+
+def audio_content_hash(
+    audio: Union[str, np.ndarray], chunk_size: int = 1024 * 1024
+) -> str:
+    """
+    计算音频内容的SHA-256
+
+    按解码后的16位PCM采样计算：WAV文件取其采样数据（不含文件头），
+    内存中的float32数组还原为16位采样，同一视频在两种方式下得到相同的哈希。
+    其他格式的音频文件按文件字节计算。
+
+    Args:
+        audio: 音频文件路径，或内存中的音频数组（16kHz单声道float32）
+        chunk_size: 每次处理的采样数
+
+    Returns:
+        十六进制哈希字符串
+    """
+    digest = hashlib.sha256()
+    if isinstance(audio, np.ndarray):
+        for offset in range(0, len(audio), chunk_size):
+            # 数组由16位采样除以32768得到，乘回去是精确的整数
+            samples = audio[offset : offset + chunk_size] * 32768
+            samples = np.clip(samples, -32768, 32767)
+            digest.update(np.rint(samples).astype("<i2").tobytes())
+        return digest.hexdigest()
+
+    try:
+        with wave.open(str(audio), "rb") as wav:
+            if _is_pcm16_mono(wav):
+                for frames in iter(lambda: wav.readframes(chunk_size), b""):
+                    digest.update(frames)
+                return digest.hexdigest()
+    except (wave.Error, EOFError):
+        pass
+
+    digest = hashlib.sha256()
+    with open(audio, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TranscriptionCache:
+    """转录结果缓存（按 音频内容 + 模型 + 语言 + VAD参数 + 计算类型 + 分块方式 寻址，按总大小LRU淘汰）"""
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = None):
+        """
+        Args:
+            cache_dir: 缓存目录
+            max_bytes: 缓存总大小上限（字节）
+        """
+        self.cache_dir = Path(cache_dir or TRANSCRIPTION_CACHE_DIR)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes or TRANSCRIPTION_CACHE_MAX_BYTES
+
+    @staticmethod
+    def make_key(
+        audio_hash: str,
+        model_size: str,
+        language: str,
+        vad_parameters: Dict,
+        compute_type: str,
+        chunk_workers: int,
+    ) -> str:
+        """
+        生成缓存键
+
+        Args:
+            audio_hash: 音频内容哈希（见 audio_content_hash）
+            model_size: Whisper模型大小
+            language: 音频语言代码
+            vad_parameters: VAD参数
+            compute_type: 实际使用的计算类型
+            chunk_workers: 分块转录的进程数，整段转录为0
+        """
+        raw = json.dumps(
+            [
+                audio_hash,
+                model_size,
+                language,
+                vad_parameters,
+                compute_type,
+                chunk_workers,
+            ],
+            sort_keys=True,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        """
+        读取缓存
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            转录结果列表，未命中时返回None
+        """
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                segments = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        # 更新修改时间作为最近使用时间，供LRU淘汰参考
+        os.utime(path, None)
+        return segments
+
+    def put(self, key: str, segments: List[Dict]):
+        """
+        写入缓存，超出总大小上限时淘汰最久未使用的条目
+
+        Args:
+            key: 缓存键
+            segments: 转录结果列表
+        """
+        path = self._path(key)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(segments, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self):
+        """按最近使用时间从旧到新删除，直到总大小不超过上限"""
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob("*.json"):
+            stat = path.stat()
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink()
+            total -= size
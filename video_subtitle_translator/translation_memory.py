@@ -0,0 +1,146 @@
+"""
+Persistent translation memory backed by SQLite
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from .config import TRANSLATION_MEMORY_PATH, TRANSLATION_MEMORY_MAX_ENTRIES
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_source(text: str) -> str:
+    """规范化原文：去除首尾空白并合并连续空白"""
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+class TranslationMemory:
+    """翻译记忆库（按 原文 + 模型 + 提示词版本 缓存译文）"""
+
+    def __init__(self, db_path: str = None, max_entries: int = None):
+        """
+        打开（或创建）翻译记忆库
+
+        Args:
+            db_path: SQLite数据库路径
+            max_entries: 最大条目数，超出后按最近使用时间淘汰
+        """
+        self.db_path = Path(db_path or TRANSLATION_MEMORY_PATH)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries or TRANSLATION_MEMORY_MAX_ENTRIES
+        self.hits = 0
+        self.misses = 0
+
+        # 翻译在线程池中进行，连接由锁保护后在线程间共享
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS translations (
+                key TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                model TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_last_used ON translations (last_used)"
+        )
+        self._conn.commit()
+        self._count = self._conn.execute(
+            "SELECT COUNT(*) FROM translations"
+        ).fetchone()[0]
+
+    @staticmethod
+    def make_key(text: str, model: str, prompt_version: int) -> str:
+        """生成缓存键：规范化原文 + 模型 + 提示词版本的SHA-256"""
+        raw = f"{prompt_version}\0{model}\0{normalize_source(text)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, text: str, model: str, prompt_version: int) -> Optional[str]:
+        """
+        查询译文
+
+        Args:
+            text: 原文
+            model: 翻译模型名称
+            prompt_version: 提示词版本
+
+        Returns:
+            缓存的译文，未命中时返回None
+        """
+        key = self.make_key(text, model, prompt_version)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT translation FROM translations WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE translations SET last_used = ? WHERE key = ?",
+                (time.time(), key),
+            )
+            self._conn.commit()
+            return row[0]
+
+    def put(self, text: str, model: str, prompt_version: int, translation: str):
+        """
+        写入译文，超出容量时淘汰最久未使用的条目
+
+        Args:
+            text: 原文
+            model: 翻译模型名称
+            prompt_version: 提示词版本
+            translation: 译文
+        """
+        key = self.make_key(text, model, prompt_version)
+        with self._lock:
+            exists = self._conn.execute(
+                "SELECT 1 FROM translations WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO translations "
+                "(key, source, translation, model, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, normalize_source(text), translation, model, time.time()),
+            )
+            if exists is None:
+                self._count += 1
+
+            if self._count > self.max_entries:
+                # 一次多淘汰10%，避免每次写入都触发删除
+                excess = self._count - int(self.max_entries * 0.9)
+                self._conn.execute(
+                    "DELETE FROM translations WHERE key IN "
+                    "(SELECT key FROM translations ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
+                self._count = self._conn.execute(
+                    "SELECT COUNT(*) FROM translations"
+                ).fetchone()[0]
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        """返回命中统计"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": self._count,
+        }
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
@@ -2,30 +2,367 @@
 Text translation using Ollama API
 """
 
+import json
+import math
+import queue
+import re
 import requests
+import threading
 import time
-from typing import List, Dict
-from .config import OLLAMA_HOST, OLLAMA_MODEL
+from collections import deque
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterable, List, Dict, Optional, Tuple
+from .config import (
+    OLLAMA_HOST,
+    OLLAMA_MODEL,
+    OLLAMA_KEEP_ALIVE,
+    OLLAMA_TIMEOUT,
+    TRANSLATION_CONCURRENCY,
+    TRANSLATION_BATCH_SIZE,
+    TRANSLATION_CONTEXT_LINES,
+    TRANSLATION_DEDUP,
+    TRANSLATION_MIN_PREDICT,
+    TRANSLATION_QUEUE_SIZE,
+    TRANSLATION_STREAM,
+    TRANSLATION_TOKENS_PER_CHAR,
+)
+from .segments import Segments, SegmentTable
+from .translation_memory import TranslationMemory
+
+# 提示词版本：修改翻译提示词或取回译文的方式后递增，使翻译记忆库中的旧译文失效
+# 2：批量编号提示词、上下文窗口（/api/chat）和流式截断都会影响译文
+PROMPT_VERSION = 2
+
+# 批量翻译回复中的编号行，如 "3. 译文" / "3、译文" / "3) 译文"
+_NUMBERED_LINE_RE = re.compile(r"^\s*(\d+)\s*[.、)）:：]\s*(.*)$")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# 上下文窗口模式（/api/chat）的系统提示词：所有请求完全相同，服务端可复用其KV缓存
+_CHAT_SYSTEM_PROMPT = """你是视频字幕翻译助手，把英文字幕翻译成简洁自然的中文。
+用户会给出若干条编号的英文字幕，前面可能附有已经翻译好的前文，供理解上下文使用。
+只翻译编号的字幕，每条一行，保持原编号，格式为"编号. 译文"。前文不要翻译或输出，不要合并或拆分句子、不要解释、不要提供多个版本、不要添加额外内容。"""
+# 去重时忽略的标点与符号
+_PUNCTUATION_RE = re.compile(r"[^\w\s]|_")
+
+
+def _num_predict(lines: List[str], numbered: bool = False) -> int:
+    """按原文长度估算最大生成token数（编号回复每行多留几个token给编号）"""
+    return sum(
+        max(TRANSLATION_MIN_PREDICT, math.ceil(len(line) * TRANSLATION_TOKENS_PER_CHAR))
+        + (4 if numbered else 0)
+        for line in lines
+    )
+
+
+def _clean_reply(line: str) -> str:
+    """清理可能的提示词残留"""
+    return line.replace("中文：", "").replace("Chinese:", "").strip()
+
+
+def _first_line(reply: str) -> str:
+    """回复中第一行非空译文（其后的解释、其他版本等一概忽略）"""
+    for line in reply.splitlines():
+        line = _clean_reply(line)
+        if line:
+            return line
+    return ""
+
+
+def _has_complete_line(reply: str) -> bool:
+    """流式回复中是否已有一行完整（以换行结束）的非空译文"""
+    return bool(_first_line(reply.rpartition("\n")[0]))
+
+
+def _dedup_key(text: str) -> str:
+    """去重用的规范化文本：忽略大小写、空白与标点；只有标点时按原文（压缩空白）比较"""
+    key = " ".join(_PUNCTUATION_RE.sub(" ", text.casefold()).split())
+    return key or " ".join(text.split())
 
 
 class Translator:
     """翻译器"""
 
-    def __init__(self, host: str = None, model: str = None):
+    def __init__(
+        self,
+        host: str = None,
+        model: str = None,
+        concurrency: int = None,
+        batch_size: int = None,
+        memory: Optional[TranslationMemory] = None,
+        pool_size: int = None,
+        dedup: bool = None,
+        context_lines: int = None,
+        stream: bool = None,
+    ):
         """
         初始化翻译器
 
         Args:
             host: Ollama API地址
             model: 使用的模型名称
+            concurrency: 同时在途的翻译请求数（1为逐句串行）
+            batch_size: 每次请求打包翻译的片段数（1为逐句翻译）
+            memory: 翻译记忆库，提供则在请求Ollama前先查询
+            pool_size: HTTP连接池大小，默认与并发数一致
+            dedup: 任务内去重，重复的片段只请求一次，默认 config.TRANSLATION_DEDUP
+            context_lines: 上下文窗口模式附带的前文条数，0为关闭，
+                默认 config.TRANSLATION_CONTEXT_LINES
+            stream: 流式读取回复，得到完整译文后提前断开，默认 config.TRANSLATION_STREAM
         """
         self.host = host or OLLAMA_HOST
         self.model = model or OLLAMA_MODEL
+        self.concurrency = max(1, concurrency or TRANSLATION_CONCURRENCY)
+        self.batch_size = max(1, batch_size or TRANSLATION_BATCH_SIZE)
+        self.memory = memory
+        self.dedup = TRANSLATION_DEDUP if dedup is None else dedup
+        self.context_lines = max(
+            0, TRANSLATION_CONTEXT_LINES if context_lines is None else context_lines
+        )
+        self.stream = TRANSLATION_STREAM if stream is None else stream
         self.api_url = f"{self.host}/api/generate"
+        self.chat_url = f"{self.host}/api/chat"
 
-    def translate_text(self, text: str, retries: int = 3, delay: float = 0.5) -> str:
+        # 复用长连接：每个在途请求占用一个连接，池大小不小于并发数
+        pool_size = max(pool_size or self.concurrency, 1)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # 请求与token计数（Ollama回复中的 prompt_eval_count / eval_count），
+        # 流式请求的首token耗时与提前断开数，以及去重省下的片段数，供运行指标使用
+        self.stats = {
+            "requests": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "eval_seconds": 0.0,
+            "streamed": 0,
+            "first_token_seconds": 0.0,
+            "cut_off": 0,
+            "deduplicated": 0,
+        }
+        self._stats_lock = threading.Lock()
+
+    def stats_snapshot(self) -> Dict:
+        """当前累计的请求与token计数"""
+        with self._stats_lock:
+            return dict(self.stats)
+
+    def close(self):
+        """关闭HTTP连接池"""
+        self.session.close()
+
+    def _post(
+        self,
+        url: str,
+        payload: Dict,
+        retries: int,
+        delay: float,
+        complete: Optional[Callable[[str], bool]] = None,
+    ) -> str:
         """
-        翻译单句文本
+        请求Ollama接口，失败时按指数退避重试，并累计请求与token计数
+
+        Args:
+            url: 接口地址（/api/generate 或 /api/chat）
+            payload: 请求体
+            retries: 重试次数
+            delay: 首次重试延迟（秒），之后每次翻倍
+            complete: 流式读取时判断回复是否已完整，返回True即断开不再等待
+
+        Returns:
+            模型回复文本
+
+        Raises:
+            requests.exceptions.RequestException: 重试耗尽后仍然失败
+        """
+        for attempt in range(retries):
+            try:
+                if payload["stream"]:
+                    return self._read_stream(url, payload, complete)
+                response = self.session.post(url, json=payload, timeout=OLLAMA_TIMEOUT)
+                response.raise_for_status()
+                result = response.json()
+                self._count_call(result)
+                return self._reply_text(result).strip()
+
+            except requests.exceptions.RequestException as e:
+                if attempt < retries - 1:
+                    print(f"Translation failed, retrying ({attempt + 1}/{retries})...")
+                    time.sleep(delay * (2**attempt))
+                else:
+                    print(f"Translation failed after {retries} attempts: {e}")
+                    raise
+
+    @staticmethod
+    def _reply_text(chunk: Dict) -> str:
+        """回复（或流式回复的一块）中的文本，兼容 /api/generate 与 /api/chat"""
+        if "message" in chunk:
+            return chunk["message"].get("content", "")
+        return chunk.get("response", "")
+
+    def _count_call(self, result: Dict, first_token: Optional[float] = None):
+        """累计一次请求的token计数，first_token 为流式请求的首token耗时（秒）"""
+        with self._stats_lock:
+            self.stats["requests"] += 1
+            self.stats["prompt_tokens"] += result.get("prompt_eval_count", 0)
+            self.stats["completion_tokens"] += result.get("eval_count", 0)
+            self.stats["eval_seconds"] += result.get("eval_duration", 0) / 1e9
+            if first_token is not None:
+                self.stats["streamed"] += 1
+                self.stats["first_token_seconds"] += first_token
+                self.stats["cut_off"] += bool(result.get("cut_off"))
+
+    def _read_stream(
+        self, url: str, payload: Dict, complete: Optional[Callable[[str], bool]]
+    ) -> str:
+        """
+        流式请求：逐块读取回复，complete 判断已完整时关闭连接，Ollama随即停止生成
+
+        提前断开时没有最后一块的统计信息，生成token数按收到的块数（每块一个token）
+        计算，生成耗时按首块到末块的时间计算，prompt token数记为0。
+
+        Ollama只在客户端断开时停止生成，提前断开的连接无法放回连接池，下次请求
+        重新建立连接（本地连接约1ms，远小于省下的生成时间）。正常结束的回复会读完
+        整个响应体，连接照常复用。
+        """
+        start = time.perf_counter()
+        first = last = None
+        parts = []
+        result = {}
+        with self.session.post(
+            url, json=payload, timeout=OLLAMA_TIMEOUT, stream=True
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                try:
+                    chunk = json.loads(line)
+                except ValueError as e:
+                    raise requests.exceptions.RequestException(f"无效的流式回复: {e}")
+                if "error" in chunk:
+                    raise requests.exceptions.RequestException(chunk["error"])
+                piece = self._reply_text(chunk)
+                if piece:
+                    last = time.perf_counter()
+                    first = first or last
+                    parts.append(piece)
+                if chunk.get("done"):
+                    # 不在此处break：读到响应体结尾，连接才会放回连接池
+                    result = chunk
+                    continue
+                if complete is not None and "\n" in piece and complete("".join(parts)):
+                    result = {
+                        "eval_count": len(parts),
+                        "eval_duration": int((last - first) * 1e9),
+                        "cut_off": True,
+                    }
+                    break
+        self._count_call(result, (first or time.perf_counter()) - start)
+        return "".join(parts).strip()
+
+    def stream_summary(self, before: Optional[Dict] = None) -> Dict:
+        """
+        流式请求的首token平均耗时与生成速度
+
+        Args:
+            before: 之前的 stats_snapshot()，提供时只统计此后的请求
+
+        Returns:
+            {"streamed": 请求数, "ttft_ms": 首token平均耗时（毫秒）,
+             "eval_tokens_per_second": 生成速度, "cut_off": 提前断开数}
+        """
+        after = self.stats_snapshot()
+        delta = {key: after[key] - (before or {}).get(key, 0) for key in after}
+        summary = {"streamed": delta["streamed"], "cut_off": delta["cut_off"]}
+        if delta["streamed"]:
+            summary["ttft_ms"] = round(
+                delta["first_token_seconds"] / delta["streamed"] * 1000, 1
+            )
+        if delta["eval_seconds"] > 0:
+            summary["eval_tokens_per_second"] = round(
+                delta["completion_tokens"] / delta["eval_seconds"], 2
+            )
+        return summary
+
+    @staticmethod
+    def _options(num_predict: int) -> Dict:
+        return {
+            "temperature": 0.1,  # 更低随机性
+            "num_predict": num_predict,  # 严格限制生成长度
+        }
+
+    def _generate(
+        self,
+        prompt: str,
+        num_predict: int,
+        retries: int = 3,
+        delay: float = 0.5,
+        complete: Optional[Callable[[str], bool]] = None,
+    ) -> str:
+        """
+        调用Ollama生成接口（/api/generate）
+
+        Args:
+            prompt: 完整提示词
+            num_predict: 最大生成token数
+            retries: 重试次数
+            delay: 首次重试延迟（秒），之后每次翻倍
+            complete: 流式读取时判断回复是否已完整（见 _post）
+
+        Returns:
+            模型回复文本
+
+        Raises:
+            requests.exceptions.RequestException: 重试耗尽后仍然失败
+        """
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": self.stream,
+            "keep_alive": OLLAMA_KEEP_ALIVE,
+            "options": self._options(num_predict),
+        }
+        return self._post(self.api_url, payload, retries, delay, complete)
+
+    def _chat(
+        self,
+        messages: List[Dict],
+        num_predict: int,
+        retries: int = 3,
+        delay: float = 0.5,
+        complete: Optional[Callable[[str], bool]] = None,
+    ) -> str:
+        """
+        调用Ollama对话接口（/api/chat）
+
+        Args:
+            messages: 对话消息列表（role/content）
+            num_predict: 最大生成token数
+            retries: 重试次数
+            delay: 首次重试延迟（秒），之后每次翻倍
+            complete: 流式读取时判断回复是否已完整（见 _post）
+
+        Returns:
+            模型回复文本
+
+        Raises:
+            requests.exceptions.RequestException: 重试耗尽后仍然失败
+        """
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "stream": self.stream,
+            "keep_alive": OLLAMA_KEEP_ALIVE,
+            "options": self._options(num_predict),
+        }
+        return self._post(self.chat_url, payload, retries, delay, complete)
+
+    def _request_single(self, text: str, retries: int = 3, delay: float = 0.5) -> str:
+        """
+        请求Ollama翻译单句文本（不查询翻译记忆库）
 
         Args:
             text: 要翻译的英文文本
@@ -34,63 +371,606 @@ class Translator:
 
         Returns:
             中文翻译结果
+
+        Raises:
+            requests.exceptions.RequestException: 重试耗尽后仍然失败
         """
         prompt = f"""将以下英文翻译成简洁自然的中文，直接输出翻译结果，不要解释、不要提供多个版本、不要添加额外内容：
 
 {text}"""
 
-        payload = {
-            "model": self.model,
-            "prompt": prompt,
-            "stream": False,
-            "options": {
-                "temperature": 0.1,  # 更低随机性
-                "num_predict": 100,  # 严格限制生成长度
-            },
-        }
+        translated = self._generate(
+            prompt, _num_predict([text]), retries, delay, _has_complete_line
+        )
+        # 只取第一行译文（流式读取时在第一行完整后即已断开）
+        return _first_line(translated)
 
-        for attempt in range(retries):
-            try:
-                response = requests.post(self.api_url, json=payload, timeout=60)
-                response.raise_for_status()
-                result = response.json()
+    def _translate_single(
+        self, text: str, retries: int = 3, delay: float = 0.5
+    ) -> Optional[str]:
+        """同 _request_single，请求失败时返回None"""
+        try:
+            return self._request_single(text, retries, delay)
+        except requests.exceptions.RequestException:
+            return None
+
+    def translate_text(self, text: str, retries: int = 3, delay: float = 0.5) -> str:
+        """
+        翻译单句文本
+
+        Args:
+            text: 要翻译的英文文本
+            retries: 重试次数
+            delay: 重试延迟（秒）
 
-                translated = result.get("response", "").strip()
-                # 清理可能的提示词残留
-                translated = (
-                    translated.replace("中文：", "").replace("Chinese:", "").strip()
+        Returns:
+            中文翻译结果
+        """
+        if self.memory is not None:
+            cached = self.memory.get(text, self.model, PROMPT_VERSION)
+            if cached is not None:
+                return cached
+
+        translated = self._translate_single(text, retries, delay)
+        if translated is None:
+            return text  # 失败返回原文
+
+        if self.memory is not None:
+            self.memory.put(text, self.model, PROMPT_VERSION, translated)
+        return translated
+
+    def translate_batch(
+        self, texts: List[str], retries: int = 3, delay: float = 0.5
+    ) -> Optional[List[str]]:
+        """
+        将多句英文打包成一个编号提示词翻译
+
+        Args:
+            texts: 要翻译的英文文本列表
+            retries: 重试次数
+            delay: 重试延迟（秒）
+
+        Returns:
+            与输入一一对应的中文翻译列表；回复编号无法对齐时返回None
+
+        Raises:
+            requests.exceptions.RequestException: 重试耗尽后仍然失败
+        """
+        # 片段内部的换行会破坏"一行一条"的对齐，先压成单行
+        lines = [_WHITESPACE_RE.sub(" ", text).strip() for text in texts]
+        numbered = "\n".join(f"{i}. {line}" for i, line in enumerate(lines, 1))
+        prompt = f"""将以下{len(lines)}条编号的英文句子逐条翻译成简洁自然的中文。每条一行，保持原编号，格式为"编号. 译文"，不要合并或拆分句子、不要解释、不要添加额外内容：
+
+{numbered}"""
+
+        reply = self._generate(
+            prompt,
+            _num_predict(lines, numbered=True),
+            retries,
+            delay,
+            self._numbered_complete(len(lines)),
+        )
+        return self._parse_numbered_reply(reply, len(lines))
+
+    def translate_window(
+        self,
+        texts: List[str],
+        context: List[Tuple[str, str]],
+        retries: int = 3,
+        delay: float = 0.5,
+    ) -> Optional[List[str]]:
+        """
+        上下文窗口翻译：一组连续片段连同前文译文一起经 /api/chat 翻译
+
+        系统提示词固定，前文与待译片段放在用户消息中，
+        各请求共用的前缀（系统提示词）可由Ollama复用KV缓存。
+
+        Args:
+            texts: 要翻译的英文文本列表
+            context: 前文 (原文, 译文) 列表，按时间顺序
+            retries: 重试次数
+            delay: 重试延迟（秒）
+
+        Returns:
+            与输入一一对应的中文翻译列表；回复编号无法对齐时返回None
+
+        Raises:
+            requests.exceptions.RequestException: 重试耗尽后仍然失败
+        """
+        lines = [_WHITESPACE_RE.sub(" ", text).strip() for text in texts]
+        numbered = "\n".join(f"{i}. {line}" for i, line in enumerate(lines, 1))
+        content = f"请翻译以下{len(lines)}条字幕：\n\n{numbered}"
+        if context:
+            previous = "\n".join(
+                f"{_WHITESPACE_RE.sub(' ', source).strip()} => {translated}"
+                for source, translated in context
+            )
+            content = f"前文（仅供参考）：\n{previous}\n\n{content}"
+        messages = [
+            {"role": "system", "content": _CHAT_SYSTEM_PROMPT},
+            {"role": "user", "content": content},
+        ]
+
+        reply = self._chat(
+            messages,
+            _num_predict(lines, numbered=True),
+            retries,
+            delay,
+            self._numbered_complete(len(lines)),
+        )
+        return self._parse_numbered_reply(reply, len(lines))
+
+    @staticmethod
+    def _numbered_complete(count: int) -> Callable[[str], bool]:
+        """流式读取编号回复时，最后一个编号的行完整后即可断开"""
+
+        def complete(reply: str) -> bool:
+            for line in reversed(reply.rpartition("\n")[0].splitlines()):
+                match = _NUMBERED_LINE_RE.match(line)
+                if match:
+                    return int(match.group(1)) >= count and bool(match.group(2).strip())
+            return False
+
+        return complete
+
+    @staticmethod
+    def _parse_numbered_reply(reply: str, count: int) -> Optional[List[str]]:
+        """
+        解析编号回复，要求1..count每个编号恰好出现一次
+
+        Args:
+            reply: 模型回复文本
+            count: 期望的条目数
+
+        Returns:
+            按编号排列的译文列表，无法对齐时返回None
+        """
+        results = {}
+        for line in reply.splitlines():
+            match = _NUMBERED_LINE_RE.match(line)
+            if not match:
+                continue
+            number = int(match.group(1))
+            if number < 1 or number > count or number in results:
+                return None
+            translated = match.group(2).replace("中文：", "").replace("Chinese:", "")
+            results[number] = translated.strip()
+
+        if len(results) != count or not all(results.values()):
+            return None
+        return [results[i] for i in range(1, count + 1)]
+
+    def _translate_group(
+        self, group: List[Dict], context: Optional[List[Tuple[str, str]]] = None
+    ) -> List[Optional[str]]:
+        """
+        翻译一组连续片段，批量回复无法对齐时逐句回退
+
+        请求本身失败（重试耗尽）时不再逐句回退：服务不可用时逐句请求同样会失败，
+        只会把每组的重试和等待成倍放大。此时整组（或尚未完成的部分）记为失败。
+
+        Args:
+            group: 片段列表
+            context: 前文 (原文, 译文) 列表，提供时使用上下文窗口翻译
+
+        Returns:
+            与片段一一对应的译文列表，翻译失败的位置为None
+        """
+        texts = [segment["text"] for segment in group]
+        translations: List[Optional[str]] = [None] * len(texts)
+        try:
+            if context is not None:
+                aligned = self.translate_window(texts, context)
+                if aligned is not None:
+                    return aligned
+                print(
+                    f"Window of {len(texts)} segments could not be aligned, "
+                    "falling back to plain translation"
+                )
+            if len(texts) > 1:
+                aligned = self.translate_batch(texts)
+                if aligned is not None:
+                    return aligned
+                print(
+                    f"Batch of {len(texts)} segments could not be aligned, "
+                    "falling back to per-line translation"
                 )
-                return translated
+            for i, text in enumerate(texts):
+                translations[i] = self._request_single(text)
+        except requests.exceptions.RequestException:
+            missing = translations.count(None)
+            print(f"Translation request failed, {missing} segments left untranslated")
+        return translations
 
-            except requests.exceptions.RequestException as e:
-                if attempt < retries - 1:
-                    print(f"Translation failed, retrying ({attempt + 1}/{retries})...")
-                    time.sleep(delay * (attempt + 1))
+    def _lookup_memory(self, segment: Dict) -> bool:
+        """查询翻译记忆库，命中时直接写入译文并返回True"""
+        if self.memory is None:
+            return False
+        cached = self.memory.get(segment["text"], self.model, PROMPT_VERSION)
+        if cached is None:
+            return False
+        segment["translation"] = cached
+        segment.pop("translation_failed", None)
+        return True
+
+    def _store_translation(
+        self, segment: Dict, translated_text: Optional[str], remember: bool = True
+    ):
+        """
+        写入译文并记入翻译记忆库，翻译失败时使用原文并标记 translation_failed
+
+        Args:
+            segment: 片段
+            translated_text: 译文，None表示翻译失败
+            remember: 是否记入翻译记忆库。去重分发的译文属于另一条原文
+                （大小写、标点可能不同），只在本次任务中使用，不以本片段的原文记入
+        """
+        if translated_text is None:
+            segment["translation"] = segment["text"]  # 失败返回原文
+            segment["translation_failed"] = True
+            return
+        segment["translation"] = translated_text
+        segment.pop("translation_failed", None)
+        if remember and self.memory is not None:
+            self.memory.put(segment["text"], self.model, PROMPT_VERSION, translated_text)
+
+    def _count_deduplicated(self, count: int, total: int):
+        """记录并打印去重结果"""
+        with self._stats_lock:
+            self.stats["deduplicated"] += count
+        if count:
+            print(
+                f"Deduplicated {count}/{total} repeated segments "
+                f"({count / total:.0%} fewer translations)"
+            )
+
+    def _deduplicate(
+        self, segments: List[Dict], indexes: List[int]
+    ) -> Tuple[List[int], Dict[int, List[int]]]:
+        """
+        规范化后文本相同的片段只保留第一个
+
+        Args:
+            segments: 片段列表
+            indexes: 待翻译片段的序号
+
+        Returns:
+            (需要翻译的序号, {保留的序号: 与之重复的序号列表})
+        """
+        first: Dict[str, int] = {}
+        duplicates: Dict[int, List[int]] = {}
+        for index in indexes:
+            key = _dedup_key(segments[index]["text"])
+            if key in first:
+                duplicates.setdefault(first[key], []).append(index)
+            else:
+                first[key] = index
+        self._count_deduplicated(len(indexes) - len(first), len(indexes))
+        return list(first.values()), duplicates
+
+    def _translate_windows(
+        self,
+        segments: List[Dict],
+        groups: List[List[int]],
+        concurrency: int,
+        apply: Callable[[List[int], List[Optional[str]]], None],
+    ):
+        """
+        上下文窗口模式：按顺序把各组分成 concurrency 个连续区间并行翻译，
+        区间内逐组进行，每组带上同一区间中前 context_lines 条的译文
+
+        Args:
+            segments: 片段列表
+            groups: 按顺序分好的片段序号组
+            concurrency: 同时在途的请求数（区间数）
+            apply: 写回一组译文的函数，在调用线程中执行
+        """
+        size = math.ceil(len(groups) / concurrency)
+        spans = [groups[i : i + size] for i in range(0, len(groups), size)]
+        results = queue.Queue()
+
+        def run(span: List[List[int]]):
+            context = deque(maxlen=self.context_lines)
+            try:
+                for group in span:
+                    batch = [segments[i] for i in group]
+                    translations = self._translate_group(batch, list(context))
+                    context.extend(
+                        (segment["text"], translated)
+                        for segment, translated in zip(batch, translations)
+                        if translated is not None
+                    )
+                    results.put((group, translations))
+            finally:
+                results.put(None)
+
+        with ThreadPoolExecutor(max_workers=len(spans)) as executor:
+            futures = [executor.submit(run, span) for span in spans]
+            remaining = len(spans)
+            while remaining:
+                item = results.get()
+                if item is None:
+                    remaining -= 1
                 else:
-                    print(f"Translation failed after {retries} attempts: {e}")
-                    return text  # 失败返回原文
+                    apply(*item)
+        for future in futures:
+            future.result()
 
-        return text
+    def _print_stream_stats(self, before: Dict):
+        """打印本次翻译中流式请求的首token耗时与生成速度"""
+        summary = self.stream_summary(before)
+        if summary["streamed"]:
+            speed = summary.get("eval_tokens_per_second")
+            print(
+                f"Streaming: {summary['ttft_ms']:.0f} ms to first token, "
+                + (f"{speed:.1f} tokens/s, " if speed is not None else "")
+                + f"{summary['cut_off']}/{summary['streamed']} responses cut off early"
+            )
 
-    def translate_segments(self, segments: List[Dict]) -> List[Dict]:
+    def _print_memory_stats(self):
+        """打印翻译记忆库命中统计"""
+        if self.memory is not None:
+            stats = self.memory.stats()
+            print(
+                f"Translation memory: {stats['hits']} hits, {stats['misses']} misses "
+                f"({stats['hit_rate']:.0%} hit rate)"
+            )
+
+    def translate_segments(
+        self,
+        segments: Segments,
+        concurrency: int = None,
+        batch_size: int = None,
+        on_translated: Optional[Callable[[int, Dict], None]] = None,
+    ) -> List[Dict]:
         """
         批量翻译转录结果
 
         Args:
-            segments: 转录结果列表
+            segments: 转录结果列表，或 SegmentTable（译文写回其译文列）
+            concurrency: 同时在途的翻译请求数，默认使用初始化时的设置
+            batch_size: 每次请求打包翻译的片段数，默认使用初始化时的设置
+            on_translated: 每个片段得到译文后的回调 (序号, 片段)，在调用线程中执行
 
         Returns:
-            添加翻译后的列表
+            添加翻译后的列表（顺序与输入一致）；输入为 SegmentTable 时返回该表
         """
-        print(f"Translating {len(segments)} segments...")
+        # 表的下标和迭代返回副本，转换为字典列表翻译，结束后写回译文列
+        table = segments if isinstance(segments, SegmentTable) else None
+        if table is not None:
+            segments = table.to_segments()
+        concurrency = max(1, concurrency or self.concurrency)
+        batch_size = max(1, batch_size or self.batch_size)
+        before = self.stats_snapshot()
+        print(
+            f"Translating {len(segments)} segments "
+            f"(concurrency: {concurrency}, batch size: {batch_size}"
+            + (f", context: {self.context_lines} lines" if self.context_lines else "")
+            + ")..."
+        )
+
+        # 先查翻译记忆库，只有未命中的片段才会发往Ollama
+        pending = []
+        for index, segment in enumerate(segments):
+            if not self._lookup_memory(segment):
+                pending.append(index)
+            elif on_translated is not None:
+                on_translated(index, segment)
+
+        # 重复的片段只翻译第一个，译文在 apply 中分发给其余片段
+        duplicates: Dict[int, List[int]] = {}
+        if self.dedup and pending:
+            pending, duplicates = self._deduplicate(segments, pending)
 
-        for i, segment in enumerate(segments):
-            original_text = segment["text"]
-            translated_text = self.translate_text(original_text)
-            segment["translation"] = translated_text
+        groups = [
+            pending[i : i + batch_size] for i in range(0, len(pending), batch_size)
+        ]
+        done = len(segments) - len(pending) - sum(map(len, duplicates.values()))
 
-            if (i + 1) % 10 == 0:
-                print(f"Translated {i + 1}/{len(segments)} segments")
+        def apply(group: List[int], translations: List[Optional[str]]):
+            nonlocal done
+            count = 0
+            for index, translated_text in zip(group, translations):
+                for i in [index] + duplicates.get(index, []):
+                    segment = segments[i]
+                    self._store_translation(segment, translated_text, i == index)
+                    if on_translated is not None:
+                        on_translated(i, segment)
+                    count += 1
+            # 按10的整数倍报告进度（批量时一次可能跨过多个刻度）
+            previous, done = done, done + count
+            if done // 10 > previous // 10:
+                print(f"Translated {done}/{len(segments)} segments")
 
+        if self.context_lines and groups:
+            self._translate_windows(segments, groups, concurrency, apply)
+        elif concurrency == 1:
+            for group in groups:
+                apply(group, self._translate_group([segments[i] for i in group]))
+        else:
+            # 每组独立提交，重试/失败回退仍由组内逻辑负责；
+            # 结果直接写回对应的片段字典，因此完成顺序不影响输出顺序
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                futures = {
+                    executor.submit(
+                        self._translate_group, [segments[i] for i in group]
+                    ): group
+                    for group in groups
+                }
+                for future in as_completed(futures):
+                    apply(futures[future], future.result())
+
+        self._print_stream_stats(before)
+        self._print_memory_stats()
         print("Translation complete!")
+        if table is not None:
+            table.translation[:] = [s.get("translation") for s in segments]
+            return table
+        return segments
+
+    def translate_stream(
+        self,
+        segment_iter: Iterable[Dict],
+        queue_size: int = None,
+        on_translated: Optional[Callable[[int, Dict], None]] = None,
+    ) -> List[Dict]:
+        """
+        边产出边翻译：在调用线程中迭代片段（如流式语音识别），
+        通过有界队列交给翻译线程，识别与翻译同时进行
+
+        Args:
+            segment_iter: 片段迭代器，或 SegmentTable（译文写回其译文列）
+            queue_size: 队列容量，翻译跟不上时识别端会在此阻塞
+            on_translated: 每个片段得到译文后的回调 (序号, 片段)，在翻译线程中执行
+
+        Returns:
+            添加翻译后的片段列表（顺序与迭代顺序一致）
+        """
+        # 迭代表得到的是副本，结束后把译文写回译文列
+        table = segment_iter if isinstance(segment_iter, SegmentTable) else None
+        print(
+            f"Streaming translation (concurrency: {self.concurrency}, "
+            f"batch size: {self.batch_size}"
+            + (f", context: {self.context_lines} lines" if self.context_lines else "")
+            + ")..."
+        )
+        before = self.stats_snapshot()
+        items = queue.Queue(maxsize=queue_size or TRANSLATION_QUEUE_SIZE)
+        segments = []
+        errors = []
+        lock = threading.Lock()
+        done = 0
+        # 去重：已得到译文的规范化文本，以及正在翻译的文本 -> 等待同一译文的片段
+        known: Dict[str, str] = {}
+        waiting: Dict[str, List[Tuple[int, Dict]]] = {}
+        deduplicated = 0
+
+        def finish(
+            group: List[Tuple[int, Dict]],
+            translations: List[Optional[str]],
+            remember: bool = True,
+        ):
+            nonlocal done
+            for (index, segment), translated_text in zip(group, translations):
+                self._store_translation(segment, translated_text, remember)
+                if on_translated is not None:
+                    on_translated(index, segment)
+            with lock:
+                previous, done = done, done + len(group)
+                if done // 10 > previous // 10:
+                    print(f"Translated {done} segments")
+
+        def context_before(index: int) -> Optional[List[Tuple[str, str]]]:
+            """上下文窗口模式：提交时已有译文的前 context_lines 条片段"""
+            if not self.context_lines:
+                return None
+            context = []
+            # 前面在途的组还没有译文，向前多看这些片段
+            lowest = index - self.context_lines - self.concurrency * self.batch_size
+            for segment in reversed(segments[max(0, lowest) : index]):
+                translated = segment.get("translation")
+                if translated is not None and not segment.get("translation_failed"):
+                    context.append((segment["text"], translated))
+                    if len(context) == self.context_lines:
+                        break
+            return context[::-1]
+
+        def fan_out(group: List[Tuple[int, Dict]], translations: List[Optional[str]]):
+            """写入一组译文，并分发给翻译期间到达的重复片段"""
+            finish(group, translations)
+            if not self.dedup:
+                return
+            for (_, segment), translated_text in zip(group, translations):
+                key = _dedup_key(segment["text"])
+                with lock:
+                    waiters = waiting.pop(key, [])
+                    # 翻译失败的不记住，之后再出现时重新请求
+                    if translated_text is not None:
+                        known[key] = translated_text
+                if waiters:
+                    finish(waiters, [translated_text] * len(waiters), remember=False)
+
+        def is_duplicate(item: Tuple[int, Dict]) -> bool:
+            """重复片段直接使用已有译文，或排队等待正在翻译的同一文本"""
+            nonlocal deduplicated
+            key = _dedup_key(item[1]["text"])
+            with lock:
+                translated_text = known.get(key)
+                if translated_text is None:
+                    if key not in waiting:
+                        waiting[key] = []
+                        return False
+                    waiting[key].append(item)
+                deduplicated += 1
+            if translated_text is not None:
+                finish([item], [translated_text], remember=False)
+            return True
+
+        def worker():
+            ended = False
+            try:
+                # 在途请求数由信号量限制，结果在线程池的完成回调中写回
+                slots = threading.BoundedSemaphore(self.concurrency)
+                with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+
+                    def submit(group):
+                        slots.acquire()
+                        future = executor.submit(
+                            self._translate_group,
+                            [segment for _, segment in group],
+                            context_before(group[0][0]),
+                        )
+
+                        def on_done(f):
+                            slots.release()
+                            try:
+                                fan_out(group, f.result())
+                            except BaseException as e:
+                                errors.append(e)
+
+                        future.add_done_callback(on_done)
+
+                    group = []
+                    while True:
+                        item = items.get()
+                        if item is None:
+                            ended = True
+                            break
+                        index, segment = item
+                        if self._lookup_memory(segment):
+                            finish([item], [segment["translation"]], remember=False)
+                            continue
+                        if self.dedup and is_duplicate(item):
+                            continue
+                        group.append(item)
+                        if len(group) >= self.batch_size:
+                            submit(group)
+                            group = []
+                    if group:
+                        submit(group)
+            except BaseException as e:
+                errors.append(e)
+                # 继续取空队列，避免生产端阻塞在put上
+                while not ended:
+                    ended = items.get() is None
+
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        try:
+            for index, segment in enumerate(segment_iter):
+                segments.append(segment)
+                items.put((index, segment))
+        finally:
+            items.put(None)
+            thread.join()
+
+        if errors:
+            raise errors[0]
+        if self.dedup and segments:
+            self._count_deduplicated(deduplicated, len(segments))
+        self._print_stream_stats(before)
+        self._print_memory_stats()
+        print(f"Translation complete! ({len(segments)} segments)")
+        if table is not None:
+            table.translation[:] = [s.get("translation") for s in segments]
         return segments
@@ -5,7 +5,10 @@ Video and subtitle merger using ffmpeg
 import os
 import subprocess
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
+
+from .config import SOFT_SUBTITLE_LANGUAGE, SOFT_SUBTITLE_TITLE
+from .encoding import video_encode_args
 
 
 def merge_subtitle_to_video(
@@ -13,6 +16,7 @@ def merge_subtitle_to_video(
     subtitle_path: str,
     output_path: Optional[str] = None,
     subtitle_format: str = "ass",
+    encoding: Optional[Dict] = None,
 ) -> str:
     """
     将字幕烧录到视频中
@@ -22,6 +26,7 @@ def merge_subtitle_to_video(
         subtitle_path: 字幕文件路径（.srt或.ass）
         output_path: 输出视频路径，默认在原视频名后加 "_translated"
         subtitle_format: 字幕格式
+        encoding: 视频编码配置（见 encoding.resolve_profile），默认使用默认配置
 
     Returns:
         输出视频路径
@@ -63,12 +68,7 @@ def merge_subtitle_to_video(
         vf_filter,
         "-c:a",
         "copy",  # 复制音频流，不重新编码
-        "-c:v",
-        "libx264",  # 视频编码器
-        "-preset",
-        "medium",  # 编码速度与质量平衡
-        "-crf",
-        "18",  # 视频质量（数值越小质量越高，18-23是视觉无损范围）
+        *video_encode_args(encoding, str(video_path)),  # 视频编码参数（见 ENCODING_PROFILES）
         str(output_path),
     ]
 
@@ -83,7 +83,10 @@ def merge_subtitle_to_video(
 
 
 def burn_srt_with_style(
-    video_path: str, srt_path: str, output_path: Optional[str] = None
+    video_path: str,
+    srt_path: str,
+    output_path: Optional[str] = None,
+    encoding: Optional[Dict] = None,
 ) -> str:
     """
     使用FFmpeg的subtitles滤镜烧录SRT字幕（带样式）
@@ -92,6 +95,7 @@ def burn_srt_with_style(
         video_path: 输入视频路径
         srt_path: SRT字幕路径
         output_path: 输出视频路径
+        encoding: 视频编码配置（见 encoding.resolve_profile），默认使用默认配置
 
     Returns:
         输出视频路径
@@ -134,12 +138,7 @@ def burn_srt_with_style(
         f"subtitles={srt_path_str}:force_style='{style_params}'",
         "-c:a",
         "copy",
-        "-c:v",
-        "libx264",
-        "-preset",
-        "medium",
-        "-crf",
-        "18",
+        *video_encode_args(encoding, str(video_path)),
         str(output_path),
     ]
 
@@ -151,3 +150,96 @@ def burn_srt_with_style(
 
     print(f"Video saved to: {output_path}")
     return str(output_path)
+
+
+# 软字幕封装：容器格式对应的字幕编码（未列出的容器改为输出MKV）
+SOFT_SUBTITLE_CODECS = {
+    ".mp4": "mov_text",
+    ".m4v": "mov_text",
+    ".mov": "mov_text",
+    ".mkv": "copy",  # MKV原生支持SRT/ASS，直接复制
+    ".webm": "webvtt",
+}
+
+
+def mux_subtitle_track(
+    video_path: str,
+    subtitle_path: str,
+    output_path: Optional[str] = None,
+    language: str = None,
+    title: str = None,
+) -> str:
+    """
+    将字幕作为独立的字幕轨封装进视频（软字幕），音视频流直接复制不重新编码
+
+    Args:
+        video_path: 输入视频路径
+        subtitle_path: 字幕文件路径（.srt或.ass）
+        output_path: 输出视频路径，默认在原视频名后加 "_translated"
+        language: 字幕轨语言（ISO 639-2），默认 SOFT_SUBTITLE_LANGUAGE
+        title: 字幕轨标题，默认 SOFT_SUBTITLE_TITLE
+
+    Returns:
+        输出视频路径
+    """
+    video_path = Path(video_path)
+    subtitle_path = Path(subtitle_path)
+
+    if output_path is None:
+        suffix = video_path.suffix
+        if suffix.lower() not in SOFT_SUBTITLE_CODECS:
+            suffix = ".mkv"
+        output_path = video_path.parent / f"{video_path.stem}_translated{suffix}"
+    else:
+        output_path = Path(output_path)
+
+    if not subtitle_path.exists():
+        raise FileNotFoundError(f"Subtitle file not found: {subtitle_path}")
+
+    subtitle_codec = SOFT_SUBTITLE_CODECS.get(output_path.suffix.lower())
+    if subtitle_codec is None:
+        raise ValueError(
+            f"Container does not support subtitle tracks: {output_path.suffix} "
+            f"(use one of {', '.join(SOFT_SUBTITLE_CODECS)})"
+        )
+
+    print(f"Muxing subtitle track into video (no re-encode)...")
+    print(f"Input: {video_path}")
+    print(f"Subtitle: {subtitle_path}")
+    print(f"Output: {output_path}")
+
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-i",
+        str(video_path),
+        "-i",
+        str(subtitle_path),
+        "-map",
+        "0:v",
+        "-map",
+        "0:a?",  # 源视频没有音频时也能处理
+        "-map",
+        "1:0",
+        "-c:v",
+        "copy",
+        "-c:a",
+        "copy",
+        "-c:s",
+        subtitle_codec,
+        "-metadata:s:s:0",
+        f"language={language or SOFT_SUBTITLE_LANGUAGE}",
+        "-metadata:s:s:0",
+        f"title={title or SOFT_SUBTITLE_TITLE}",
+        "-disposition:s:0",
+        "default",  # 播放器默认显示该字幕轨
+        str(output_path),
+    ]
+
+    result = subprocess.run(cmd, capture_output=True, text=True)
+
+    if result.returncode != 0:
+        raise RuntimeError(f"FFmpeg error: {result.stderr}")
+
+    print(f"Video with subtitle track saved to: {output_path}")
+    return str(output_path)
@@ -6,14 +6,21 @@ import subprocess
 from pathlib import Path
 
 
-from typing import Optional
+from typing import Dict, Optional
+
+from .encoding import video_encode_args
 
 
 def merge_with_drawtext(
-    video_path: str, srt_path: str, output_path: Optional[str] = None
+    video_path: str,
+    srt_path: str,
+    output_path: Optional[str] = None,
+    encoding: Optional[Dict] = None,
 ):
     """
     使用drawtext滤镜合并字幕（更可靠，避免路径问题）
+
+    encoding 为视频编码配置（见 encoding.resolve_profile），默认使用默认配置
     """
     video_path = Path(video_path)
     srt_path = Path(srt_path)
@@ -31,50 +38,43 @@ def merge_with_drawtext(
     print(f"Output: {output_path}")
 
     # 方案1: 使用ffmpeg的subtitles滤镜，但在字幕所在目录执行
-    # 先切换到字幕目录执行
-    import os
-
-    original_cwd = os.getcwd()
+    # 通过cwd参数指定ffmpeg的工作目录（不修改本进程的工作目录，多任务并发编码时互不影响）
     subtitle_dir = srt_path.parent
-
-    try:
-        os.chdir(subtitle_dir)
-        subtitle_name = srt_path.name
-
-        # 构建命令
-        cmd = [
-            "ffmpeg",
-            "-y",
-            "-i",
-            str(video_path),
-            "-vf",
-            f"subtitles='{subtitle_name}'",
-            "-c:a",
-            "copy",
-            "-c:v",
-            "libx264",
-            "-preset",
-            "medium",
-            "-crf",
-            "18",
-            str(output_path),
-        ]
-
-        result = subprocess.run(cmd, capture_output=True, text=True)
-
-        if result.returncode != 0:
-            raise RuntimeError(f"FFmpeg error: {result.stderr}")
-
-        print(f"Success! Output: {output_path}")
-        return str(output_path)
-
-    finally:
-        os.chdir(original_cwd)
-
-
-def merge_with_ass(video_path: str, ass_path: str, output_path: str = None):
+    subtitle_name = srt_path.name
+
+    # 构建命令
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-i",
+        str(video_path.resolve()),
+        "-vf",
+        f"subtitles='{subtitle_name}'",
+        "-c:a",
+        "copy",
+        *video_encode_args(encoding, str(video_path)),
+        str(output_path.resolve()),
+    ]
+
+    result = subprocess.run(cmd, capture_output=True, text=True, cwd=subtitle_dir)
+
+    if result.returncode != 0:
+        raise RuntimeError(f"FFmpeg error: {result.stderr}")
+
+    print(f"Success! Output: {output_path}")
+    return str(output_path)
+
+
+def merge_with_ass(
+    video_path: str,
+    ass_path: str,
+    output_path: str = None,
+    encoding: Optional[Dict] = None,
+):
     """
     使用ASS字幕和ass滤镜（样式更好）
+
+    encoding 为视频编码配置（见 encoding.resolve_profile），默认使用默认配置
     """
     video_path = Path(video_path)
     ass_path = Path(ass_path)
@@ -86,43 +86,29 @@ def merge_with_ass(video_path: str, ass_path: str, output_path: str = None):
     else:
         output_path = Path(output_path)
 
-    import os
-
-    original_cwd = os.getcwd()
     subtitle_dir = ass_path.parent
+    ass_name = ass_path.name
 
-    try:
-        os.chdir(subtitle_dir)
-        ass_name = ass_path.name
-
-        cmd = [
-            "ffmpeg",
-            "-y",
-            "-i",
-            str(video_path),
-            "-vf",
-            f"ass='{ass_name}'",
-            "-c:a",
-            "copy",
-            "-c:v",
-            "libx264",
-            "-preset",
-            "medium",
-            "-crf",
-            "18",
-            str(output_path),
-        ]
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-i",
+        str(video_path.resolve()),
+        "-vf",
+        f"ass='{ass_name}'",
+        "-c:a",
+        "copy",
+        *video_encode_args(encoding, str(video_path)),
+        str(output_path.resolve()),
+    ]
 
-        result = subprocess.run(cmd, capture_output=True, text=True)
+    result = subprocess.run(cmd, capture_output=True, text=True, cwd=subtitle_dir)
 
-        if result.returncode != 0:
-            raise RuntimeError(f"FFmpeg error: {result.stderr}")
+    if result.returncode != 0:
+        raise RuntimeError(f"FFmpeg error: {result.stderr}")
 
-        print(f"Success! Output: {output_path}")
-        return str(output_path)
-
-    finally:
-        os.chdir(original_cwd)
+    print(f"Success! Output: {output_path}")
+    return str(output_path)
 
 
 if __name__ == "__main__":
@@ -134,4 +120,7 @@ if __name__ == "__main__":
         output = sys.argv[3] if len(sys.argv) > 3 else None
         merge_with_drawtext(video, subtitle, output)
     else:
-        print("Usage: python video_merger_alt.py <video> <subtitle> [output]")
+        print(
+            "Usage: python -m video_subtitle_translator.video_merger_alt "
+            "<video> <subtitle> [output]"
+        )